@@ -0,0 +1,129 @@
+# change-aware alerting: which high scorers are new or materially changed since their last Slack post
+from __future__ import annotations
+
+import sqlite3
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+from src.merlin.db import DEFAULT_DB_PATH, connect
+from src.merlin.notify import SLACK_SCORE_THRESHOLD
+
+DEFAULT_MIN_DELTA = 5.0  # score move (either way) that re-alerts an already notified company
+
+# Candidates are this run's scores >= threshold (range scan on idx_score_history_rank);
+# companies / notification_state / founder_highlights are PK lookups per candidate.
+_PENDING_SQL = """
+    WITH cur AS (
+        SELECT h.company_key, c.company_name, h.score_total,
+               COALESCE(c.harmonic_num_funding_rounds, 0) AS funding_rounds,
+               c.harmonic_last_funding_at AS last_funding_at,
+               (SELECT COUNT(*) FROM founder_highlights AS fh
+                WHERE fh.company_key = h.company_key) AS highlight_count,
+               s.last_notified_score, s.last_notified_run,
+               s.funding_rounds AS prev_funding_rounds,
+               s.last_funding_at AS prev_last_funding_at,
+               s.highlight_count AS prev_highlight_count
+        FROM score_history AS h
+        JOIN companies AS c ON c.company_key = h.company_key
+        LEFT JOIN notification_state AS s ON s.company_key = h.company_key
+        WHERE h.run_id = ? AND h.score_total >= ?
+    )
+    SELECT * FROM cur
+    WHERE last_notified_score IS NULL
+       OR ABS(score_total - last_notified_score) >= ?
+       OR funding_rounds > prev_funding_rounds
+       OR COALESCE(last_funding_at, '') > COALESCE(prev_last_funding_at, '')
+       OR highlight_count > prev_highlight_count
+    ORDER BY score_total DESC
+"""
+
+
+def _reasons(row: Dict[str, Any], min_delta: float) -> List[str]:
+    if row["last_notified_score"] is None:
+        return ["new"]
+    reasons = []
+    delta = row["score_total"] - row["last_notified_score"]
+    if abs(delta) >= min_delta:
+        reasons.append(f"score {delta:+.1f}")
+    if row["funding_rounds"] > row["prev_funding_rounds"] or (row["last_funding_at"] or "") > (
+        row["prev_last_funding_at"] or ""
+    ):
+        reasons.append("new funding")
+    if row["highlight_count"] > row["prev_highlight_count"]:
+        reasons.append("new founder highlights")
+    return reasons
+
+
+def pending_alerts(
+    db_path: str = DEFAULT_DB_PATH,
+    *,
+    run_id: Optional[int] = None,
+    threshold: float = SLACK_SCORE_THRESHOLD,
+    min_delta: float = DEFAULT_MIN_DELTA,
+) -> List[Dict[str, Any]]:
+    """
+    Companies at or above `threshold` in `run_id` (default: latest finished run) that
+    were never notified, moved by >= `min_delta` since their last alert, or have new
+    funding / founder highlights. Each row carries `reasons`, e.g. ["score +6.5"].
+    """
+    conn = connect(db_path)
+    conn.row_factory = sqlite3.Row
+    try:
+        run = run_id
+        if run is None:
+            run = conn.execute("SELECT MAX(run_id) FROM runs WHERE status = 'done'").fetchone()[0]
+            if run is None:
+                raise ValueError("no finished runs in score history")
+        rows = [dict(r) for r in conn.execute(_PENDING_SQL, (run, threshold, min_delta))]
+    finally:
+        conn.close()
+    for row in rows:
+        row["run_id"] = run
+        row["reasons"] = _reasons(row, min_delta)
+    return rows
+
+
+def mark_notified(
+    alerts: Iterable[Dict[str, Any]],
+    db_path: str = DEFAULT_DB_PATH,
+    *,
+    run_id: Optional[int] = None,
+    threshold: float = SLACK_SCORE_THRESHOLD,
+    min_delta: float = DEFAULT_MIN_DELTA,
+) -> int:
+    """
+    Record `alerts` (rows from pending_alerts) as posted. Call after they are queued:
+    a crash in between re-alerts next run rather than losing the alert.
+
+    Companies that fell below threshold - min_delta in `run_id` are forgotten, so
+    crossing back up alerts as new, while hovering around the threshold does not.
+    """
+    now = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    alerts = list(alerts)
+    conn = connect(db_path)
+    try:
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO notification_state (company_key, last_notified_score, "
+                "last_notified_run, funding_rounds, last_funding_at, highlight_count, notified_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    (a["company_key"], a["score_total"], a["run_id"], a["funding_rounds"],
+                     a["last_funding_at"], a["highlight_count"], now)
+                    for a in alerts
+                ),
+            )
+            run = run_id if run_id is not None else (alerts[0]["run_id"] if alerts else None)
+            if run is not None:
+                # walks notification_state (only notified companies) with PK lookups into the run
+                conn.execute(
+                    """
+                    DELETE FROM notification_state
+                    WHERE (SELECT h.score_total FROM score_history AS h
+                           WHERE h.run_id = ? AND h.company_key = notification_state.company_key) < ?
+                    """,
+                    (run, threshold - min_delta),
+                )
+        return len(alerts)
+    finally:
+        conn.close()
@@ -0,0 +1,416 @@
+# offline benchmarks for every pipeline stage, with baseline comparison for gating merges
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing as mp
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+DEFAULT_SIZES = (1_000, 10_000)
+DEFAULT_OUT = "outputs/bench/latest.json"
+DEFAULT_BASELINE = "outputs/bench/baseline.json"
+DEFAULT_THRESHOLD = 0.15  # 15% slower / bigger than baseline = regression
+
+# --pipeline: its own report / baseline, so it never overwrites the per-stage ones
+PIPELINE_SIZES = (10_000, 100_000, 300_000, 1_000_000)  # about 40 minutes in all
+PIPELINE_OUT = "outputs/bench/pipeline_latest.json"
+PIPELINE_BASELINE = "outputs/bench/pipeline_baseline.json"
+# Peak RSS allowed on top of the smallest size: a fixed cost reached within the
+# first ~50k companies, all of it on the SQLite side (without DB writes RSS is flat
+# from 10k). Measured +64MB from 10k to 100k.
+PIPELINE_WARMUP_MB = 80.0
+# Past the warm-up: at most this much above the second smallest size. At 1M that
+# is ~27MB, i.e. a leak of ~30 bytes per company fails; measured 265 -> 278MB
+# from 100k to 1M, and flattening (274MB at 300k).
+PIPELINE_RSS_THRESHOLD = 0.10
+
+
+@dataclass
+class StageResult:
+    stage: str
+    companies: int
+    seconds: float
+    throughput: float  # companies / second
+    p50_us: Optional[float] = None  # per-company latency (stages that run per company)
+    p99_us: Optional[float] = None
+    peak_rss_mb: float = 0.0  # process high-water mark after the stage
+
+
+def peak_rss_mb() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def _percentile(sorted_values: List[int], q: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    idx = min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))
+    return sorted_values[idx] / 1000.0  # ns -> us
+
+
+def _per_company(stage: str, items: Sequence[Any], fn: Callable[[Any], Any]) -> tuple[StageResult, List[Any]]:
+    out: List[Any] = []
+    lat: List[int] = []
+    clock = time.perf_counter_ns
+    start = clock()
+    for item in items:
+        t0 = clock()
+        out.append(fn(item))
+        lat.append(clock() - t0)
+    elapsed = (clock() - start) / 1e9
+    lat.sort()
+    return (
+        StageResult(
+            stage=stage,
+            companies=len(items),
+            seconds=elapsed,
+            throughput=len(items) / elapsed if elapsed else 0.0,
+            p50_us=_percentile(lat, 0.50),
+            p99_us=_percentile(lat, 0.99),
+            peak_rss_mb=peak_rss_mb(),
+        ),
+        out,
+    )
+
+
+def _batch(stage: str, n: int, fn: Callable[[], Any]) -> tuple[StageResult, Any]:
+    start = time.perf_counter()
+    out = fn()
+    elapsed = time.perf_counter() - start
+    return (
+        StageResult(
+            stage=stage,
+            companies=n,
+            seconds=elapsed,
+            throughput=n / elapsed if elapsed else 0.0,
+            peak_rss_mb=peak_rss_mb(),
+        ),
+        out,
+    )
+
+
+def bench_size(n: int, seed: int = 0) -> Dict[str, Dict[str, Any]]:
+    """
+    Time each stage on n synthetic companies. Stages keep their outputs as the next
+    one's input, so peak RSS is the high-water mark up to that stage.
+    """
+    from src.merlin.enrichment.harmonic import map_company_to_harmonic_enrichment
+    from src.merlin.features import build_features
+    from src.merlin.models import RawCompany
+    from src.merlin.save_to_db import ScoreSink, save_scores_to_db, scored_companies_to_df
+    from src.merlin.scoring.calculate_score import process_company
+    from src.merlin.scoring.scoring import score_company
+    from src.merlin.synthetic import HarmonicProfile, SyntheticGenerator
+
+    import pandas  # noqa: F401  (imported lazily by save_to_db; keep it out of the timed stages)
+
+    gen = SyntheticGenerator(HarmonicProfile.from_file(), seed=seed)
+    rows = [r for r in gen.rows(n) if (r["harmonic_raw"] or {}).get("company")]
+    raws = [RawCompany(**r["raw_company"]) for r in rows]
+    results: Dict[str, StageResult] = {}
+
+    res, enrichments = _per_company(
+        "map_company_to_harmonic_enrichment",
+        [r["harmonic_raw"]["company"] for r in rows],
+        map_company_to_harmonic_enrichment,
+    )
+    results[res.stage] = res
+
+    pairs = list(zip(raws, enrichments))
+    res, features = _per_company("build_features", pairs, lambda p: build_features(*p))
+    results[res.stage] = res
+
+    res, _ = _per_company("score_company", features, score_company)
+    results[res.stage] = res
+
+    res, records = _per_company("process_company", pairs, lambda p: process_company(*p))
+    results[res.stage] = res
+
+    res, df = _batch("scored_companies_to_df", len(records), lambda: scored_companies_to_df(records))
+    results[res.stage] = res
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / "bench.db")
+        res, _ = _batch("save_scores_to_db", len(df), lambda: save_scores_to_db(df, db_path=db_path))
+        results[res.stage] = res
+
+        def stream() -> None:
+            with ScoreSink(str(Path(tmp) / "sink.db")) as sink:
+                for r in records:
+                    sink.add(r)
+
+        res, _ = _batch("ScoreSink", len(records), stream)
+        results[res.stage] = res
+
+    return {k: asdict(v) for k, v in results.items()}
+
+
+def bench_run_from_raw(n: int, seed: int = 0) -> Dict[str, Dict[str, Any]]:
+    """
+    The full run_from_raw path on a raw file of n companies (written first, not
+    timed; Slack off). Its own process, so its peak RSS is not bench_size's lists.
+    """
+    from src.merlin.run_from_raw import run_from_raw
+    from src.merlin.synthetic import HarmonicProfile, SyntheticGenerator, write_synthetic_raw_json
+
+    import pandas  # noqa: F401
+
+    gen = SyntheticGenerator(HarmonicProfile.from_file(), seed=seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        raw_path = write_synthetic_raw_json(Path(tmp) / "raw.json", n, gen)
+        db_path = str(Path(tmp) / "full.db")
+        res, _ = _batch(
+            "run_from_raw",
+            n,
+            lambda: run_from_raw(raw_path, db_path=db_path, notify=False, verbose=False),
+        )
+    return {res.stage: asdict(res)}
+
+
+def bench_pipeline(n: int, seed: int = 0) -> Dict[str, Dict[str, Any]]:
+    """
+    The streaming pipeline end to end (synthetic CSV -> synthetic Harmonic client ->
+    scores -> SQLite) on n companies. Past a fixed warm-up (PIPELINE_WARMUP_MB),
+    its peak RSS should not depend on n; see rss_growth.
+    """
+    from functools import partial
+
+    from src.merlin.pipeline import run_pipeline
+    from src.merlin.synthetic import HarmonicProfile, SyntheticGenerator, SyntheticHarmonicClient, write_synthetic_csv
+
+    import pandas  # noqa: F401  (imported lazily by ingestion; keep it out of the timed stage)
+
+    gen = SyntheticGenerator(HarmonicProfile.from_file(), seed=seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = str(write_synthetic_csv(Path(tmp) / "companies.csv", n, gen))
+        res, _ = _batch(
+            "pipeline",
+            n,
+            lambda: run_pipeline(
+                csv_path,
+                str(Path(tmp) / "pipeline.db"),
+                client_factory=partial(SyntheticHarmonicClient, gen),
+                concurrency=1,  # the synthetic client is CPU-bound; threads would only contend for the GIL
+                notify=False,
+                verbose=False,
+            ),
+        )
+    return {res.stage: asdict(res)}
+
+
+def _bench_size_worker(args: tuple[int, int]) -> Dict[str, Dict[str, Any]]:
+    return bench_size(*args)
+
+
+def _bench_run_from_raw_worker(args: tuple[int, int]) -> Dict[str, Dict[str, Any]]:
+    return bench_run_from_raw(*args)
+
+
+def _bench_pipeline_worker(args: tuple[int, int]) -> Dict[str, Dict[str, Any]]:
+    return bench_pipeline(*args)
+
+
+Worker = Callable[[tuple[int, int]], Dict[str, Dict[str, Any]]]
+
+STAGE_WORKERS: Sequence[Worker] = (_bench_size_worker, _bench_run_from_raw_worker)
+PIPELINE_WORKERS: Sequence[Worker] = (_bench_pipeline_worker,)
+
+
+def run_benchmarks(
+    sizes: Sequence[int],
+    seed: int = 0,
+    repeat: int = 1,
+    workers: Sequence[Worker] = STAGE_WORKERS,
+) -> Dict[str, Any]:
+    """
+    Each (size, worker, repeat) runs in a fresh process so peak RSS belongs to that
+    size and those stages only. With repeat > 1 the fastest run per stage is kept
+    (least noisy).
+    """
+    ctx = mp.get_context("spawn")
+    by_size: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    for n in sizes:
+        best: Dict[str, Dict[str, Any]] = {}
+        for worker in workers:
+            for _ in range(repeat):
+                with ctx.Pool(1) as pool:
+                    stages = pool.apply(worker, ((n, seed),))
+                for name, r in stages.items():
+                    if name not in best or r["seconds"] < best[name]["seconds"]:
+                        best[name] = r
+        by_size[str(n)] = best
+        print(f"  {n:>9,} companies done")
+
+    return {"meta": _meta(seed, repeat), "results": by_size}
+
+
+def _meta(seed: int, repeat: int) -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=False
+        ).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_commit": commit or None,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": seed,
+        "repeat": repeat,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float = DEFAULT_THRESHOLD) -> List[str]:
+    """
+    Regressions vs baseline for every (size, stage) present in both:
+    throughput down, p99 latency up, or peak RSS up by more than `threshold`.
+    """
+    problems: List[str] = []
+    for size, stages in current.get("results", {}).items():
+        base_stages = baseline.get("results", {}).get(size, {})
+        for stage, cur in stages.items():
+            base = base_stages.get(stage)
+            if not base:
+                continue
+            where = f"{stage} @ {int(size):,}"
+
+            if base["throughput"] and cur["throughput"] < base["throughput"] * (1 - threshold):
+                problems.append(
+                    f"{where}: throughput {cur['throughput']:,.0f}/s vs baseline {base['throughput']:,.0f}/s"
+                )
+            if base.get("p99_us") and cur.get("p99_us") and cur["p99_us"] > base["p99_us"] * (1 + threshold):
+                problems.append(f"{where}: p99 {cur['p99_us']:,.1f}us vs baseline {base['p99_us']:,.1f}us")
+            if base["peak_rss_mb"] and cur["peak_rss_mb"] > base["peak_rss_mb"] * (1 + threshold):
+                problems.append(
+                    f"{where}: peak RSS {cur['peak_rss_mb']:,.0f}MB vs baseline {base['peak_rss_mb']:,.0f}MB"
+                )
+    return problems
+
+
+def rss_growth(
+    report: Dict[str, Any],
+    threshold: float = DEFAULT_THRESHOLD,
+    *,
+    warmup_mb: float = 0.0,
+) -> List[str]:
+    """
+    Stages whose peak RSS grows with input size:
+      - any size above the smallest size's peak by more than `threshold` + `warmup_mb`
+      - with 3+ sizes, any size above the second smallest's by more than `threshold`
+        (sizes past the warm-up must be flat, so a slow leak can't hide in the allowance)
+    """
+    by_size = sorted(report.get("results", {}).items(), key=lambda kv: int(kv[0]))
+    problems: List[str] = []
+
+    def check(base_size: str, base: Dict[str, Dict[str, Any]], slack_mb: float) -> None:
+        for size, stages in by_size:
+            if int(size) <= int(base_size):
+                continue
+            for stage, cur in stages.items():
+                ref = base.get(stage)
+                if ref and cur["peak_rss_mb"] > ref["peak_rss_mb"] * (1 + threshold) + slack_mb:
+                    problems.append(
+                        f"{stage}: peak RSS {cur['peak_rss_mb']:,.0f}MB @ {int(size):,} "
+                        f"vs {ref['peak_rss_mb']:,.0f}MB @ {int(base_size):,}"
+                    )
+
+    if len(by_size) >= 2:
+        check(*by_size[0], warmup_mb)
+    if len(by_size) >= 3:
+        check(*by_size[1], 0.0)
+    return problems
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    lines = [f"{'stage':36} {'companies':>10} {'sec':>8} {'per sec':>10} {'p50 us':>9} {'p99 us':>9} {'RSS MB':>8}"]
+    for size, stages in report["results"].items():
+        for r in stages.values():
+            p50 = f"{r['p50_us']:.1f}" if r.get("p50_us") is not None else "-"
+            p99 = f"{r['p99_us']:.1f}" if r.get("p99_us") is not None else "-"
+            lines.append(
+                f"{r['stage']:36} {r['companies']:>10,} {r['seconds']:>8.2f} {r['throughput']:>10,.0f} "
+                f"{p50:>9} {p99:>9} {r['peak_rss_mb']:>8.0f}"
+            )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark every Merlin pipeline stage (offline)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=None, help=f"default: {DEFAULT_SIZES}")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--out", default=None, help=f"default: {DEFAULT_OUT} ({PIPELINE_OUT} with --pipeline)")
+    parser.add_argument(
+        "--baseline", default=None, help=f"default: {DEFAULT_BASELINE} ({PIPELINE_BASELINE} with --pipeline)"
+    )
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="allowed regression (0.15 = 15%%)")
+    parser.add_argument("--save-baseline", action="store_true", help="write this run as the new baseline")
+    parser.add_argument(
+        "--pipeline",
+        action="store_true",
+        help="only the end-to-end streaming pipeline, and fail if its peak RSS grows with size "
+        f"(default sizes: {PIPELINE_SIZES})",
+    )
+    args = parser.parse_args(argv)
+    if args.sizes is None:
+        args.sizes = list(PIPELINE_SIZES if args.pipeline else DEFAULT_SIZES)
+    if args.out is None:
+        args.out = PIPELINE_OUT if args.pipeline else DEFAULT_OUT
+    if args.baseline is None:
+        args.baseline = PIPELINE_BASELINE if args.pipeline else DEFAULT_BASELINE
+
+    print(f"Benchmarking sizes: {args.sizes}")
+    workers = PIPELINE_WORKERS if args.pipeline else STAGE_WORKERS
+    report = run_benchmarks(args.sizes, seed=args.seed, repeat=args.repeat, workers=workers)
+    print(format_report(report))
+
+    out = Path(args.out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    print(f"\nWrote {out}")
+
+    if args.pipeline:
+        growth = rss_growth(report, PIPELINE_RSS_THRESHOLD, warmup_mb=PIPELINE_WARMUP_MB)
+        allowance = f"{PIPELINE_RSS_THRESHOLD:.0%} + {PIPELINE_WARMUP_MB:.0f}MB warm-up"
+        if growth:
+            print(f"\nPeak RSS grows with input size (over {allowance}):")
+            for p in growth:
+                print(f"  - {p}")
+            return 1
+        print(f"\nPeak RSS flat across sizes (within {allowance})")
+
+    baseline_path = Path(args.baseline)
+    if args.save_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+        print(f"Saved baseline {baseline_path}")
+        return 0
+
+    if not baseline_path.is_file():
+        print(f"No baseline at {baseline_path}; run with --save-baseline to create one.")
+        return 0
+
+    problems = compare(report, json.loads(baseline_path.read_text(encoding="utf-8")), args.threshold)
+    if problems:
+        print(f"\n{len(problems)} regression(s) over {args.threshold:.0%}:")
+        for p in problems:
+            print(f"  - {p}")
+        return 1
+
+    print(f"\nNo regressions over {args.threshold:.0%} vs {baseline_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,53 @@
+# `merlin` console script: one subcommand per pipeline step, each module imported only when its command runs
+from __future__ import annotations
+
+import argparse
+import importlib
+import sys
+from typing import List, Optional
+
+# subcommand -> (module exposing main(argv), help line)
+COMMANDS = {
+    "ingest": ("src.merlin.ingestion", "load a sourcing CSV and report duplicates / missing domains"),
+    "fetch": ("src.merlin.enrichment.fetch_harmonic_raw", "enrich a sourcing CSV from Harmonic into a raw JSON file"),
+    "jobs": ("src.merlin.enrichment.jobs", "durable enrichment queue: enqueue a CSV, run workers, export results"),
+    "score": ("src.merlin.run_from_raw", "score a raw Harmonic file into the DB (leaderboard, alerts)"),
+    "run": ("src.merlin.pipeline", "enrich and score a sourcing CSV in one streaming pass (constant memory)"),
+    "history": ("src.merlin.history", "list scoring runs, or compact score_history (retention policy)"),
+    "shard": ("src.merlin.sharding", "merge `--shard i/N` runs into the DB, or run N shards as local processes"),
+    "export": ("src.merlin.export", "export a scoring run to partitioned Parquet"),
+    "notify": ("src.merlin.notify", "deliver the queued Slack outbox"),
+    "watch": ("src.merlin.daemon", "run continuously: ingest, enrich, score and notify every CSV dropped in an inbox"),
+    "bench": ("src.merlin.bench", "benchmark every pipeline stage on synthetic data"),
+}
+
+
+def _parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="merlin",
+        description="Merlin sourcing pipeline",
+        epilog="Run `merlin <command> --help` for a command's options.",
+    )
+    sub = parser.add_subparsers(dest="command", metavar="<command>", required=True)
+    for name, (_, help_text) in COMMANDS.items():
+        # options belong to the command's own parser, so --help is left for it
+        sub.add_parser(name, help=help_text, add_help=False)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args, rest = _parser().parse_known_args(sys.argv[1:] if argv is None else argv)
+
+    # before the command module: run_from_raw / notify / the clients read keys from the env
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+    module = importlib.import_module(COMMANDS[args.command][0])
+    sys.argv[0] = f"merlin {args.command}"  # argparse `prog` for the command's usage / --help
+    status = module.main(rest)
+    return status if isinstance(status, int) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,454 @@
+# long-running inbox watcher: CSV drop -> ingest -> enrich (new domains only) -> score -> persist -> notify
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import queue
+import signal
+import sqlite3
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+from src.merlin.db import DEFAULT_DB_PATH, connect
+from src.merlin.enrichment.http_metrics import HttpMetrics, metrics_path
+from src.merlin.history import finish_run, start_run
+from src.merlin.ingestion import iter_companies_from_csv
+from src.merlin.keys import canonical_domain
+from src.merlin.leaderboard import DEFAULT_TOP_K, TopKCollector
+from src.merlin.models import RawCompany
+from src.merlin.notify import SLACK_SCORE_THRESHOLD, SlackOutboxWorker
+from src.merlin.run_from_raw import _score_into, notify_changes
+from src.merlin.save_to_db import ScoreSink
+from src.merlin.scoring.attribution import AttributionSink
+from src.merlin.scoring.config import current_scoring, scoring_store
+
+log = logging.getLogger(__name__)
+
+DEFAULT_INBOX = "data/inbox"
+DEFAULT_RAW_DIR = "outputs/raw"
+DEFAULT_POLL_S = 5.0
+DEFAULT_QUEUE_SIZE = 256  # companies in flight between two stages
+DEFAULT_CHECKPOINT_ROWS = 10_000  # scored rows between a drop's checkpoints
+COMPLETED_KEEP = 100  # finished drops kept on the daemon for inspection
+
+_STOP = object()
+
+
+@dataclass
+class Drop:
+    """One claimed CSV file and what happened to it."""
+    path: Path          # under inbox/processing/ while in flight
+    source: str         # original file name
+    companies: int = 0
+    known: int = 0      # skipped: enriched before, already queued, or no domain
+    enriched: int = 0
+    not_found: int = 0
+    failed: int = 0
+    run_id: Optional[int] = None
+    scored: int = 0
+    error: Optional[str] = None
+    claimed_at: float = field(default_factory=time.monotonic)
+
+
+@dataclass
+class _DropEnd:
+    """Follows a drop's last company through the queues."""
+    drop: Drop
+
+
+class InboxDaemon:
+    """
+    Watches `inbox` for CSV drops and runs each through the pipeline as one scoring run.
+
+        watcher ──> [drops] ──> ingest ──> [to_enrich] ──> enrich ──> [to_score] ──> score + persist + notify
+
+    Every stage is one thread and every queue is bounded, so a slow stage (usually
+    the Harmonic API) blocks the stages before it instead of buffering a whole
+    file in memory; unclaimed files simply wait in the inbox.
+
+    Kept warm across drops: compiled scoring weights (reloaded between drops if
+    the config file changed), the Harmonic HTTP session, the score thread's DB
+    connection (scores, attributions, enriched domains and run bookkeeping all
+    go through it), the set of already enriched company keys, the Slack outbox
+    worker and HTTP metrics. Alerts are queued through alerts.py / notify.py,
+    which open their own short connections, once per drop.
+
+    Only companies not enriched before are fetched and scored, so each run holds
+    just the drop's new companies; a large drop is checkpointed every
+    `checkpoint_rows` rows, so nothing kept per drop grows with its size. Files move inbox/ -> processing/ -> done/ (or
+    failed/); raw responses are kept as <raw_dir>/<drop>.json (replayable with
+    `merlin score --raw`).
+    """
+
+    def __init__(
+        self,
+        inbox: str | Path = DEFAULT_INBOX,
+        db_path: str = DEFAULT_DB_PATH,
+        *,
+        raw_dir: str | Path = DEFAULT_RAW_DIR,
+        poll_interval: float = DEFAULT_POLL_S,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        checkpoint_rows: int = DEFAULT_CHECKPOINT_ROWS,
+        notify: bool = True,
+        top_k: int = DEFAULT_TOP_K,
+        client_factory: Optional[Callable[..., Any]] = None,
+    ) -> None:
+        self.inbox = Path(inbox)
+        self.db_path = db_path
+        self.raw_dir = Path(raw_dir)
+        self.poll_interval = poll_interval
+        self.checkpoint_rows = checkpoint_rows
+        self.notify = notify
+        self.top_k = top_k
+        self.http_metrics = HttpMetrics()
+        self._client_factory = client_factory
+        self._client: Any = None
+        self._conn: Optional[sqlite3.Connection] = None  # owned by the score thread
+
+        # only the watcher claims files; at most one drop waits ahead of ingest
+        self._drops: queue.Queue[Any] = queue.Queue(maxsize=1)
+        self._to_enrich: queue.Queue[Any] = queue.Queue(maxsize=queue_size)
+        self._to_score: queue.Queue[Any] = queue.Queue(maxsize=queue_size)
+
+        self._keys_lock = threading.Lock()  # _known / _pending: ingest checks, score checkpoints
+        self._known: set[str] = set()
+        self._pending: set[str] = set()  # queued for enrichment, not yet known
+        self._score_taken = 0  # items of the current drop the score thread took off its queue
+        self._seen: Dict[Path, Tuple[int, int]] = {}  # size / mtime at last poll
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._outbox: Optional[SlackOutboxWorker] = None
+        self.completed: Deque[Drop] = deque(maxlen=COMPLETED_KEEP)  # latest finished drops
+        self.drops_finished = 0
+
+        for sub in ("processing", "done", "failed"):
+            (self.inbox / sub).mkdir(parents=True, exist_ok=True)
+        self.raw_dir.mkdir(parents=True, exist_ok=True)
+
+    # --- Lifecycle ---
+    def start(self) -> "InboxDaemon":
+        conn = connect(self.db_path)
+        try:
+            self._known = {k for (k,) in conn.execute("SELECT company_key FROM companies")}
+            self._known.update(k for (k,) in conn.execute("SELECT domain FROM enriched_domains"))
+        finally:
+            conn.close()
+        # drops a previous process died on go back to the inbox
+        for path in (self.inbox / "processing").glob("*.csv"):
+            path.replace(self.inbox / path.name.split("-", 1)[-1])
+        log.info("Watching %s (%d companies already enriched)", self.inbox, len(self._known))
+
+        if self.notify:
+            self._outbox = SlackOutboxWorker(self.db_path).start()
+        for name, target in (("ingest", self._ingest_loop), ("enrich", self._enrich_loop), ("score", self._score_loop)):
+            t = threading.Thread(target=target, name=f"merlin-{name}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        return self
+
+    def run(self, *, once: bool = False) -> None:
+        """Poll the inbox until stop() (or, with once, until it is empty and everything finished)."""
+        try:
+            while not self._stop.is_set():
+                claimed = self._poll()
+                if once and not claimed and not self._seen and self._idle():
+                    break
+                self._stop.wait(self.poll_interval)
+        finally:
+            self.shutdown()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def shutdown(self) -> None:
+        """Let everything already claimed finish, then stop the stage threads."""
+        if not self._threads:
+            return
+        self._drops.put(_STOP)
+        for t in self._threads:
+            t.join()
+        self._threads.clear()
+        if self._outbox is not None:
+            self._outbox.stop()
+            self._outbox = None
+
+    def _idle(self) -> bool:
+        return all(q.unfinished_tasks == 0 for q in (self._drops, self._to_enrich, self._to_score))
+
+    # --- Watcher ---
+    def _poll(self) -> int:
+        """Claim a CSV once its size and mtime held still for one poll (the writer is done)."""
+        current: Dict[Path, Tuple[int, int]] = {}
+        for path in sorted(self.inbox.glob("*.csv")):
+            if path.name.startswith("."):
+                continue
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            current[path] = (st.st_size, st.st_mtime_ns)
+
+        claimed = 0
+        for path, sig in list(current.items()):
+            if self._seen.get(path) != sig or self._drops.full():
+                continue
+            stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+            claimed_path = self.inbox / "processing" / f"{stamp}-{path.name}"
+            path.replace(claimed_path)
+            self._drops.put(Drop(path=claimed_path, source=path.name))
+            log.info("Claimed %s", path.name)
+            del current[path]
+            claimed += 1
+        self._seen = current
+        return claimed
+
+    # --- Stages ---
+    def _ingest_loop(self) -> None:
+        while True:
+            drop = self._drops.get()
+            try:
+                if drop is _STOP:
+                    self._to_enrich.put(_STOP)
+                    return
+                self._ingest(drop)
+            finally:
+                self._drops.task_done()
+
+    def _ingest(self, drop: Drop) -> None:
+        try:
+            # read in chunks, so a large drop waits on the queue instead of in memory
+            for rc in iter_companies_from_csv(str(drop.path)):
+                key = canonical_domain(rc.domain)
+                drop.companies += 1
+                with self._keys_lock:
+                    skip = not key or key in self._known or key in self._pending
+                    if not skip:
+                        self._pending.add(key)
+                if skip:
+                    drop.known += 1
+                    continue
+                self._to_enrich.put((drop, rc))  # blocks while enrichment is behind
+        except Exception as e:
+            # companies queued before a bad chunk still go through; the drop ends up in failed/
+            log.exception("Could not read %s", drop.source)
+            drop.error = f"ingest: {e}"
+        self._to_enrich.put(_DropEnd(drop))
+
+    def _enrich_loop(self) -> None:
+        raw_file = None  # JSON array of the current drop's responses, written as they arrive
+        while True:
+            item = self._to_enrich.get()
+            try:
+                if item is _STOP:
+                    self._to_score.put(_STOP)
+                    return
+                if isinstance(item, _DropEnd):
+                    if raw_file is not None:
+                        raw_file.write("\n]\n")
+                        raw_file.close()
+                        raw_file = None
+                    self._to_score.put(item)
+                    continue
+
+                drop, rc = item
+                row = {"raw_company": asdict(rc), "harmonic_raw": self._enrich(drop, rc)}
+                if raw_file is None:
+                    raw_file = (self.raw_dir / f"{drop.path.stem}.json").open("w", encoding="utf-8")
+                    raw_file.write("[\n")
+                else:
+                    raw_file.write(",\n")
+                raw_file.write(json.dumps(row))
+                self._to_score.put((drop, row))
+            finally:
+                self._to_enrich.task_done()
+
+    def _enrich(self, drop: Drop, rc: RawCompany) -> Optional[Dict[str, Any]]:
+        if self._client is None:
+            from src.merlin.enrichment.harmonic_graphql_client import HarmonicGraphQLClient
+
+            factory = self._client_factory or HarmonicGraphQLClient
+            self._client = factory(hook=self.http_metrics)  # one keep-alive session for the daemon's life
+        domain = rc.domain.strip().lower()
+        try:
+            payload = self._client.enrich_company_by_domain(domain)
+        except Exception as e:
+            log.warning("Error enriching %s: %s", domain, e)
+            drop.failed += 1
+            return None
+        if payload and payload.get("companyFound"):
+            drop.enriched += 1
+        else:
+            drop.not_found += 1
+        return payload
+
+    def _score_loop(self) -> None:
+        self._conn = connect(self.db_path)  # one writer connection for the daemon's life
+        try:
+            while True:
+                item = self._to_score.get()
+                self._score_taken = 1
+                try:
+                    if item is _STOP:
+                        return
+                    if isinstance(item, _DropEnd):  # nothing new in this drop
+                        self._finish_drop(item.drop)
+                        continue
+                    drop, first = item
+                    try:
+                        self._score_drop(drop, self._drop_rows(first))
+                    except Exception as e:
+                        log.exception("Scoring %s (run %s) failed", drop.source, drop.run_id)
+                        drop.error = f"score: {e}"
+                    self._finish_drop(drop)
+                finally:
+                    # only now is the drop done, so _idle() cannot see it half scored
+                    for _ in range(self._score_taken):
+                        self._to_score.task_done()
+        finally:
+            self._conn.close()
+            self._conn = None
+
+    def _drop_rows(self, first: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """The drop's enriched rows, up to its _DropEnd (marked done by _score_loop)."""
+        yield first
+        while True:
+            item = self._to_score.get()
+            self._score_taken += 1
+            if isinstance(item, _DropEnd):
+                return
+            yield item[1]
+
+    def _score_drop(self, drop: Drop, rows: Iterator[Dict[str, Any]]) -> None:
+        """
+        Score one drop's rows as one run (run_from_raw's scoring loop, fed from the queue).
+
+        Every `checkpoint_rows` rows, what was scored so far is committed (scores,
+        attributions) and its domains recorded as enriched, so a drop's bookkeeping
+        stays bounded. A drop that fails partway keeps its checkpoints; its other
+        companies are fetched again when a later drop lists them.
+        """
+        scoring_store().maybe_reload()  # weights change between drops, never within one
+        leaderboard = TopKCollector(k=self.top_k, threshold=SLACK_SCORE_THRESHOLD if self.notify else None)
+        keys: List[str] = []  # CSV keys of the rows since the last checkpoint
+        found: List[Tuple[str, str]] = []  # (CSV key, Harmonic key) of the ones Harmonic knew
+
+        def checkpoint(sink: ScoreSink, attribution: AttributionSink) -> None:
+            sink.flush()  # scores are committed before their domains count as enriched
+            attribution.flush()
+            self._record_enriched(found)
+            # enriched companies are done; not found / failed ones are tried again in a later drop
+            with self._keys_lock:
+                self._known.update(key for key, _ in found)
+                self._pending.difference_update(keys)
+            keys.clear()
+            found.clear()
+
+        def tracked(sink: ScoreSink, attribution: AttributionSink) -> Iterator[Dict[str, Any]]:
+            for row in rows:
+                if len(keys) >= self.checkpoint_rows:  # every row so far is scored by now
+                    checkpoint(sink, attribution)
+                key = canonical_domain(row["raw_company"]["domain"])
+                keys.append(key)
+                company = (row["harmonic_raw"] or {}).get("company")
+                if company:
+                    website = company.get("website") or {}
+                    found.append((key, canonical_domain(website.get("domain") or website.get("url")) or key))
+                yield row
+
+        try:
+            drop.run_id = start_run(
+                self.db_path,
+                source=f"inbox:{drop.source}",
+                scoring_version=current_scoring().version,
+                conn=self._conn,
+            )
+            try:
+                # written from this thread: the drop waits on Harmonic, not on SQLite
+                with (
+                    ScoreSink(self.db_path, run_id=drop.run_id, background=False, conn=self._conn) as sink,
+                    AttributionSink(self.db_path, conn=self._conn) as attribution,
+                ):
+                    _score_into(tracked(sink, attribution), sink, leaderboard, attribution)
+                    checkpoint(sink, attribution)
+            except BaseException:
+                finish_run(drop.run_id, self.db_path, status="failed", conn=self._conn)
+                raise
+            finish_run(drop.run_id, self.db_path, companies=sink.rows, conn=self._conn)
+            drop.scored = sink.rows
+            if self.notify:
+                notify_changes(leaderboard, drop.run_id, self.db_path)
+                if self._outbox is not None:
+                    self._outbox.wake()
+        finally:
+            with self._keys_lock:
+                self._pending.difference_update(keys)
+            for row in rows:  # after a failure: drain the rest so the next drop lines up
+                key = canonical_domain(row["raw_company"]["domain"])
+                with self._keys_lock:
+                    self._pending.discard(key)
+
+    def _record_enriched(self, found: List[Tuple[str, str]]) -> None:
+        if not found:
+            return
+        now = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO enriched_domains (domain, company_key, enriched_at) VALUES (?, ?, ?)",
+                ((key, company_key, now) for key, company_key in found),
+            )
+
+    def _finish_drop(self, drop: Drop) -> None:
+        target = self.inbox / ("failed" if drop.error else "done") / drop.path.name
+        if drop.path.exists():
+            drop.path.replace(target)
+        metrics_file = self.http_metrics.write_prometheus(metrics_path("daemon", self.db_path))
+        self.completed.append(drop)
+        self.drops_finished += 1
+        log.info(
+            "%s %s: %d companies, %d already known, %d enriched, %d not found, %d failed, "
+            "%d scored (run %s) in %.1fs; HTTP metrics in %s",
+            "Failed" if drop.error else "Finished", drop.source, drop.companies, drop.known, drop.enriched,
+            drop.not_found, drop.failed, drop.scored, drop.run_id, time.monotonic() - drop.claimed_at,
+            metrics_file,
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Watch an inbox directory for sourcing CSVs and run the pipeline")
+    parser.add_argument("--inbox", default=DEFAULT_INBOX)
+    parser.add_argument("--db", default=DEFAULT_DB_PATH)
+    parser.add_argument("--raw-dir", default=DEFAULT_RAW_DIR, help="raw Harmonic responses, one JSON file per drop")
+    parser.add_argument("--poll", type=float, default=DEFAULT_POLL_S, help="seconds between inbox scans")
+    parser.add_argument("--queue-size", type=int, default=DEFAULT_QUEUE_SIZE, help="companies buffered per stage")
+    parser.add_argument(
+        "--checkpoint-rows", type=int, default=DEFAULT_CHECKPOINT_ROWS, help="scored rows between a drop's commits"
+    )
+    parser.add_argument("--top-k", type=int, default=DEFAULT_TOP_K)
+    parser.add_argument("--no-notify", action="store_true", help="don't queue Slack alerts")
+    parser.add_argument("--once", action="store_true", help="process what is in the inbox, then exit")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    daemon = InboxDaemon(
+        args.inbox,
+        args.db,
+        raw_dir=args.raw_dir,
+        poll_interval=args.poll,
+        queue_size=args.queue_size,
+        checkpoint_rows=args.checkpoint_rows,
+        notify=not args.no_notify,
+        top_k=args.top_k,
+    ).start()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: daemon.stop())  # finish what is claimed, then exit
+    daemon.run(once=args.once)
+
+
+if __name__ == "__main__":
+    main()
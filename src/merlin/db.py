@@ -0,0 +1,501 @@
+# sqlite connection + versioned schema for merlin_scores.db
+from __future__ import annotations
+
+import sqlite3
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+DEFAULT_DB_PATH = "data/merlin_scores.db"
+
+# the WAL file is cut back to this after a checkpoint restarts it (see checkpoint_wal)
+WAL_SIZE_LIMIT = 64 * 1024 * 1024
+
+
+def connect(db_path: str = DEFAULT_DB_PATH) -> sqlite3.Connection:
+    """
+    Open the scores DB in WAL mode (readers such as the Streamlit app are not
+    blocked while a run writes) and bring the schema up to date.
+    """
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA journal_size_limit={WAL_SIZE_LIMIT}")
+    ensure_schema(conn)
+    return conn
+
+
+def checkpoint_wal(conn: sqlite3.Connection) -> None:
+    """
+    Copy the WAL back into the DB and make the next write start it over. The
+    automatic checkpoint never waits, so while another connection keeps writing
+    (a long streaming run) it never completes and the WAL, and the -shm index
+    mapped into every connection, grow with the whole run.
+    """
+    conn.execute("PRAGMA wal_checkpoint(RESTART)").fetchone()
+
+
+def fetch_dicts(db_path: str, sql: str, params: Sequence[Any] = ()) -> List[Dict[str, Any]]:
+    """Run one read query on a fresh connection; rows as dicts."""
+    conn = connect(db_path)
+    conn.row_factory = sqlite3.Row
+    try:
+        return [dict(r) for r in conn.execute(sql, params)]
+    finally:
+        conn.close()
+
+
+# --- Schema migrations (PRAGMA user_version = number of migrations applied) ---
+def _v1_companies(conn: sqlite3.Connection) -> None:
+    # Before this schema, `companies` was written by DataFrame.to_sql(if_exists="replace")
+    # on every run, with no key. Nothing in it outlives a run, so it is safe to drop.
+    conn.execute("DROP TABLE IF EXISTS companies")
+    conn.execute(
+        """
+        CREATE TABLE companies (
+            company_key TEXT PRIMARY KEY,  -- canonical website domain
+
+            company_name TEXT,
+            website_url TEXT,
+            sectors TEXT,
+            location TEXT,
+            funding_total INTEGER,
+            customer_type TEXT,
+            founder_name TEXT,
+            founder_linkedin TEXT,
+            founder_email TEXT,
+            score_team REAL,
+            score_market REAL,
+            score_funding REAL,
+            score_total REAL,
+
+            harmonic_id TEXT,
+            website_domain TEXT,
+            harmonic_website_url TEXT,
+            harmonic_stage TEXT,
+            harmonic_funding_total REAL,
+            harmonic_num_funding_rounds INTEGER,
+            harmonic_last_funding_at TEXT,
+            harmonic_investors TEXT,
+            harmonic_headcount INTEGER,
+            founding_date TEXT,
+            founding_date_granularity TEXT,
+            location_raw TEXT,
+            tags TEXT,
+            tags_v2 TEXT,
+            industries TEXT,
+            market_verticals TEXT,
+            market_sub_verticals TEXT,
+            technology_types TEXT,
+            product_types TEXT,
+            highlight_categories TEXT,
+            highlight_texts TEXT,
+            founder_highlights TEXT,
+            traction_metrics TEXT,
+            advisor_headcount REAL,
+            web_traffic TEXT,
+            likelihood_of_backing REAL,
+
+            description TEXT,
+            sub_sectors TEXT,
+            features TEXT,
+
+            updated_at TEXT NOT NULL  -- last run that changed this row
+        )
+        """
+    )
+    conn.execute("CREATE INDEX idx_companies_score_total ON companies(score_total DESC)")
+    conn.execute("CREATE INDEX idx_companies_sectors ON companies(sectors, score_total DESC)")
+    conn.execute("CREATE INDEX idx_companies_harmonic_id ON companies(harmonic_id)")
+
+
+# companies JSON-list column -> company_tags.tag_type
+TAG_COLUMNS = {
+    "tags": "tag",
+    "tags_v2": "tag_v2",
+    "industries": "industry",
+    "market_verticals": "market_vertical",
+    "market_sub_verticals": "market_sub_vertical",
+    "technology_types": "technology_type",
+    "product_types": "product_type",
+    "highlight_categories": "highlight",
+}
+
+
+# INSERT ... SELECT per normalized table, exploding the JSON columns of the
+# companies rows matched by {where} (aliased c)
+_CHILD_INSERTS = [
+    """
+    INSERT OR IGNORE INTO founders (company_key, founder_idx, name, title, linkedin_url, emails)
+    SELECT c.company_key, f.key, json_extract(f.value, '$.name'), json_extract(f.value, '$.title'),
+           json_extract(f.value, '$.linkedin_url'), json_extract(f.value, '$.emails')
+    FROM companies AS c, json_each(c.founders) AS f
+    WHERE {where}
+    """,
+    """
+    INSERT OR IGNORE INTO founder_highlights (company_key, founder_idx, highlight_idx, category, text)
+    SELECT c.company_key, f.key, h.key, json_extract(h.value, '$.category'), json_extract(h.value, '$.text')
+    FROM companies AS c, json_each(c.founders) AS f, json_each(f.value, '$.highlights') AS h
+    WHERE {where}
+    """,
+    """
+    INSERT OR IGNORE INTO company_investors (company_key, investor)
+    SELECT c.company_key, j.value FROM companies AS c, json_each(c.harmonic_investors) AS j
+    WHERE {where} AND j.value IS NOT NULL AND j.value <> ''
+    """,
+] + [
+    f"""
+    INSERT OR IGNORE INTO company_tags (company_key, tag_type, tag)
+    SELECT c.company_key, '{tag_type}', j.value FROM companies AS c, json_each(c.{col}) AS j
+    WHERE {{where}} AND j.value IS NOT NULL AND j.value <> ''
+    """
+    for col, tag_type in TAG_COLUMNS.items()
+]
+
+CHILD_TABLES = ("founders", "founder_highlights", "company_tags", "company_investors")
+
+
+def _v2_normalized(conn: sqlite3.Connection) -> None:
+    # structured founders (name/title/linkedin/emails/highlights stay aligned per founder)
+    conn.execute("ALTER TABLE companies ADD COLUMN founders TEXT")
+
+    conn.execute(
+        """
+        CREATE TABLE founders (
+            company_key TEXT NOT NULL,
+            founder_idx INTEGER NOT NULL,
+            name TEXT COLLATE NOCASE,
+            title TEXT,
+            linkedin_url TEXT,
+            emails TEXT,  -- JSON list
+            PRIMARY KEY (company_key, founder_idx)
+        ) WITHOUT ROWID
+        """
+    )
+    conn.execute("CREATE INDEX idx_founders_name ON founders(name)")
+    conn.execute("CREATE INDEX idx_founders_linkedin ON founders(linkedin_url)")
+
+    conn.execute(
+        """
+        CREATE TABLE founder_highlights (
+            company_key TEXT NOT NULL,
+            founder_idx INTEGER NOT NULL,
+            highlight_idx INTEGER NOT NULL,
+            category TEXT,
+            text TEXT,
+            PRIMARY KEY (company_key, founder_idx, highlight_idx)
+        ) WITHOUT ROWID
+        """
+    )
+    conn.execute("CREATE INDEX idx_founder_highlights_category ON founder_highlights(category, company_key)")
+
+    conn.execute(
+        """
+        CREATE TABLE company_tags (
+            company_key TEXT NOT NULL,
+            tag_type TEXT NOT NULL,
+            tag TEXT NOT NULL COLLATE NOCASE,
+            PRIMARY KEY (company_key, tag_type, tag)
+        ) WITHOUT ROWID
+        """
+    )
+    conn.execute("CREATE INDEX idx_company_tags_tag ON company_tags(tag, tag_type, company_key)")
+
+    conn.execute(
+        """
+        CREATE TABLE company_investors (
+            company_key TEXT NOT NULL,
+            investor TEXT NOT NULL COLLATE NOCASE,
+            PRIMARY KEY (company_key, investor)
+        ) WITHOUT ROWID
+        """
+    )
+    conn.execute("CREATE INDEX idx_company_investors_investor ON company_investors(investor, company_key)")
+
+    # finds the rows a save just inserted/changed, see sync_child_tables
+    conn.execute("CREATE INDEX idx_companies_updated_at ON companies(updated_at)")
+
+    # backfill what v1 already stored (founders arrive with the next run)
+    sync_child_tables(conn)
+
+
+def _v3_history(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE runs (
+            run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            started_at TEXT NOT NULL,
+            finished_at TEXT,
+            source TEXT,
+            scoring_version TEXT,
+            companies INTEGER,
+            status TEXT NOT NULL DEFAULT 'running'  -- running | done | failed
+        )
+        """
+    )
+    # Append-only; clustered by run so a snapshot (or dropping one) is a range scan.
+    conn.execute(
+        """
+        CREATE TABLE score_history (
+            run_id INTEGER NOT NULL,
+            company_key TEXT NOT NULL,
+            score_team REAL,
+            score_market REAL,
+            score_funding REAL,
+            score_total REAL,
+            PRIMARY KEY (run_id, company_key)
+        ) WITHOUT ROWID
+        """
+    )
+    # covering: trajectories read (company_key -> run_id, score_total) from the index alone
+    conn.execute("CREATE INDEX idx_score_history_company ON score_history(company_key, run_id, score_total)")
+    # top-K of a run without sorting the snapshot
+    conn.execute("CREATE INDEX idx_score_history_rank ON score_history(run_id, score_total DESC, company_key)")
+
+
+# bm25 weights for company_search columns (company_name, description, highlights, founder_highlights)
+SEARCH_COLUMN_WEIGHTS = (5.0, 1.0, 0.5, 0.5)
+
+# one search document per company, rowid = companies.rowid (company_id from v11: stable
+# across UPSERTs and VACUUM)
+_SEARCH_INSERT = """
+    INSERT INTO company_search (rowid, company_name, description, highlights, founder_highlights)
+    SELECT c.rowid,
+           c.company_name,
+           -- raw + Harmonic description as combined by build_features
+           COALESCE(json_extract(c.features, '$.description'), c.description),
+           (SELECT group_concat(j.value, ' ') FROM json_each(c.highlight_texts) AS j),
+           (SELECT group_concat(fh.text, ' ') FROM founder_highlights AS fh WHERE fh.company_key = c.company_key)
+    FROM companies AS c
+    WHERE {where}
+"""
+
+
+def _v4_search(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE VIRTUAL TABLE company_search USING fts5(
+            company_name, description, highlights, founder_highlights,
+            tokenize = 'porter unicode61 remove_diacritics 2'
+        )
+        """
+    )
+    # persistent default ranking: name matches count most, highlights least
+    conn.execute(
+        f"INSERT INTO company_search (company_search, rank) VALUES ('rank', 'bm25({', '.join(map(str, SEARCH_COLUMN_WEIGHTS))})')"
+    )
+    sync_search_index(conn)
+
+
+def _v5_slack_outbox(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE slack_outbox (
+            id INTEGER PRIMARY KEY,
+            idempotency_key TEXT NOT NULL UNIQUE,  -- same key enqueued twice = one message
+            payload TEXT NOT NULL,  -- JSON body for the webhook
+            status TEXT NOT NULL DEFAULT 'pending',  -- pending | sending | sent | dead
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at REAL NOT NULL,  -- unix time; also the lease expiry while 'sending'
+            last_error TEXT,
+            created_at TEXT NOT NULL,
+            sent_at TEXT
+        )
+        """
+    )
+    conn.execute("CREATE INDEX idx_slack_outbox_queue ON slack_outbox(status, id)")
+
+
+def _v6_notification_state(conn: sqlite3.Connection) -> None:
+    # what each company looked like when it was last posted to Slack (see alerts.py)
+    conn.execute(
+        """
+        CREATE TABLE notification_state (
+            company_key TEXT PRIMARY KEY,
+            last_notified_score REAL NOT NULL,
+            last_notified_run INTEGER,
+            funding_rounds INTEGER NOT NULL DEFAULT 0,
+            last_funding_at TEXT,
+            highlight_count INTEGER NOT NULL DEFAULT 0,  -- founder_highlights rows
+            notified_at TEXT NOT NULL
+        ) WITHOUT ROWID
+        """
+    )
+
+
+def _v7_browse_indexes(conn: sqlite3.Connection) -> None:
+    # sort / filter paths of queries.browse_companies (score_total is covered by v1)
+    conn.execute("CREATE INDEX idx_companies_score_team ON companies(score_team DESC)")
+    conn.execute("CREATE INDEX idx_companies_score_market ON companies(score_market DESC)")
+    conn.execute("CREATE INDEX idx_companies_score_funding ON companies(score_funding DESC)")
+    conn.execute("CREATE INDEX idx_companies_stage ON companies(harmonic_stage, score_total DESC)")
+
+
+def _v8_enriched_domains(conn: sqlite3.Connection) -> None:
+    # sourcing-side domains already found in Harmonic; the inbox daemon skips them.
+    # Harmonic's website (companies.company_key) can differ from the domain we sourced.
+    conn.execute(
+        """
+        CREATE TABLE enriched_domains (
+            domain TEXT PRIMARY KEY,           -- canonical_domain of the sourcing CSV's URL
+            company_key TEXT NOT NULL,
+            enriched_at TEXT NOT NULL
+        ) WITHOUT ROWID
+        """
+    )
+
+
+def _v9_enrichment_jobs(conn: sqlite3.Connection) -> None:
+    # durable Harmonic enrichment queue shared by worker processes (enrichment/jobs.py)
+    conn.execute(
+        """
+        CREATE TABLE enrichment_jobs (
+            id INTEGER PRIMARY KEY,
+            domain TEXT NOT NULL UNIQUE,  -- canonical_domain of the sourced URL: one job per company
+            raw_company TEXT NOT NULL,  -- RawCompany as JSON
+            status TEXT NOT NULL DEFAULT 'pending',  -- pending | leased | done | dead
+            attempts INTEGER NOT NULL DEFAULT 0,
+            visible_at REAL NOT NULL,  -- unix time it can be claimed; the lease expiry while 'leased'
+            lease_owner TEXT,
+            result TEXT,  -- enrichCompanyByIdentifiers payload (JSON) once done
+            last_error TEXT,
+            created_at TEXT NOT NULL,
+            finished_at TEXT
+        )
+        """
+    )
+    conn.execute(
+        "CREATE INDEX idx_enrichment_jobs_claim ON enrichment_jobs(visible_at) "
+        "WHERE status IN ('pending', 'leased')"
+    )
+    # cross-process request pacing: next free slot per limiter
+    conn.execute("CREATE TABLE rate_limits (name TEXT PRIMARY KEY, next_at REAL NOT NULL) WITHOUT ROWID")
+
+
+def _v10_attributions(conn: sqlite3.Connection) -> None:
+    # per-company score explanations (scoring/attribution.py). `points` is the term's share
+    # of that company's score_total under the composite weights it was scored with, so a
+    # later run under another config can't change the explanation of companies it skipped.
+    # Earlier runs created these tables themselves, with one global weight per term.
+    old = "composite_weight" in {r[1] for r in conn.execute("PRAGMA table_info(attribution_terms)")}
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS attribution_terms (
+            term_id INTEGER PRIMARY KEY,
+            term TEXT NOT NULL UNIQUE,  -- e.g. "team:prior_exit", "market:vertical=Fintech"
+            criterion TEXT NOT NULL
+        )
+        """
+    )
+    if old:
+        conn.execute("ALTER TABLE score_attributions ADD COLUMN points REAL NOT NULL DEFAULT 0")
+        # the best we know: the weight of the last run that saved the term
+        conn.execute(
+            "UPDATE score_attributions SET points = value * "
+            "(SELECT t.composite_weight FROM attribution_terms t WHERE t.term_id = score_attributions.term_id)"
+        )
+        conn.execute("ALTER TABLE attribution_terms DROP COLUMN composite_weight")
+        return
+    conn.execute(
+        """
+        CREATE TABLE score_attributions (
+            company_key TEXT NOT NULL,
+            term_id INTEGER NOT NULL,
+            value REAL NOT NULL,   -- points on the criterion's 0-100 scale
+            points REAL NOT NULL,  -- points toward score_total
+            PRIMARY KEY (company_key, term_id)
+        ) WITHOUT ROWID
+        """
+    )
+
+
+def _v11_company_id(conn: sqlite3.Connection) -> None:
+    # company_search and browse cursors point at companies.rowid, which VACUUM may
+    # renumber unless it is an INTEGER PRIMARY KEY. Rebuild the table with one,
+    # keeping every row's rowid so the search index stays valid as it is.
+    (create,) = conn.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'companies'").fetchone()
+    key_def = "company_key TEXT PRIMARY KEY,"
+    if key_def not in create:
+        raise RuntimeError("companies does not have the expected schema; cannot add company_id")
+    create = create.replace("CREATE TABLE companies", "CREATE TABLE companies_v11", 1).replace(
+        key_def, "company_id INTEGER PRIMARY KEY,\n            company_key TEXT NOT NULL UNIQUE,", 1
+    )
+    indexes = [
+        sql
+        for name, sql in conn.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = 'companies' AND sql IS NOT NULL"
+        )
+        if name != "idx_companies_sectors"  # v1's; no query filters on the raw sectors column
+    ]
+    cols = ", ".join(r[1] for r in conn.execute("PRAGMA table_info(companies)"))
+
+    conn.execute(create)
+    conn.execute(f"INSERT INTO companies_v11 (company_id, {cols}) SELECT rowid, {cols} FROM companies")
+    conn.execute("DROP TABLE companies")
+    conn.execute("ALTER TABLE companies_v11 RENAME TO companies")
+    for sql in indexes:
+        conn.execute(sql)
+
+
+MIGRATIONS: List[Callable[[sqlite3.Connection], None]] = [
+    _v1_companies,
+    _v2_normalized,
+    _v3_history,
+    _v4_search,
+    _v5_slack_outbox,
+    _v6_notification_state,
+    _v7_browse_indexes,
+    _v8_enriched_domains,
+    _v9_enrichment_jobs,
+    _v10_attributions,
+    _v11_company_id,
+]
+
+
+def sync_child_tables(conn: sqlite3.Connection, updated_at: Optional[str] = None) -> None:
+    """
+    Rebuild the normalized rows (founders, tags, investors) from the companies JSON
+    columns, set-based inside SQLite. With `updated_at`, only for companies stamped
+    with it, i.e. the ones the UPSERT that used that stamp actually inserted/changed.
+    """
+    if updated_at is None:
+        where, params = "1", ()
+        for t in CHILD_TABLES:
+            conn.execute(f"DELETE FROM {t}")
+    else:
+        where, params = "c.updated_at = ?", (updated_at,)
+        for t in CHILD_TABLES:
+            conn.execute(
+                f"DELETE FROM {t} WHERE company_key IN (SELECT company_key FROM companies WHERE updated_at = ?)",
+                params,
+            )
+    for sql in _CHILD_INSERTS:
+        conn.execute(sql.format(where=where), params)
+
+
+def sync_search_index(conn: sqlite3.Connection, updated_at: Optional[str] = None) -> None:
+    """
+    Re-index company_search for companies stamped with `updated_at` (all if None).
+    Run after sync_child_tables, since founder highlight text comes from founder_highlights.
+    """
+    if updated_at is None:
+        conn.execute("DELETE FROM company_search")
+        conn.execute(_SEARCH_INSERT.format(where="1"))
+        return
+    conn.execute(
+        "DELETE FROM company_search WHERE rowid IN (SELECT rowid FROM companies WHERE updated_at = ?)",
+        (updated_at,),
+    )
+    conn.execute(_SEARCH_INSERT.format(where="c.updated_at = ?"), (updated_at,))
+
+
+def ensure_schema(conn: sqlite3.Connection) -> None:
+    while True:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version >= len(MIGRATIONS):
+            return
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")  # DDL included, so a failed migration rolls back whole
+            # another process may have migrated while we waited for the write lock
+            if conn.execute("PRAGMA user_version").fetchone()[0] != version:
+                continue
+            MIGRATIONS[version](conn)
+            conn.execute(f"PRAGMA user_version = {version + 1}")
@@ -1,67 +1,138 @@
 # Fetches raw GraphQL per company
 from __future__ import annotations
 
+import argparse
 import json
 from dataclasses import asdict
 from pathlib import Path
+from typing import Any, Dict, List, Optional
 
-from src.merlin.ingestion import load_companies_from_csv
+from src.merlin.db import DEFAULT_DB_PATH
+from src.merlin.ingestion import DEFAULT_CSV_PATH, iter_companies_from_csv
 from src.merlin.enrichment.harmonic_graphql_client import HarmonicGraphQLClient
-
-
-def main() -> None:
-    csv_path = Path("data/case_study_data.csv")
-    raw_companies = load_companies_from_csv(str(csv_path))
-
-    
-
-    client = HarmonicGraphQLClient()
-
-    out_path = Path("outputs/harmonic_raw_graphql_final.json")
-    out_path.parent.mkdir(parents=True, exist_ok=True)
-
-    records = []
+from src.merlin.enrichment.http_metrics import HttpMetrics, metrics_path
+from src.merlin.profiling import NULL_PROFILER, NullProfiler, Profiler, format_report, report_path
+from src.merlin.sharding import shard_arg
+
+DEFAULT_OUT_PATH = "outputs/harmonic_raw_graphql_final.json"
+
+
+class RawJsonWriter:
+    """
+    Writes {raw_company, harmonic_raw} rows as a JSON array as they come, one row
+    per line, into a temp file that replaces `path` only when the block exits
+    cleanly (a failed run leaves the previous file alone).
+
+        with RawJsonWriter(out_path) as out:
+            out.write({"raw_company": asdict(rc), "harmonic_raw": payload})
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self.rows = 0
+        self._tmp = self.path.with_name(f".{self.path.name}.tmp")
+        self._f: Any = None
+
+    def __enter__(self) -> "RawJsonWriter":
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._f = self._tmp.open("w", encoding="utf-8")
+        self._f.write("[")
+        return self
+
+    def write(self, row: Dict[str, Any]) -> None:
+        self._f.write(",\n" if self.rows else "\n")
+        self._f.write(json.dumps(row))
+        self.rows += 1
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self._f.write("\n]\n")
+        self._f.close()
+        if exc_type is None:
+            self._tmp.replace(self.path)
+        else:
+            self._tmp.unlink(missing_ok=True)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Fetch raw Harmonic GraphQL responses per company")
+    parser.add_argument("--csv", default=DEFAULT_CSV_PATH, help="sourcing CSV")
+    parser.add_argument("--out", default=DEFAULT_OUT_PATH, help="raw JSON consumed by `merlin score`")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="profile reports / metrics go next to it")
+    parser.add_argument("--profile", action="store_true", help="write a per-stage run report next to the DB")
+    parser.add_argument("--profile-memory", action="store_true", help="add tracemalloc snapshots (slow)")
+    parser.add_argument("--cprofile", action="store_true", help="add a cProfile dump (slow)")
+    parser.add_argument(
+        "--metrics-out",
+        default=None,
+        help="Prometheus text file with per-request HTTP metrics (default: data/metrics/fetch_harmonic_raw.prom)",
+    )
+    parser.add_argument(
+        "--shard",
+        type=shard_arg,
+        default=None,
+        help="i/N: only this node's companies (by domain hash); writes <out>.shard-i-of-N.json",
+    )
+    args = parser.parse_args(argv)
+    shard = args.shard
+    metrics_name = "fetch_harmonic_raw" if shard is None else shard.path("fetch_harmonic_raw").name
+
+    profiler: Profiler | NullProfiler = NULL_PROFILER
+    if args.profile or args.profile_memory or args.cprofile:
+        profiler = Profiler("fetch_harmonic_raw", memory=args.profile_memory, cprofile=args.cprofile)
+
+    # streamed: companies are read, enriched and written one at a time
+    raw_companies = iter_companies_from_csv(str(Path(args.csv)))
+    if shard is not None:
+        raw_companies = (rc for rc in raw_companies if shard.owns(rc.domain))
+
+    http_metrics = HttpMetrics()
+    client = HarmonicGraphQLClient(hook=http_metrics)
+
+    out_path = Path(args.out) if shard is None else shard.path(args.out)
+
+    queried = 0
     missing_domains = []       
     failed_queries = []    
 
-    for rc in raw_companies:
-        domain = rc.domain.strip().lower()
+    with profiler.stage("enrich"), RawJsonWriter(out_path) as out:
+        for rc in raw_companies:
+            queried += 1
+            domain = rc.domain.strip().lower()
 
-        print(f"\n🔍 Querying Harmonic for: {domain}")
+            print(f"\n🔍 Querying Harmonic for: {domain}")
 
-        if not domain:
-            print("⚠️ Skipping — empty domain.")
-            missing_domains.append((rc.name, rc.domain))
-            continue
-
-        try:
-            payload = client.enrich_company_by_domain(domain)
-
-            # Harmonic returns "None" if domain not found — we treat that explicitly
-            if payload is None:
-                print(f"Not found in Harmonic: {domain}")
+            if not domain:
+                print("⚠️ Skipping — empty domain.")
                 missing_domains.append((rc.name, rc.domain))
-
-        except Exception as e:
-            print(f"Error enriching {domain}: {e}")
-            failed_queries.append((rc.name, rc.domain, str(e)))
-            payload = None
-
-        records.append(
-            {
-                "raw_company": asdict(rc),
-                "harmonic_raw": payload,
-            }
-        )
-
-    # Save all results
-    with out_path.open("w", encoding="utf-8") as f:
-        json.dump(records, f, indent=2)
+                continue
+
+            t0 = profiler.clock()
+            try:
+                payload = client.enrich_company_by_domain(domain)
+
+                # Harmonic returns "None" if domain not found — we treat that explicitly
+                if payload is None:
+                    print(f"Not found in Harmonic: {domain}")
+                    missing_domains.append((rc.name, rc.domain))
+
+            except Exception as e:
+                print(f"Error enriching {domain}: {e}")
+                failed_queries.append((rc.name, rc.domain, str(e)))
+                payload = None
+            profiler.observe("harmonic_request", t0)
+
+            out.write(
+                {
+                    "raw_company": asdict(rc),
+                    "harmonic_raw": payload,
+                }
+            )
 
     # Summary logs
     print("\n=========================================")
-    print(f"Finished querying {len(raw_companies)} companies")
-    print(f"Wrote {len(records)} raw responses to {out_path}")
+    print(f"Finished querying {queried} companies" + (f" (shard {shard})" if shard is not None else ""))
+    print(f"Wrote {out.rows} raw responses to {out_path}")
 
     print("\nMissing from Harmonic:", len(missing_domains))
     for name, domain in missing_domains:
@@ -71,6 +142,20 @@ def main() -> None:
     for name, domain, err in failed_queries:
         print(f"  - {domain}: {err}")
 
+    print("\nHTTP:")
+    print(http_metrics.format_summary())
+    print(f"Metrics: {http_metrics.write_prometheus(args.metrics_out or metrics_path(metrics_name, args.db))}")
+
+    if profiler.enabled:
+        profiler.count("companies", queried)
+        profiler.count("missing", len(missing_domains))
+        profiler.count("failed", len(failed_queries))
+        profiler.meta["http"] = http_metrics.summary()
+        path = profiler.save(report_path(args.db, metrics_name))
+        print()
+        print(format_report(profiler.report()))
+        print(f"Profile report: {path}")
+
 
 if __name__ == "__main__":
     main()
@@ -1,9 +1,8 @@
 # business logic for looping over companies + dumping to JSON
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
 
-from src.merlin.enrichment.harmonic_graphql_client import HarmonicGraphQLClient
 from src.merlin.models import (
     RawCompany,
     CompanyEnrichment,
@@ -12,6 +11,9 @@ from src.merlin.models import (
     EmployeeHighlight
 )
 
+if TYPE_CHECKING:  # the client pulls in requests; mapping alone doesn't need it
+    from src.merlin.enrichment.harmonic_graphql_client import HarmonicGraphQLClient
+
 
 def _clean_domain(url: str) -> str:
     if not url:
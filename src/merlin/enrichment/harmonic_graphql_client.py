@@ -2,22 +2,30 @@
 from __future__ import annotations
 
 import os
+import time
 from typing import Any, Dict, Optional
 
 import requests
 
+from src.merlin.enrichment.http_metrics import RequestHook, observe_failure, observe_response
+
+ERROR_BODY_CHARS = 2_000  # of an error response, kept in the raised HTTPError
+
 
 class HarmonicGraphQLClient:
     def __init__(
         self,
         api_key: Optional[str] = None,
         endpoint: str = "https://api.harmonic.ai/graphql",
+        hook: Optional[RequestHook] = None,
     ) -> None:
+        """hook: called with a RequestEvent after every request (e.g. http_metrics.HttpMetrics())."""
         self.api_key = api_key or os.environ.get("HARMONIC_API_KEY")
         if not self.api_key:
             raise ValueError("HARMONIC_API_KEY is not set")
 
         self.endpoint = endpoint
+        self.hook = hook
         self.session = requests.Session()
         self.session.headers.update(
     {
@@ -133,22 +141,35 @@ mutation($identifiers: CompanyEnrichmentIdentifiersInput!) {
 }
         """
 
-    def _post(self, query: str, variables: Dict[str, Any]) -> Dict[str, Any]:
-        resp = self.session.post(
-            self.endpoint,
-            json={"query": query, "variables": variables},
-            timeout=30,
-        )
+    def _post(self, query: str, variables: Dict[str, Any], *, operation: str = "graphql") -> Dict[str, Any]:
+        t0 = time.perf_counter()
+        try:
+            resp = self.session.post(
+                self.endpoint,
+                json={"query": query, "variables": variables},
+                timeout=30,
+            )
+        except requests.RequestException as e:
+            observe_failure(self.hook, "graphql", operation, t0, e)
+            raise
         if resp.status_code >= 400:
-            print("STATUS:", resp.status_code)
-            print("Harmonic error payload:", resp.text) # temp debug
-        resp.raise_for_status()
-        data = resp.json()
+            observe_response(self.hook, "graphql", operation, t0, resp)
+            # the hook has the status; the error payload goes with the exception
+            raise requests.HTTPError(
+                f"Harmonic GraphQL {operation}: HTTP {resp.status_code}: {resp.text[:ERROR_BODY_CHARS]}",
+                response=resp,
+            )
+        try:
+            data = resp.json()
+        except ValueError:
+            observe_response(self.hook, "graphql", operation, t0, resp)
+            raise
+        observe_response(self.hook, "graphql", operation, t0, resp, graphql_errors=len(data.get("errors") or ()))
         if "errors" in data:
             raise RuntimeError(f"Harmonic GraphQL error: {data['errors']}")
         return data
 
     def enrich_company_by_domain(self, website_domain: str) -> Dict[str, Any]:
         variables = {"identifiers": {"websiteDomain": website_domain}}
-        data = self._post(self._enrich_company_query, variables)
+        data = self._post(self._enrich_company_query, variables, operation="enrichCompanyByIdentifiers")
         return data["data"]["enrichCompanyByIdentifiers"]
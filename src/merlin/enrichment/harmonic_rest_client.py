@@ -4,8 +4,11 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import Optional, Dict, Any
 import os
+import time
 import requests
 
+from src.merlin.enrichment.http_metrics import RequestHook, observe_failure, observe_response
+
 
 class HarmonicError(Exception):
     """Custom error for Harmonic API issues."""
@@ -19,8 +22,9 @@ class HarmonicConfig:
 
 
 class HarmonicClient:
-    def __init__(self, config: HarmonicConfig):
+    def __init__(self, config: HarmonicConfig, hook: Optional[RequestHook] = None):
         self.config = config
+        self.hook = hook  # called with a RequestEvent after every request
         self.session = requests.Session()
         self.session.headers.update(
             {
@@ -30,11 +34,11 @@ class HarmonicClient:
         )
 
     @classmethod
-    def from_env(cls) -> "HarmonicClient":
+    def from_env(cls, hook: Optional[RequestHook] = None) -> "HarmonicClient":
         api_key = os.getenv("HARMONIC_API_KEY")
         if not api_key:
             raise RuntimeError("HARMONIC_API_KEY not set in environment")
-        return cls(HarmonicConfig(api_key=api_key))
+        return cls(HarmonicConfig(api_key=api_key), hook=hook)
 
     def enrich_company(
         self,
@@ -57,7 +61,13 @@ class HarmonicClient:
             raise ValueError("At least one identifier must be provided")
 
         url = f"{self.config.base_url}/companies"
-        resp = self.session.post(url, params=params, timeout=self.config.timeout)
+        t0 = time.perf_counter()
+        try:
+            resp = self.session.post(url, params=params, timeout=self.config.timeout)
+        except requests.RequestException as e:
+            observe_failure(self.hook, "rest", "companies", t0, e)
+            raise
+        observe_response(self.hook, "rest", "companies", t0, resp)
 
         if resp.status_code == 200:
             return resp.json()
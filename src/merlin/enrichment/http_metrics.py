@@ -0,0 +1,287 @@
+# per-request HTTP instrumentation for the Harmonic clients: latency/size histograms, status and error counts
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.merlin.db import DEFAULT_DB_PATH
+from src.merlin.profiling import LatencyHistogram
+
+# Prometheus histogram bounds (seconds / bytes); fixed so series stay comparable across runs
+LATENCY_BUCKETS_S = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS_BYTES = (1_024, 4_096, 16_384, 65_536, 262_144, 1_048_576, 4_194_304)
+
+
+@dataclass
+class RequestEvent:
+    """
+    One HTTP attempt as seen by a client hook.
+
+    ttfb_s is requests' `resp.elapsed` (send until response headers parsed); DNS and
+    connect are not exposed separately by requests, so they land in the ttfb of the
+    first request on each pooled connection. total_s adds reading the body.
+    """
+    client: str                 # "graphql" / "rest"
+    operation: str              # e.g. "enrichCompanyByIdentifiers", "companies"
+    status: Optional[int]       # None when no response arrived (timeout, connection error)
+    total_s: float
+    ttfb_s: Optional[float] = None
+    bytes_out: int = 0          # request body
+    bytes_in: int = 0           # response body after content decoding
+    graphql_errors: int = 0     # entries in the response's "errors" list
+    error: Optional[str] = None  # exception class name when the request raised
+
+
+RequestHook = Callable[[RequestEvent], None]
+
+
+def observe_response(
+    hook: Optional[RequestHook],
+    client: str,
+    operation: str,
+    t0: float,
+    resp: Any,
+    *,
+    graphql_errors: int = 0,
+) -> None:
+    """Report a completed request (`t0` = time.perf_counter() before sending)."""
+    if hook is None:
+        return
+    body = resp.request.body if resp.request is not None else None
+    hook(
+        RequestEvent(
+            client=client,
+            operation=operation,
+            status=resp.status_code,
+            total_s=time.perf_counter() - t0,
+            ttfb_s=resp.elapsed.total_seconds(),
+            bytes_out=len(body) if body else 0,
+            bytes_in=len(resp.content),
+            graphql_errors=graphql_errors,
+        )
+    )
+
+
+def observe_failure(hook: Optional[RequestHook], client: str, operation: str, t0: float, exc: BaseException) -> None:
+    """Report a request that raised before a response arrived."""
+    if hook is not None:
+        hook(
+            RequestEvent(
+                client=client,
+                operation=operation,
+                status=None,
+                total_s=time.perf_counter() - t0,
+                error=type(exc).__name__,
+            )
+        )
+
+
+class _Series:
+    """Aggregates for one (client, operation)."""
+
+    def __init__(self) -> None:
+        self.total = LatencyHistogram()      # ns
+        self.ttfb = LatencyHistogram()       # ns
+        self.bytes_in = LatencyHistogram()   # bytes
+        self.bytes_out = LatencyHistogram()  # bytes
+        self.statuses: Counter[str] = Counter()
+        self.graphql_errors = 0
+        # exact per-bound counts for the Prometheus export (log2 buckets don't line up with them)
+        self.total_le = [0] * len(LATENCY_BUCKETS_S)
+        self.ttfb_le = [0] * len(LATENCY_BUCKETS_S)
+        self.size_le = [0] * len(SIZE_BUCKETS_BYTES)
+        self.ttfb_sum_s = 0.0
+
+    def add(self, e: RequestEvent) -> None:
+        self.statuses[str(e.status) if e.status is not None else e.error or "error"] += 1
+        self.graphql_errors += e.graphql_errors
+        self.total.add(int(e.total_s * 1e9))
+        _count_le(self.total_le, LATENCY_BUCKETS_S, e.total_s)
+        if e.status is None:
+            return
+        if e.ttfb_s is not None:
+            self.ttfb.add(int(e.ttfb_s * 1e9))
+            self.ttfb_sum_s += e.ttfb_s
+            _count_le(self.ttfb_le, LATENCY_BUCKETS_S, e.ttfb_s)
+        self.bytes_in.add(e.bytes_in)
+        self.bytes_out.add(e.bytes_out)
+        _count_le(self.size_le, SIZE_BUCKETS_BYTES, e.bytes_in)
+
+    def summary(self) -> Dict[str, Any]:
+        n = self.total.count
+        failed = sum(c for s, c in self.statuses.items() if not s.isdigit() or int(s) >= 400)
+        return {
+            "requests": n,
+            "statuses": dict(self.statuses),
+            "error_rate": failed / n if n else 0.0,
+            "graphql_errors": self.graphql_errors,
+            "total": _ms(self.total),
+            "ttfb": _ms(self.ttfb),
+            "bytes_in": _size(self.bytes_in),
+            "bytes_out": _size(self.bytes_out),
+        }
+
+
+def _count_le(counts: List[int], bounds: Tuple[float, ...], value: float) -> None:
+    for i, bound in enumerate(bounds):
+        if value <= bound:
+            counts[i] += 1
+            return
+
+
+def _ms(h: LatencyHistogram) -> Dict[str, Any]:
+    if not h.count:
+        return {"count": 0}
+    return {
+        "mean_ms": h.total_ns / h.count / 1e6,
+        "p50_ms": h.percentile(0.50) / 1e6,
+        "p90_ms": h.percentile(0.90) / 1e6,
+        "p99_ms": h.percentile(0.99) / 1e6,
+        "max_ms": h.max_ns / 1e6,
+    }
+
+
+def _size(h: LatencyHistogram) -> Dict[str, Any]:
+    if not h.count:
+        return {"count": 0}
+    return {
+        "total": h.total_ns,
+        "mean": h.total_ns / h.count,
+        "p50": h.percentile(0.50),
+        "p99": h.percentile(0.99),
+        "max": h.max_ns,
+    }
+
+
+class HttpMetrics:
+    """
+    In-memory request hook for the Harmonic clients; one instance per run.
+
+        metrics = HttpMetrics()
+        client = HarmonicGraphQLClient(hook=metrics)
+        ...
+        print(metrics.format_summary())
+        metrics.write_prometheus(metrics_path("fetch_harmonic_raw"))
+
+    Percentiles in summary() are log2-bucket upper bounds (within 2x); the Prometheus
+    histograms use exact counts against LATENCY_BUCKETS_S / SIZE_BUCKETS_BYTES.
+    """
+
+    def __init__(self) -> None:
+        self._series: Dict[Tuple[str, str], _Series] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, event: RequestEvent) -> None:
+        key = (event.client, event.operation)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _Series()
+            series.add(event)
+
+    # --- Output ---
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            return {f"{client}:{op}": s.summary() for (client, op), s in self._series.items()}
+
+    def format_summary(self) -> str:
+        lines = []
+        for name, s in self.summary().items():
+            if not s["requests"]:
+                continue
+            total, size = s["total"], s["bytes_in"]
+            statuses = " ".join(f"{k}={v}" for k, v in sorted(s["statuses"].items()))
+            lines.append(
+                f"{name}: {s['requests']} requests ({statuses}), error rate {s['error_rate']:.1%}, "
+                f"GraphQL errors {s['graphql_errors']}"
+            )
+            lines.append(
+                f"  latency p50 {total['p50_ms']:.0f}ms  p90 {total['p90_ms']:.0f}ms  "
+                f"p99 {total['p99_ms']:.0f}ms  max {total['max_ms']:.0f}ms"
+            )
+            if size.get("count"):
+                lines.append(
+                    f"  response p50 {size['p50'] / 1024:.1f}KB  p99 {size['p99'] / 1024:.1f}KB  "
+                    f"total {size['total'] / 1024 / 1024:.1f}MB"
+                )
+        return "\n".join(lines) or "no HTTP requests recorded"
+
+    def prometheus(self) -> str:
+        """Text exposition format (node_exporter textfile collector compatible)."""
+        out: List[str] = []
+        with self._lock:
+            items = sorted(self._series.items())
+
+            def header(name: str, kind: str, help_text: str) -> None:
+                out.append(f"# HELP {name} {help_text}")
+                out.append(f"# TYPE {name} {kind}")
+
+            header("merlin_harmonic_requests_total", "counter", "Harmonic API requests by response status")
+            for (client, op), s in items:
+                for status, n in sorted(s.statuses.items()):
+                    out.append(f'merlin_harmonic_requests_total{{client="{client}",operation="{op}",status="{status}"}} {n}')
+
+            header("merlin_harmonic_graphql_errors_total", "counter", "Entries in GraphQL error responses")
+            for (client, op), s in items:
+                out.append(f'merlin_harmonic_graphql_errors_total{{client="{client}",operation="{op}"}} {s.graphql_errors}')
+
+            for name, attr in (("request", "bytes_out"), ("response", "bytes_in")):
+                metric = f"merlin_harmonic_{name}_bytes_total"
+                header(metric, "counter", f"Harmonic {name} body bytes")
+                for (client, op), s in items:
+                    out.append(f'{metric}{{client="{client}",operation="{op}"}} {getattr(s, attr).total_ns}')
+
+            header("merlin_harmonic_request_duration_seconds", "histogram", "Harmonic request time including body read")
+            for (client, op), s in items:
+                _histogram(out, "merlin_harmonic_request_duration_seconds", client, op,
+                           LATENCY_BUCKETS_S, s.total_le, s.total.count, s.total.total_ns / 1e9)
+
+            header("merlin_harmonic_ttfb_seconds", "histogram", "Harmonic time to response headers")
+            for (client, op), s in items:
+                _histogram(out, "merlin_harmonic_ttfb_seconds", client, op,
+                           LATENCY_BUCKETS_S, s.ttfb_le, s.ttfb.count, s.ttfb_sum_s)
+
+            header("merlin_harmonic_response_size_bytes", "histogram", "Harmonic response body size")
+            for (client, op), s in items:
+                _histogram(out, "merlin_harmonic_response_size_bytes", client, op,
+                           SIZE_BUCKETS_BYTES, s.size_le, s.bytes_in.count, s.bytes_in.total_ns)
+        return "\n".join(out) + "\n"
+
+    def write_prometheus(self, path: str | Path) -> Path:
+        """Write atomically (a textfile collector never sees a partial file)."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(self.prometheus(), encoding="utf-8")
+        tmp.replace(path)
+        return path
+
+
+def _histogram(
+    out: List[str],
+    name: str,
+    client: str,
+    op: str,
+    bounds: Tuple[float, ...],
+    counts: List[int],
+    count: int,
+    total: float,
+) -> None:
+    labels = f'client="{client}",operation="{op}"'
+    cumulative = 0
+    for bound, n in zip(bounds, counts):
+        cumulative += n
+        out.append(f'{name}_bucket{{{labels},le="{bound:g}"}} {cumulative}')
+    out.append(f'{name}_bucket{{{labels},le="+Inf"}} {count}')
+    out.append(f"{name}_sum{{{labels}}} {total:g}")
+    out.append(f"{name}_count{{{labels}}} {count}")
+
+
+def metrics_path(name: str, db_path: str = DEFAULT_DB_PATH) -> Path:
+    """data/metrics/<name>.prom, next to the DB (overwritten each run, like a textfile collector)."""
+    return Path(db_path).parent / "metrics" / f"{name}.prom"
@@ -0,0 +1,449 @@
+# durable enrichment queue in SQLite: one job per canonical domain, leased by any number of worker processes
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import multiprocessing as mp
+import os
+import random
+import socket
+import sqlite3
+import threading
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from src.merlin.db import DEFAULT_DB_PATH, connect
+from src.merlin.enrichment.http_metrics import HttpMetrics, metrics_path
+from src.merlin.keys import canonical_domain
+from src.merlin.models import RawCompany
+
+log = logging.getLogger(__name__)
+
+JOB_LEASE_S = 120.0  # visibility timeout: a job whose worker died is claimable again after this
+JOB_MAX_ATTEMPTS = 5
+JOB_BASE_DELAY_S = 5.0  # retry n waits ~ base * 2**(n-1), capped, with jitter
+JOB_MAX_DELAY_S = 900.0
+JOB_POLL_S = 0.5  # idle re-check; one indexed read, cheap under WAL
+
+HARMONIC_RATE_PER_S = 5.0  # requests/s across every worker sharing the DB
+HARMONIC_BURST = 5
+
+METRICS_EVERY_S = 15.0
+DEFAULT_EXPORT_PATH = "outputs/harmonic_raw_graphql_final.json"  # what `merlin score` reads by default
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+@dataclass
+class Job:
+    id: int
+    domain: str
+    raw_company: RawCompany
+    attempts: int  # including this lease; doubles as the fencing token
+    lease_owner: str
+
+
+# --- Queue ---
+class JobQueue:
+    """
+    The enrichment_jobs table on one connection. Give each thread its own
+    JobQueue (sqlite3 connections are per thread); a long-lived connection
+    also keeps the WAL open instead of checkpointing it on every close.
+
+        with JobQueue(db_path) as jobs:
+            jobs.enqueue(load_companies_from_csv(csv_path))
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH) -> None:
+        self.db_path = db_path
+        self.conn = connect(db_path)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> "JobQueue":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def enqueue(self, companies: Iterable[RawCompany], *, refresh: bool = False) -> int:
+        """
+        One pending job per canonical domain. Domains already queued are left alone
+        (done jobs keep their result) unless `refresh`, which re-queues finished ones.
+        Returns the number of jobs added or re-queued.
+        """
+        now, created = time.time(), _now_iso()
+        rows = (
+            (key, json.dumps(asdict(rc)), now, created)
+            for rc in companies
+            if (key := canonical_domain(rc.domain))
+        )
+        conflict = (
+            "DO UPDATE SET status = 'pending', attempts = 0, visible_at = excluded.visible_at, "
+            "lease_owner = NULL, last_error = NULL, finished_at = NULL "
+            "WHERE enrichment_jobs.status IN ('done', 'dead')"
+            if refresh
+            else "DO NOTHING"
+        )
+        with self.conn:
+            before = self.conn.total_changes
+            self.conn.executemany(
+                "INSERT INTO enrichment_jobs (domain, raw_company, visible_at, created_at) "
+                f"VALUES (?, ?, ?, ?) ON CONFLICT(domain) {conflict}",
+                rows,
+            )
+            return self.conn.total_changes - before
+
+    def claim(self, owner: str, *, limit: int = 1, lease_s: float = JOB_LEASE_S) -> List[Job]:
+        """
+        Lease up to `limit` claimable jobs: pending ones that are due, and leased ones
+        whose lease expired (the worker died or hung). Atomic across processes.
+        """
+        now = time.time()
+        with self.conn:
+            self.conn.execute("BEGIN IMMEDIATE")
+            rows = self.conn.execute(
+                "SELECT id, domain, raw_company, attempts FROM enrichment_jobs "
+                "WHERE status IN ('pending', 'leased') AND visible_at <= ? ORDER BY visible_at LIMIT ?",
+                (now, limit),
+            ).fetchall()
+            self.conn.executemany(
+                "UPDATE enrichment_jobs SET status = 'leased', attempts = attempts + 1, "
+                "visible_at = ?, lease_owner = ? WHERE id = ?",
+                ((now + lease_s, owner, job_id) for job_id, *_ in rows),
+            )
+        return [
+            Job(job_id, domain, RawCompany(**json.loads(raw)), attempts + 1, owner)
+            for job_id, domain, raw, attempts in rows
+        ]
+
+    def _finish(self, job: Job, sql: str, params: tuple) -> bool:
+        """Apply `sql` only if `job` still holds its lease (False: it expired and was re-claimed)."""
+        with self.conn:
+            cur = self.conn.execute(
+                sql + " WHERE id = ? AND status = 'leased' AND lease_owner = ? AND attempts = ?",
+                (*params, job.id, job.lease_owner, job.attempts),
+            )
+            return cur.rowcount == 1
+
+    def complete(self, job: Job, payload: Optional[Dict[str, Any]]) -> bool:
+        """Store the Harmonic payload (None / companyFound=false included: that's an answer too)."""
+        return self._finish(
+            job,
+            "UPDATE enrichment_jobs SET status = 'done', result = ?, last_error = NULL, "
+            "lease_owner = NULL, finished_at = ?",
+            (json.dumps(payload), _now_iso()),
+        )
+
+    def fail(self, job: Job, error: str, *, max_attempts: int = JOB_MAX_ATTEMPTS) -> bool:
+        """Back off and retry, or mark dead after max_attempts."""
+        dead = job.attempts >= max_attempts
+        delay = min(JOB_BASE_DELAY_S * 2 ** (job.attempts - 1), JOB_MAX_DELAY_S) * random.uniform(0.5, 1.0)
+        return self._finish(
+            job,
+            "UPDATE enrichment_jobs SET status = ?, visible_at = ?, last_error = ?, lease_owner = NULL, "
+            "finished_at = ?",
+            ("dead" if dead else "pending", time.time() + delay, error[:500], _now_iso() if dead else None),
+        )
+
+    def release(self, job: Job, delay: float = 0.0) -> bool:
+        """Hand the job back without counting the attempt (rate limited, shutting down)."""
+        return self._finish(
+            job,
+            "UPDATE enrichment_jobs SET status = 'pending', attempts = attempts - 1, visible_at = ?, "
+            "lease_owner = NULL",
+            (time.time() + delay,),
+        )
+
+    def requeue_dead(self) -> int:
+        with self.conn:
+            return self.conn.execute(
+                "UPDATE enrichment_jobs SET status = 'pending', attempts = 0, visible_at = ?, "
+                "finished_at = NULL WHERE status = 'dead'",
+                (time.time(),),
+            ).rowcount
+
+    def next_visible_at(self) -> Optional[float]:
+        """When the next pending / leased job becomes claimable; None once all are done or dead."""
+        return self.conn.execute(
+            "SELECT MIN(visible_at) FROM enrichment_jobs WHERE status IN ('pending', 'leased')"
+        ).fetchone()[0]
+
+    def stats(self) -> Dict[str, int]:
+        stats = {s: 0 for s in ("pending", "leased", "done", "dead")}
+        stats.update(self.conn.execute("SELECT status, COUNT(*) FROM enrichment_jobs GROUP BY status").fetchall())
+        return stats
+
+    def export(self, out_path: str | Path = DEFAULT_EXPORT_PATH) -> int:
+        """
+        Write finished jobs in fetch_harmonic_raw's format (input of `merlin score`),
+        in enqueue order, streamed row by row. Dead jobs are written with a null payload.
+        """
+        out_path = Path(out_path)
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = out_path.with_suffix(out_path.suffix + ".tmp")
+        written = 0
+        with tmp.open("w", encoding="utf-8") as f:
+            f.write("[\n")
+            for raw, result in self.conn.execute(
+                "SELECT raw_company, result FROM enrichment_jobs WHERE status IN ('done', 'dead') ORDER BY id"
+            ):
+                f.write(",\n" if written else "")
+                f.write(f'{{"raw_company": {raw}, "harmonic_raw": {result or "null"}}}')
+                written += 1
+            f.write("\n]\n")
+        tmp.replace(out_path)
+        return written
+
+
+# --- Shared rate limit ---
+class SharedRateLimiter:
+    """
+    Request pacing shared by every process using the same DB: each acquire()
+    reserves the next free slot in `rate_limits` (GCRA-style, up to `burst`
+    back-to-back), then sleeps until it. pause() pushes every worker back,
+    e.g. on a 429.
+    """
+
+    def __init__(
+        self,
+        db_path: str = DEFAULT_DB_PATH,
+        name: str = "harmonic",
+        *,
+        rate: float = HARMONIC_RATE_PER_S,
+        burst: int = HARMONIC_BURST,
+    ) -> None:
+        self.db_path = db_path
+        self.name = name
+        self.interval = 1.0 / rate
+        self.burst = burst
+        self._local = threading.local()  # one connection per calling thread
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = connect(self.db_path)
+        return conn
+
+    def acquire(self) -> float:
+        """Blocks until this caller's slot; returns the seconds waited."""
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            now = time.time()
+            row = conn.execute("SELECT next_at FROM rate_limits WHERE name = ?", (self.name,)).fetchone()
+            slot = max(now - (self.burst - 1) * self.interval, row[0] if row else 0.0)
+            conn.execute(
+                "INSERT OR REPLACE INTO rate_limits (name, next_at) VALUES (?, ?)",
+                (self.name, slot + self.interval),
+            )
+        wait = slot - now
+        if wait > 0:
+            time.sleep(wait)
+        return max(wait, 0.0)
+
+    def pause(self, seconds: float) -> None:
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "INSERT INTO rate_limits (name, next_at) VALUES (?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET next_at = MAX(next_at, excluded.next_at)",
+                (self.name, time.time() + seconds),
+            )
+
+
+# --- Worker ---
+class EnrichmentWorker:
+    """
+    Claims jobs and enriches them from Harmonic on `threads` threads (one client
+    and keep-alive session each). Run as many worker processes as you like on the
+    same DB file; the shared limiter keeps their combined rate under the API limit.
+
+        EnrichmentWorker(db_path, threads=4).run(until_empty=True)
+    """
+
+    def __init__(
+        self,
+        db_path: str = DEFAULT_DB_PATH,
+        *,
+        threads: int = 1,
+        rate: float = HARMONIC_RATE_PER_S,
+        burst: int = HARMONIC_BURST,
+        lease_s: float = JOB_LEASE_S,
+        max_attempts: int = JOB_MAX_ATTEMPTS,
+        poll_interval: float = JOB_POLL_S,
+        client_factory: Optional[Callable[..., Any]] = None,
+    ) -> None:
+        self.db_path = db_path
+        self.threads = threads
+        self.lease_s = lease_s
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+        self.limiter = SharedRateLimiter(db_path, rate=rate, burst=burst)
+        self.http_metrics = HttpMetrics()
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self.counts = {"done": 0, "failed": 0, "released": 0, "lost": 0}
+        self._client_factory = client_factory
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._metrics_written = 0.0
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def run(self, *, until_empty: bool = False) -> Dict[str, int]:
+        """Work until stop(), or with until_empty until no pending / leased job is left."""
+        threads = [
+            threading.Thread(target=self._loop, args=(until_empty, i), name=f"enrich-{i}", daemon=True)
+            for i in range(self.threads)
+        ]
+        for t in threads:
+            t.start()
+        try:
+            for t in threads:
+                while t.is_alive():
+                    t.join(0.5)
+        except KeyboardInterrupt:
+            self.stop()
+            for t in threads:
+                t.join()
+        self._write_metrics(force=True)
+        return dict(self.counts)
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self.counts[key] += 1
+
+    def _loop(self, until_empty: bool, index: int) -> None:
+        factory = self._client_factory
+        if factory is None:
+            from src.merlin.enrichment.harmonic_graphql_client import HarmonicGraphQLClient
+
+            factory = HarmonicGraphQLClient
+        client = factory(hook=self.http_metrics)
+        owner = f"{self.owner}:{index}"
+        with JobQueue(self.db_path) as queue:
+            while not self._stop.is_set():
+                jobs = queue.claim(owner, lease_s=self.lease_s)
+                if not jobs:
+                    next_at = queue.next_visible_at()
+                    if next_at is None and until_empty:
+                        return
+                    wait = self.poll_interval if next_at is None else min(max(next_at - time.time(), 0.05), self.poll_interval)
+                    self._stop.wait(wait)
+                    continue
+                for job in jobs:
+                    self._process(queue, client, job)
+                self._write_metrics()
+
+    def _process(self, queue: JobQueue, client: Any, job: Job) -> None:
+        if self._stop.is_set():
+            self._count("released" if queue.release(job) else "lost")
+            return
+        self.limiter.acquire()
+        try:
+            payload = client.enrich_company_by_domain(job.raw_company.domain.strip().lower())
+        except Exception as e:
+            resp = getattr(e, "response", None)
+            if resp is not None and resp.status_code == 429:
+                retry_after = float(resp.headers.get("Retry-After") or 5)
+                self.limiter.pause(retry_after)
+                ok = queue.release(job, retry_after)
+                self._count("released" if ok else "lost")
+                return
+            log.warning("Enriching %s failed (attempt %d/%d): %s", job.domain, job.attempts, self.max_attempts, e)
+            ok = queue.fail(job, f"{type(e).__name__}: {e}", max_attempts=self.max_attempts)
+            self._count("failed" if ok else "lost")
+            return
+        ok = queue.complete(job, payload)
+        if not ok:
+            log.warning("Lease on %s expired before it finished; result dropped", job.domain)
+        self._count("done" if ok else "lost")
+
+    def _write_metrics(self, *, force: bool = False) -> None:
+        now = time.monotonic()
+        if not force and now - self._metrics_written < METRICS_EVERY_S:
+            return
+        self._metrics_written = now
+        self.http_metrics.write_prometheus(metrics_path(f"enrich-worker-{os.getpid()}", self.db_path))
+
+
+def _work(db_path: str, options: Dict[str, Any]) -> Dict[str, int]:
+    """Entry point of one worker process."""
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(processName)s %(levelname)s %(message)s")
+    until_empty = options.pop("until_empty")
+    return EnrichmentWorker(db_path, **options).run(until_empty=until_empty)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Durable Harmonic enrichment queue")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH)
+    sub = parser.add_subparsers(dest="action", required=True)
+
+    p = sub.add_parser("enqueue", help="queue one job per company in a sourcing CSV")
+    p.add_argument("csv")
+    p.add_argument("--refresh", action="store_true", help="re-queue companies that already finished")
+
+    p = sub.add_parser("work", help="claim and run jobs (start as many as you like, on any host sharing the DB)")
+    p.add_argument("--processes", type=int, default=1)
+    p.add_argument("--threads", type=int, default=1, help="concurrent requests per process")
+    p.add_argument("--rate", type=float, default=HARMONIC_RATE_PER_S, help="requests/s shared by all workers")
+    p.add_argument("--burst", type=int, default=HARMONIC_BURST)
+    p.add_argument("--lease", type=float, default=JOB_LEASE_S, help="visibility timeout (s)")
+    p.add_argument("--max-attempts", type=int, default=JOB_MAX_ATTEMPTS)
+    p.add_argument("--until-empty", action="store_true", help="exit once every job is done or dead")
+
+    sub.add_parser("status", help="job counts by status")
+    sub.add_parser("requeue-dead", help="retry jobs that ran out of attempts")
+
+    p = sub.add_parser("export", help="write results as a raw file for `merlin score`")
+    p.add_argument("--out", default=DEFAULT_EXPORT_PATH)
+    args = parser.parse_args(argv)
+
+    if args.action == "enqueue":
+        from src.merlin.ingestion import load_companies_from_csv
+
+        with JobQueue(args.db) as queue:
+            print(f"Queued {queue.enqueue(load_companies_from_csv(args.csv), refresh=args.refresh)} job(s)")
+    elif args.action == "work":
+        options = dict(
+            threads=args.threads, rate=args.rate, burst=args.burst, lease_s=args.lease,
+            max_attempts=args.max_attempts, until_empty=args.until_empty,
+        )
+        started = time.monotonic()
+        others = [
+            mp.get_context("spawn").Process(target=_work, args=(args.db, dict(options)), name=f"worker-{i}")
+            for i in range(1, args.processes)
+        ]
+        for proc in others:
+            proc.start()
+        counts = _work(args.db, dict(options))
+        for proc in others:
+            proc.join()
+        with JobQueue(args.db) as queue:
+            stats = queue.stats()
+        print(
+            f"This process: {counts['done']} done, {counts['failed']} failed, {counts['lost']} lost leases "
+            f"in {time.monotonic() - started:.1f}s"
+        )
+        print(f"Queue: {stats['pending']} pending, {stats['leased']} leased, {stats['done']} done, {stats['dead']} dead")
+    else:
+        with JobQueue(args.db) as queue:
+            if args.action == "status":
+                stats = queue.stats()
+                print(f"{stats['pending']} pending, {stats['leased']} leased, {stats['done']} done, {stats['dead']} dead")
+            elif args.action == "requeue-dead":
+                print(f"Re-queued {queue.requeue_dead()} job(s)")
+            elif args.action == "export":
+                print(f"Wrote {queue.export(args.out)} result(s) to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
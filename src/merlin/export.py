@@ -0,0 +1,247 @@
+# columnar export of a run's scores + flattened features to partitioned Parquet
+from __future__ import annotations
+
+import argparse
+import json
+import shutil
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from src.merlin.db import DEFAULT_DB_PATH, connect
+from src.merlin.scoring.config import FLAG_FIELDS
+
+DEFAULT_EXPORT_DIR = "data/exports/scores"
+EXPORT_BATCH_ROWS = 50_000  # rows per record batch (and Parquet row group); bounds memory per partition
+PARTITIONING = ds.partitioning(
+    pa.schema([("run_date", pa.string()), ("stage", pa.string())]), flavor="hive"
+)
+
+_DICT = pa.dictionary(pa.int32(), pa.string())  # low-cardinality strings
+_TAGS = pa.list_(_DICT)
+
+# written columns (the partition keys run_date / stage come back from the directory names)
+SCHEMA = pa.schema(
+    [
+        ("run_id", pa.int64()),
+        ("company_key", pa.string()),
+        ("company_name", pa.string()),
+        ("website_url", pa.string()),
+        ("score_team", pa.float64()),
+        ("score_market", pa.float64()),
+        ("score_funding", pa.float64()),
+        ("score_total", pa.float64()),
+        ("harmonic_id", pa.string()),
+        ("customer_type", _DICT),
+        ("location", _DICT),
+        ("headcount", pa.int64()),
+        ("funding_total", pa.float64()),
+        ("harmonic_num_funding_rounds", pa.int64()),
+        ("harmonic_last_funding_at", pa.string()),
+        ("founding_date", pa.string()),
+        ("likelihood_of_backing", pa.float64()),
+        ("sectors", _TAGS),
+        ("sub_sectors", _TAGS),
+        ("tags_v2", _TAGS),
+        ("investors", _TAGS),
+        ("highlight_categories", _TAGS),
+        ("description", pa.string()),
+    ]
+    + [(flag, pa.bool_()) for flag in FLAG_FIELDS]
+)
+
+# SQLite JSON-list column -> Parquet list column
+_LIST_COLUMNS = {
+    "market_verticals": "sectors",
+    "market_sub_verticals": "sub_sectors",
+    "tags_v2": "tags_v2",
+    "harmonic_investors": "investors",
+    "highlight_categories": "highlight_categories",
+}
+
+# copied as-is from the query row
+_SCALAR_COLUMNS = [f.name for f in SCHEMA][: SCHEMA.get_field_index("likelihood_of_backing") + 1]
+
+_SELECT = f"""
+    SELECT h.run_id, substr(r.started_at, 1, 10) AS run_date,
+           COALESCE(NULLIF(c.harmonic_stage, ''), 'UNKNOWN') AS stage,
+           c.company_key, c.company_name, c.website_url,
+           h.score_team, h.score_market, h.score_funding, h.score_total,
+           c.harmonic_id, c.customer_type, c.location, c.harmonic_headcount AS headcount,
+           c.harmonic_funding_total AS funding_total, c.harmonic_num_funding_rounds,
+           c.harmonic_last_funding_at, c.founding_date, c.likelihood_of_backing,
+           {", ".join(f"c.{col}" for col in _LIST_COLUMNS)},
+           c.features
+    FROM score_history AS h
+    JOIN runs AS r ON r.run_id = h.run_id
+    JOIN companies AS c ON c.company_key = h.company_key
+    WHERE h.run_id = ?
+    ORDER BY stage
+"""
+
+
+class _Columns:
+    """Column buffers for one record batch."""
+
+    def __init__(self) -> None:
+        self.cols: Dict[str, List[Any]] = {f.name: [] for f in SCHEMA}
+
+    def __len__(self) -> int:
+        return len(self.cols["company_key"])
+
+    def add(self, row: Dict[str, Any]) -> None:
+        cols = self.cols
+        features = json.loads(row["features"] or "{}")
+        for name in _SCALAR_COLUMNS:
+            cols[name].append(row[name])
+        for src, dst in _LIST_COLUMNS.items():
+            cols[dst].append(json.loads(row[src]) if row[src] else [])
+        cols["description"].append(features.get("description"))
+        for flag in FLAG_FIELDS:
+            cols[flag].append(bool(features.get(flag)))
+
+    def batch(self) -> pa.RecordBatch:
+        return pa.RecordBatch.from_pydict(self.cols, schema=SCHEMA)
+
+
+def _partition_dir(out_dir: Path, run_date: str, stage: str) -> Path:
+    return out_dir / f"run_date={run_date}" / f"stage={stage}"
+
+
+class _PartitionWriter:
+    """Streams one (run_date, stage) partition to run-<id>.parquet, `batch_rows` rows at a time."""
+
+    def __init__(
+        self, out_dir: Path, run_date: str, stage: str, run_id: int, compression: str, batch_rows: int
+    ) -> None:
+        part = _partition_dir(out_dir, run_date, stage)
+        part.mkdir(parents=True, exist_ok=True)
+        self.path = part / f"run-{run_id}.parquet"
+        self._tmp = self.path.with_suffix(".parquet.tmp")
+        self._writer = pq.ParquetWriter(self._tmp, SCHEMA, compression=compression, use_dictionary=True)
+        self._batch_rows = batch_rows
+        self._buf = _Columns()
+
+    def add(self, row: Dict[str, Any]) -> None:
+        self._buf.add(row)
+        if len(self._buf) >= self._batch_rows:
+            self._flush()
+
+    def _flush(self) -> None:
+        if len(self._buf):
+            self._writer.write_batch(self._buf.batch())
+            self._buf = _Columns()
+
+    def close(self) -> Path:
+        self._flush()
+        self._writer.close()
+        self._tmp.replace(self.path)
+        return self.path
+
+    def abort(self) -> None:
+        self._writer.close()
+        self._tmp.unlink(missing_ok=True)
+
+
+def export_run(
+    run_id: Optional[int] = None,
+    db_path: str = DEFAULT_DB_PATH,
+    out_dir: str | Path = DEFAULT_EXPORT_DIR,
+    *,
+    compression: str = "zstd",
+    batch_rows: int = EXPORT_BATCH_ROWS,
+) -> List[Path]:
+    """
+    Write one run (default: latest finished) as run_date=<YYYY-MM-DD>/stage=<STAGE>/run-<id>.parquet.
+    Only that run's files are (re)written, so exporting after each run is incremental.
+
+    Scores come from the run's score_history snapshot, but features (and the
+    stage partition) from the current `companies` rows: features are not kept
+    per run. The export is exact for the latest run of each company; for a
+    company rescored since, an older run's file holds its newer features.
+    Export each run right after it finishes to keep them in step.
+    """
+    out_dir = Path(out_dir)
+    conn = connect(db_path)
+    conn.row_factory = sqlite3.Row
+    written: List[Path] = []
+    try:
+        if run_id is None:
+            run_id = conn.execute("SELECT MAX(run_id) FROM runs WHERE status = 'done'").fetchone()[0]
+            if run_id is None:
+                raise ValueError("no finished runs to export")
+
+        # drop this run's files from a previous export (stage of a company may have changed)
+        for old in out_dir.glob(f"run_date=*/stage=*/run-{run_id}.parquet"):
+            old.unlink()
+
+        current: Optional[tuple[str, str]] = None
+        writer: Optional[_PartitionWriter] = None
+        try:
+            for row in conn.execute(_SELECT, (run_id,)):
+                key = (row["run_date"], row["stage"])
+                if key != current:
+                    if writer is not None:
+                        written.append(writer.close())
+                        writer = None
+                    current = key
+                    writer = _PartitionWriter(out_dir, *key, run_id, compression, batch_rows)
+                writer.add(row)
+        except BaseException:
+            if writer is not None:
+                writer.abort()
+            raise
+        if writer is not None:
+            written.append(writer.close())
+    finally:
+        conn.close()
+    return written
+
+
+def read_scores(
+    out_dir: str | Path = DEFAULT_EXPORT_DIR,
+    *,
+    columns: Optional[Sequence[str]] = None,
+    filter: Optional[ds.Expression] = None,
+) -> pa.Table:
+    """
+    Load exported runs back as one Arrow table (memory-mapped files, partition
+    columns run_date / stage included). Push filters down, e.g.
+        read_scores(filter=(ds.field("stage") == "SEED") & (ds.field("score_total") >= 80))
+    `.to_pandas()` for a DataFrame; list columns come back as arrays, flags as bool.
+    """
+    return pq.read_table(
+        str(out_dir),
+        columns=list(columns) if columns else None,
+        filters=filter,
+        partitioning=PARTITIONING,
+        memory_map=True,
+    )
+
+
+def read_run(run_id: int, out_dir: str | Path = DEFAULT_EXPORT_DIR, **kwargs: Any) -> pa.Table:
+    return read_scores(out_dir, filter=ds.field("run_id") == run_id, **kwargs)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Export a scoring run to partitioned Parquet")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH)
+    parser.add_argument(
+        "--run-id", type=int, default=None, help="default: latest finished run (features are always the current ones)"
+    )
+    parser.add_argument("--out", default=DEFAULT_EXPORT_DIR)
+    parser.add_argument("--clean", action="store_true", help="remove every previous export first")
+    args = parser.parse_args(argv)
+
+    if args.clean and Path(args.out).exists():
+        shutil.rmtree(args.out)
+    paths = export_run(args.run_id, db_path=args.db, out_dir=args.out)
+    print(f"Wrote {len(paths)} file(s) under {args.out}")
+
+
+if __name__ == "__main__":
+    main()
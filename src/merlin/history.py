@@ -0,0 +1,349 @@
+# per-run score snapshots: movers, threshold crossers, new top-K entrants, trajectories
+from __future__ import annotations
+
+import argparse
+import sqlite3
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from src.merlin.db import DEFAULT_DB_PATH, connect, fetch_dicts
+
+# (company_key, score_team, score_market, score_funding, score_total)
+HistoryRow = Tuple[str, float, float, float, float]
+
+DEFAULT_KEEP_LAST = 12  # runs kept in full by compact_history
+DEFAULT_KEEP_EVERY_DAYS = 7  # older runs thinned to one per this many days
+STALE_RUN_HOURS = 24  # a run still 'running' after this long was killed, and can be dropped
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+# --- Writing ---
+def start_run(
+    db_path: str = DEFAULT_DB_PATH,
+    *,
+    source: Optional[str] = None,
+    scoring_version: Optional[str] = None,
+    conn: Optional[sqlite3.Connection] = None,
+) -> int:
+    db = conn or connect(db_path)
+    try:
+        with db:
+            cur = db.execute(
+                "INSERT INTO runs (started_at, source, scoring_version) VALUES (?, ?, ?)",
+                (_now(), source, scoring_version),
+            )
+        return int(cur.lastrowid)
+    finally:
+        if db is not conn:
+            db.close()
+
+
+def finish_run(
+    run_id: int,
+    db_path: str = DEFAULT_DB_PATH,
+    *,
+    companies: Optional[int] = None,
+    status: str = "done",
+    conn: Optional[sqlite3.Connection] = None,
+) -> None:
+    db = conn or connect(db_path)
+    try:
+        with db:
+            db.execute(
+                "UPDATE runs SET finished_at = ?, companies = ?, status = ? WHERE run_id = ?",
+                (_now(), companies, status, run_id),
+            )
+    finally:
+        if db is not conn:
+            db.close()
+
+
+def append_history(conn: sqlite3.Connection, run_id: int, rows: Iterable[HistoryRow]) -> None:
+    """Bulk-append one run's scores inside the caller's transaction."""
+    conn.executemany(
+        "INSERT OR REPLACE INTO score_history "
+        "(run_id, company_key, score_team, score_market, score_funding, score_total) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        ((run_id,) + tuple(r) for r in rows),
+    )
+
+
+# --- Reading ---
+def list_runs(db_path: str = DEFAULT_DB_PATH, limit: int = 20) -> List[Dict[str, Any]]:
+    return fetch_dicts(db_path, "SELECT * FROM runs ORDER BY run_id DESC LIMIT ?", (limit,))
+
+
+def _run_pair(
+    conn: sqlite3.Connection, run_id: Optional[int], since_run_id: Optional[int]
+) -> Tuple[int, int]:
+    """
+    (run, baseline). Defaults: the latest finished run, against everything before it.
+
+    Runs can cover only some companies (inbox drops, partial raw files, shards), so
+    the baseline is not one run's snapshot: each company is compared with its latest
+    finished snapshot at or before `since` (see _BASELINE_RUN / _LEADERBOARD_AS_OF).
+    """
+    if run_id is None:
+        row = conn.execute("SELECT MAX(run_id) FROM runs WHERE status = 'done'").fetchone()
+        if row[0] is None:
+            raise ValueError("no finished runs in score history")
+        run_id = row[0]
+    if since_run_id is None:
+        since_run_id = run_id - 1
+    return run_id, since_run_id
+
+
+# run_id of a company's (cur.company_key) latest finished snapshot at or before a run
+# (idx_score_history_company, newest first)
+_BASELINE_RUN = """
+    SELECT h.run_id FROM score_history AS h JOIN runs AS r ON r.run_id = h.run_id
+    WHERE h.company_key = cur.company_key AND h.run_id <= ? AND r.status = 'done'
+    ORDER BY h.run_id DESC LIMIT 1
+"""
+
+# every company's latest score as of a run: its newest snapshot at or before it, from
+# finished runs (plus the run asked for). One pass over idx_score_history_company.
+_LEADERBOARD_AS_OF = """
+    SELECT h.company_key, h.score_total, MAX(h.run_id) AS run_id
+    FROM score_history AS h
+    WHERE h.run_id <= ? AND h.run_id IN (SELECT run_id FROM runs WHERE status = 'done' OR run_id = ?)
+    GROUP BY h.company_key
+"""
+
+
+def _read(
+    db_path: str, build: Callable[[sqlite3.Connection], Tuple[str, Sequence[Any]]]
+) -> List[Dict[str, Any]]:
+    conn = connect(db_path)
+    conn.row_factory = sqlite3.Row
+    try:
+        sql, params = build(conn)
+        return [dict(r) for r in conn.execute(sql, params)]
+    finally:
+        conn.close()
+
+
+def score_deltas(
+    db_path: str = DEFAULT_DB_PATH,
+    *,
+    run_id: Optional[int] = None,
+    since_run_id: Optional[int] = None,
+    min_abs_delta: float = 0.0,
+    limit: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Movers among the companies scored in `run_id`, biggest absolute change first,
+    each against its own baseline snapshot (see _run_pair). Companies never
+    scored before have prev_total NULL and are ranked by their total.
+    """
+    def build(conn: sqlite3.Connection):
+        run, since = _run_pair(conn, run_id, since_run_id)
+        sql = f"""
+            SELECT cur.company_key, c.company_name, prev.score_total AS prev_total,
+                   cur.score_total AS score_total,
+                   cur.score_total - prev.score_total AS delta
+            FROM score_history AS cur
+            LEFT JOIN score_history AS prev
+                   ON prev.company_key = cur.company_key AND prev.run_id = ({_BASELINE_RUN})
+            LEFT JOIN companies AS c ON c.company_key = cur.company_key
+            WHERE cur.run_id = ?
+              AND (prev.score_total IS NULL OR ABS(cur.score_total - prev.score_total) >= ?)
+            ORDER BY ABS(COALESCE(cur.score_total - prev.score_total, cur.score_total)) DESC
+            LIMIT ?
+        """
+        return sql, (since, run, min_abs_delta, -1 if limit is None else limit)
+
+    return _read(db_path, build)
+
+
+def threshold_crossers(
+    threshold: float,
+    db_path: str = DEFAULT_DB_PATH,
+    *,
+    run_id: Optional[int] = None,
+    since_run_id: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Companies scored at or above `threshold` in `run_id` whose baseline snapshot
+    (see _run_pair) was below it, or that were never scored before.
+    """
+    def build(conn: sqlite3.Connection):
+        run, since = _run_pair(conn, run_id, since_run_id)
+        sql = f"""
+            SELECT cur.company_key, c.company_name, prev.score_total AS prev_total,
+                   cur.score_total AS score_total
+            FROM score_history AS cur
+            LEFT JOIN score_history AS prev
+                   ON prev.company_key = cur.company_key AND prev.run_id = ({_BASELINE_RUN})
+            LEFT JOIN companies AS c ON c.company_key = cur.company_key
+            WHERE cur.run_id = ? AND cur.score_total >= ?
+              AND (prev.score_total IS NULL OR prev.score_total < ?)
+            ORDER BY cur.score_total DESC
+        """
+        return sql, (since, run, threshold, threshold)
+
+    return _read(db_path, build)
+
+
+def new_top_k_entrants(
+    k: int,
+    db_path: str = DEFAULT_DB_PATH,
+    *,
+    run_id: Optional[int] = None,
+    since_run_id: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Companies in the top `k` as of `run_id` that were not in the top `k` as of the
+    baseline. "As of" a run means every company's latest finished snapshot up to
+    it, so a run that rescored only some companies is ranked against everyone else's
+    standing scores, not just against itself.
+    """
+    def build(conn: sqlite3.Connection):
+        run, since = _run_pair(conn, run_id, since_run_id)
+        sql = f"""
+            WITH cur AS (
+                SELECT company_key, score_total FROM ({_LEADERBOARD_AS_OF})
+                ORDER BY score_total DESC, company_key LIMIT ?
+            ),
+            prev AS (
+                SELECT company_key FROM ({_LEADERBOARD_AS_OF})
+                ORDER BY score_total DESC, company_key LIMIT ?
+            )
+            SELECT cur.company_key, c.company_name, cur.score_total
+            FROM cur
+            LEFT JOIN companies AS c ON c.company_key = cur.company_key
+            WHERE cur.company_key NOT IN (SELECT company_key FROM prev)
+            ORDER BY cur.score_total DESC
+        """
+        return sql, (run, run, k, since, since, k)
+
+    return _read(db_path, build)
+
+
+def score_trajectory(company_key: str, db_path: str = DEFAULT_DB_PATH) -> List[Dict[str, Any]]:
+    """One company's score_total per run, oldest first (index-only on score_history)."""
+    sql = """
+        SELECT h.run_id, r.started_at, h.score_total
+        FROM score_history AS h
+        JOIN runs AS r ON r.run_id = h.run_id
+        WHERE h.company_key = ?
+        ORDER BY h.run_id
+    """
+    return fetch_dicts(db_path, sql, (company_key,))
+
+
+# --- Retention ---
+def runs_to_drop(
+    runs: Sequence[Tuple[int, str, str]],
+    keep_last: int = DEFAULT_KEEP_LAST,
+    keep_every_days: int = DEFAULT_KEEP_EVERY_DAYS,
+    *,
+    now: Optional[datetime] = None,
+) -> List[int]:
+    """
+    (run_id, started_at, status) newest first -> run ids to drop.
+    The newest `keep_last` runs are kept; older finished runs are thinned to the
+    newest one per `keep_every_days` window. Failed runs older than that go, and so
+    do runs still 'running' after STALE_RUN_HOURS (their process died); a run still
+    in progress is never dropped, however many runs finished since it started.
+    compact_history keeps every company's latest snapshot out of thinned runs.
+    """
+    now = now or datetime.now(timezone.utc)
+    stale = now - timedelta(hours=STALE_RUN_HOURS)
+    drop: List[int] = []
+    kept_buckets = set()
+    for i, (run_id, started_at, status) in enumerate(runs):
+        if i < keep_last:
+            continue
+        started = datetime.fromisoformat(started_at)
+        if status != "done":
+            if status == "failed" or started < stale:
+                drop.append(run_id)
+            continue
+        bucket = started.toordinal() // max(keep_every_days, 1)
+        if bucket in kept_buckets:
+            drop.append(run_id)
+        else:
+            kept_buckets.add(bucket)
+    return drop
+
+
+def compact_history(
+    db_path: str = DEFAULT_DB_PATH,
+    *,
+    keep_last: int = DEFAULT_KEEP_LAST,
+    keep_every_days: int = DEFAULT_KEEP_EVERY_DAYS,
+) -> int:
+    """
+    Apply the retention policy (see runs_to_drop). A dropped finished run keeps the
+    snapshots that are some company's latest (a partial run may be the only one that
+    scored it); the run itself goes once nothing is left. Returns the runs removed.
+    """
+    conn = connect(db_path)
+    try:
+        runs = conn.execute(
+            "SELECT run_id, started_at, status FROM runs ORDER BY run_id DESC"
+        ).fetchall()
+        drop = runs_to_drop(runs, keep_last=keep_last, keep_every_days=keep_every_days)
+        if not drop:
+            return 0
+        status = {run_id: st for run_id, _, st in runs}
+        removed = 0
+        with conn:
+            for run_id in drop:
+                # PK range delete: one run's rows are contiguous
+                if status[run_id] != "done":
+                    conn.execute("DELETE FROM score_history WHERE run_id = ?", (run_id,))
+                else:
+                    conn.execute(
+                        """
+                        DELETE FROM score_history AS h
+                        WHERE h.run_id = ? AND EXISTS (
+                            SELECT 1 FROM score_history AS later JOIN runs AS r ON r.run_id = later.run_id
+                            WHERE later.company_key = h.company_key AND later.run_id > h.run_id AND r.status = 'done'
+                        )
+                        """,
+                        (run_id,),
+                    )
+                removed += conn.execute(
+                    "DELETE FROM runs WHERE run_id = ? AND NOT EXISTS (SELECT 1 FROM score_history WHERE run_id = ?)",
+                    (run_id, run_id),
+                ).rowcount
+        conn.execute("PRAGMA optimize")
+        return removed
+    finally:
+        conn.close()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Inspect scoring runs and apply the score_history retention policy")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH)
+    sub = parser.add_subparsers(dest="action", required=True)
+
+    p = sub.add_parser("runs", help="list the latest runs")
+    p.add_argument("--limit", type=int, default=20)
+
+    p = sub.add_parser("compact", help="drop old runs' snapshots (see runs_to_drop)")
+    p.add_argument("--keep-last", type=int, default=DEFAULT_KEEP_LAST, help="newest runs kept in full")
+    p.add_argument(
+        "--keep-every-days", type=int, default=DEFAULT_KEEP_EVERY_DAYS, help="older runs: keep one per this many days"
+    )
+    args = parser.parse_args(argv)
+
+    if args.action == "runs":
+        for run in list_runs(args.db, args.limit):
+            print(
+                f"{run['run_id']:>6}  {run['status']:8}  {run['started_at']}  "
+                f"{run['companies'] or 0:>8,} companies  {run['source']}"
+            )
+        return
+
+    dropped = compact_history(args.db, keep_last=args.keep_last, keep_every_days=args.keep_every_days)
+    print(f"Removed {dropped} run(s) from {args.db}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,26 +1,30 @@
 # csv -> raw company loading + dedupe
-from dataclasses import dataclass
-from typing import List, Any
-import pandas as pd
+from __future__ import annotations
 
+import argparse
+import sqlite3
+from collections import Counter
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional
+
+from src.merlin.keys import canonical_domain
 from src.merlin.models import RawCompany
 
+if TYPE_CHECKING:
+    import pandas as pd
+
+DEFAULT_CSV_PATH = "data/case_study_data.csv"
+CSV_CHUNK_ROWS = 10_000  # iter_companies_from_csv read size
+
 
 def _safe_str(value: Any) -> str:
     """Convert NaN/None to empty string, everything else to str."""
-    if pd.isna(value):
+    if value is None or value != value:  # NaN
         return ""
     return str(value)
 
 
-def load_companies_from_csv(path: str) -> list[RawCompany]:
-    """
-    Load the case study CSV, clean header artifacts, remove duplicates,
-    and return a list of RawCompany objects.
-    """
-
-    df = pd.read_csv(path, skiprows=2).iloc[:, 1:]
-
+def _clean(df: pd.DataFrame) -> pd.DataFrame:
+    """Header artifacts and rows without a URL out; duplicates are left to the caller."""
     # Drop fully empty rows
     df = df.dropna(how="all")
 
@@ -28,29 +32,90 @@ def load_companies_from_csv(path: str) -> list[RawCompany]:
     df = df.dropna(subset=["URL"])
 
     # Remove rows where URL == "URL" (repeated header rows)
-    df = df[df["URL"].str.strip().str.upper() != "URL"]
+    return df[df["URL"].astype(str).str.strip().str.upper() != "URL"]
+
+
+def _to_raw_company(row: Dict[str, Any]) -> RawCompany:
+    return RawCompany(
+        name=_safe_str(row.get("Name")),
+        description=_safe_str(row.get("Description")),
+        domain=_safe_str(row.get("URL")),
+        industry=_safe_str(row.get("Industry")),
+        stage=_safe_str(row.get("Stage")),
+    )
+
+
+def load_companies_from_csv(path: str) -> list[RawCompany]:
+    """
+    Load the case study CSV, clean header artifacts, remove duplicates,
+    and return a list of RawCompany objects.
+    """
+
+    import pandas as pd
+
+    df = _clean(pd.read_csv(path, skiprows=2).iloc[:, 1:])
 
     # Remove duplicate URLs 
     df = df.drop_duplicates(subset=["URL"], keep="first")
 
     # Build RawCompany objects
-    companies: list[RawCompany] = []
-    for _, row in df.iterrows():
-        companies.append(
-            RawCompany(
-                name=_safe_str(row.get("Name")),
-                description=_safe_str(row.get("Description")),
-                domain=_safe_str(row.get("URL")),
-                industry=_safe_str(row.get("Industry")),
-                stage=_safe_str(row.get("Stage")),
-            )
-        )
-
-    return companies
+    return [_to_raw_company(row) for row in df.to_dict("records")]
 
-if __name__ == "__main__":
-    companies = load_companies_from_csv("data/case_study_data.csv")
+
+class SeenKeys:
+    """
+    Set of strings in a private temporary SQLite file (pages spill to disk past
+    SQLite's small page cache), so dedupe state does not grow RAM with the input.
+    """
+
+    def __init__(self) -> None:
+        self._conn = sqlite3.connect("")  # "" = temporary on-disk database, deleted on close
+        self._conn.execute("PRAGMA journal_mode=OFF")
+        self._conn.execute("CREATE TABLE seen (key TEXT PRIMARY KEY) WITHOUT ROWID")
+
+    def add(self, key: str) -> bool:
+        """True if `key` was not seen before."""
+        return self._conn.execute("INSERT OR IGNORE INTO seen VALUES (?)", (key,)).rowcount == 1
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def iter_companies_from_csv(path: str, *, chunksize: int = CSV_CHUNK_ROWS) -> Iterator[RawCompany]:
+    """
+    load_companies_from_csv as a stream: same cleaning and first-wins URL dedupe,
+    read `chunksize` rows at a time, so memory does not depend on the file size.
+    """
+    import pandas as pd
+
+    seen = SeenKeys()
+    try:
+        for chunk in pd.read_csv(path, skiprows=2, chunksize=chunksize):
+            for row in _clean(chunk.iloc[:, 1:]).to_dict("records"):
+                if seen.add(str(row["URL"])):
+                    yield _to_raw_company(row)
+    finally:
+        seen.close()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Load a sourcing CSV and report what enrichment will see")
+    parser.add_argument("csv", nargs="?", default=DEFAULT_CSV_PATH)
+    parser.add_argument("--show", type=int, default=5, help="print the first N companies")
+    args = parser.parse_args(argv)
+
+    companies = load_companies_from_csv(args.csv)
+    keys = Counter(canonical_domain(c.domain) for c in companies)
     print("Total companies loaded:", len(companies))
+    print("Without a usable domain:", keys.pop("", 0))
+    dupes = {k: n for k, n in keys.items() if n > 1}
+    print("Duplicate canonical domains:", len(dupes))
+    for key, n in sorted(dupes.items(), key=lambda kv: -kv[1])[: args.show]:
+        print(f"  - {key} x{n}")
 
-    for c in companies[:5]:
+    for c in companies[: args.show]:
         print(c)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,19 @@
+# canonical company keys shared by scoring, persistence and notifications
+from __future__ import annotations
+
+from typing import Optional
+
+
+def canonical_domain(url: Optional[str]) -> str:
+    """
+    Normalize a URL or domain to a stable company key:
+        "https://www.Acme.com/about" -> "acme.com"
+    """
+    if not url:
+        return ""
+    domain = url.strip().lower()
+    domain = domain.replace("https://", "").replace("http://", "")
+    domain = domain.split("/")[0].split("?")[0].split("#")[0]
+    if domain.startswith("www."):
+        domain = domain[len("www."):]
+    return domain.strip(".")
@@ -0,0 +1,147 @@
+# bounded top-K leaderboard, fed one scored company at a time
+from __future__ import annotations
+
+import heapq
+from dataclasses import dataclass, replace
+from typing import Iterator, List, Optional
+
+from src.merlin.db import DEFAULT_DB_PATH, fetch_dicts
+from src.merlin.models import ScoredCompanyRecord
+
+DEFAULT_TOP_K = 500
+
+
+@dataclass(slots=True)
+class LeaderboardEntry:
+    """
+    Lightweight stand-in for a ScoredCompanyRecord (no founders / features / enrichment).
+    Enough to print a leaderboard line.
+    """
+    name: str
+    website_domain: str
+    team: float
+    market: float
+    funding: float
+    total: float
+
+    @classmethod
+    def from_record(cls, r: ScoredCompanyRecord) -> "LeaderboardEntry":
+        return cls(
+            name=r.name,
+            website_domain=r.website_domain,
+            team=r.scores.team,
+            market=r.scores.market,
+            funding=r.scores.funding,
+            total=r.scores.total,
+        )
+
+
+class TopKCollector:
+    """
+    Keeps the K highest scoring companies (by scores.total) plus every company
+    at or above `threshold` (those are what we notify on).
+
+    Ties are broken by arrival order, so the output matches a stable
+    `sort(key=total, reverse=True)` over the full list.
+    Memory is O(K + threshold hits) instead of O(N).
+    """
+
+    def __init__(self, k: int = DEFAULT_TOP_K, threshold: Optional[float] = None) -> None:
+        if k < 0:
+            raise ValueError("k must be >= 0")
+        self.k = k
+        self.threshold = threshold
+        self.seen = 0
+
+        # min-heap of (total, -seq, entry): heap[0] is the weakest kept entry
+        self._heap: list[tuple[float, int, LeaderboardEntry]] = []
+        self._hits: list[tuple[int, ScoredCompanyRecord]] = []
+
+    def add(self, record: ScoredCompanyRecord) -> None:
+        seq = self.seen
+        self.seen += 1
+        total = record.scores.total
+
+        if self.threshold is not None and total >= self.threshold:
+            # notifications never read the enrichment; don't keep it alive for every hit
+            self._hits.append((seq, replace(record, harmonic=None)))
+
+        if self.k == 0:
+            return
+
+        item = (total, -seq, LeaderboardEntry.from_record(record))
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, item)
+        elif item[:2] > self._heap[0][:2]:
+            heapq.heapreplace(self._heap, item)
+
+    def top(self) -> List[LeaderboardEntry]:
+        """Top K entries, highest total first."""
+        ordered = sorted(self._heap, key=lambda t: (-t[0], -t[1]))
+        return [entry for _, _, entry in ordered]
+
+    def threshold_hits(self) -> List[ScoredCompanyRecord]:
+        """Records at or above the threshold (without `harmonic`), highest total first."""
+        ordered = sorted(self._hits, key=lambda t: (-t[1].scores.total, t[0]))
+        return [r for _, r in ordered]
+
+    @property
+    def dropped(self) -> int:
+        """Number of companies seen that did not make the top K."""
+        return self.seen - len(self._heap)
+
+    def __iter__(self) -> Iterator[LeaderboardEntry]:
+        return iter(self.top())
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+
+def run_top_k(run_id: int, db_path: str = DEFAULT_DB_PATH, k: int = DEFAULT_TOP_K) -> List[LeaderboardEntry]:
+    """
+    Top K of a finished run from its score_history snapshot (idx_score_history_rank).
+    Ties go by company_key: arrival order is not stored.
+    """
+    rows = fetch_dicts(
+        db_path,
+        """
+        SELECT c.company_name, c.website_domain, h.score_team, h.score_market, h.score_funding, h.score_total
+        FROM score_history AS h
+        JOIN companies AS c ON c.company_key = h.company_key
+        WHERE h.run_id = ?
+        ORDER BY h.score_total DESC, h.company_key
+        LIMIT ?
+        """,
+        (run_id, k),
+    )
+    return [
+        LeaderboardEntry(
+            name=r["company_name"],
+            website_domain=r["website_domain"],
+            team=r["score_team"],
+            market=r["score_market"],
+            funding=r["score_funding"],
+            total=r["score_total"],
+        )
+        for r in rows
+    ]
+
+
+def format_leaderboard(collector: TopKCollector, title: str) -> str:
+    return format_entries(collector.top(), title, dropped=collector.dropped, k=collector.k)
+
+
+def format_entries(entries: List[LeaderboardEntry], title: str, *, dropped: int = 0, k: int = DEFAULT_TOP_K) -> str:
+    lines = [title]
+
+    for r in entries:
+        lines.append(
+            f"{r.name:30} "
+            f"Total: {r.total:6.2f}  "
+            f"(Team: {r.team:6.2f}, Market: {r.market:6.2f}, Funding: {r.funding:6.2f})"
+        )
+
+    if dropped:
+        lines.append(f"... and {dropped} more below the top {k}")
+
+    return "\n".join(lines)
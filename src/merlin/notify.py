@@ -1,15 +1,115 @@
 from __future__ import annotations
 
+import argparse
+import hashlib
+import heapq
+import json
 import logging
 import os
-from typing import Optional, Iterable, Any
+import random
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Optional, Iterable, Iterator, Any, Mapping
 
-import requests
+from src.merlin.db import DEFAULT_DB_PATH, connect
+from src.merlin.keys import canonical_domain
+
+if TYPE_CHECKING:
+    import requests
 
 log = logging.getLogger(__name__)
 
 SLACK_WEBHOOK_ENV = "MERLIN_SLACK_WEBHOOK_URL"
 
+# companies at or above this total score get posted to Slack
+SLACK_SCORE_THRESHOLD: float = 80.0
+
+# outbox delivery
+OUTBOX_MAX_ATTEMPTS = 8
+OUTBOX_BASE_DELAY_S = 2.0  # retry n waits ~ base * 2**(n-1), capped, with jitter
+OUTBOX_MAX_DELAY_S = 600.0
+OUTBOX_LEASE_S = 60.0  # a 'sending' row whose worker died is retried after this
+OUTBOX_POLL_S = 2.0
+
+# message size / rate (Slack: 50 blocks and 3000 chars per section; ~1 webhook message/s)
+SLACK_USERNAME = "Merlin VC Bot"
+SLACK_MAX_BLOCKS = 48
+SLACK_MAX_SECTION_CHARS = 3000
+SLACK_MAX_MESSAGE_CHARS = 12_000
+SLACK_DIGEST_OVER = 25  # more hits than this -> one digest message instead of chunks
+SLACK_DIGEST_TOP_N = 10
+SLACK_MESSAGES_PER_S = 1.0
+SLACK_POST_TIMEOUT_S = 5.0
+
+
+# --- HTTP: one rate-limited session per thread ---
+class RateLimiter:
+    """Token bucket shared by every sender in the process; acquire() blocks until a token is free."""
+
+    def __init__(self, rate_per_s: float = SLACK_MESSAGES_PER_S, burst: int = 1) -> None:
+        self.rate = rate_per_s
+        self.burst = burst
+        self._tokens = float(burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        """Hold every sender back for `seconds` (e.g. a 429 Retry-After)."""
+        with self._lock:
+            self._tokens = min(self._tokens, 0.0) - seconds * self.rate
+
+
+slack_rate_limiter = RateLimiter()
+_local = threading.local()
+
+
+def _slack_session() -> requests.Session:
+    """Keep-alive session reused for every webhook post from this thread."""
+    session = getattr(_local, "session", None)
+    if session is None:
+        import requests  # only needed once something is actually posted
+
+        session = _local.session = requests.Session()
+    return session
+
+
+def _post(
+    url: str,
+    payload: dict[str, Any] | str,
+    *,
+    session: Optional[requests.Session] = None,
+    headers: Optional[dict[str, str]] = None,
+    timeout: float = SLACK_POST_TIMEOUT_S,
+) -> requests.Response:
+    """Rate-limited POST of a payload (dict or pre-encoded JSON); raises on HTTP errors."""
+    slack_rate_limiter.acquire()
+    body = payload if isinstance(payload, str) else json.dumps(payload, separators=(",", ":"))
+    resp = (session or _slack_session()).post(
+        url,
+        data=body.encode("utf-8"),
+        headers={"Content-Type": "application/json", **(headers or {})},
+        timeout=timeout,
+    )
+    if resp.status_code == 429:
+        retry_after = float(resp.headers.get("Retry-After") or 1)
+        slack_rate_limiter.pause(retry_after)
+    resp.raise_for_status()
+    return resp
+
 
 def send_slack_message(text: str, *, username: Optional[str] = None) -> None:
     """
@@ -27,132 +127,476 @@ def send_slack_message(text: str, *, username: Optional[str] = None) -> None:
         payload["username"] = username
 
     try:
-        resp = requests.post(url, json=payload, timeout=5)
-        resp.raise_for_status()
+        _post(url, payload)
     except Exception as e:
         log.error("Failed to send Slack message: %s", e)
 
 
-def _format_results_for_slack(results: Iterable[Any]) -> str:
-    """
-    Builds human readable message for Slack
-    """
-
-    # --- Merlin Intro Message ---
-    intro = (
-        "Greetings, mortals :male_mage:\n"
-        "I, *Merlin the Venture Wizard*, have gazed deeply into my crystal ball :crystal_ball:\n"
-        "consulted ancient scrolls :scroll: of market wisdom,\n"
-        "and conjured visions of the most promising companies in the realm.\n\n"
-        "Behold… the ventures that shimmer with arcane potential :magic_wand:\n\n"
-    )
+_INTRO = (
+    "Greetings, mortals :male_mage:\n"
+    "I, *Merlin the Venture Wizard*, have gazed deeply into my crystal ball :crystal_ball:\n"
+    "consulted ancient scrolls :scroll: of market wisdom,\n"
+    "and conjured visions of the most promising companies in the realm.\n\n"
+    "Behold… the ventures that shimmer with arcane potential :magic_wand:\n\n"
+)
+
+_NO_RESULTS = (
+    "Merlin gazed deeply into the crystal ball…\n"
+    "But alas, no companies scored above *{threshold:g}* today. :crystal_ball:"
+)
+
+
+def _company_url(r: Any) -> str:
+    raw_url = getattr(r, "url", "") or getattr(r, "website_url", "")
+    if raw_url and not raw_url.startswith(("http://", "https://")):
+        raw_url = "https://" + raw_url
+    return raw_url
+
+
+def _note(r: Any, notes: Optional[Mapping[str, str]]) -> Optional[str]:
+    """Per-company note (e.g. why it is alerted), keyed by company_key."""
+    if not notes:
+        return None
+    return notes.get(canonical_domain(getattr(r, "website_domain", None) or getattr(r, "website_url", None)))
+
+
+def _company_lines(r: Any, note: Optional[str] = None) -> list[str]:
+    """Slack mrkdwn lines for one company: header, description, founders, scores."""
+    lines: list[str] = []
+    name = getattr(r, "name", "Unknown Company")
+
+    # URL
+    raw_url = _company_url(r)
+    url_display = f" – <{raw_url}|{raw_url.replace('https://','')}>" if raw_url else ""
+
+    # Company Header
+    lines.append(f"*{name}*{url_display}")
+
+    # Description
+    desc = getattr(r, "description", "") or ""
+    if desc:
+        lines.append(desc.strip())
+    lines.append("")  # blank line
+
+    # Founders
+    founders = getattr(r, "founders", None)
+    if founders is None:
+        enrichment = getattr(r, "enrichment", None)
+        if enrichment:
+            founders = getattr(enrichment, "founders", None)
+
+    if founders:
+        lines.append("• *Founders:*")
+    for f in founders or []:
+        fname = getattr(f, "name", "") or "Founder"
+        linkedin = getattr(f, "linkedin", "") or getattr(f, "linkedin_url", "")
+
+        # Collect all emails
+        primary = getattr(f, "email", None)
+        email_list = getattr(f, "emails", None)
+
+        emails = []
+        if primary:
+            emails.append(primary)
+        if email_list:
+            # email_list should already be deduped, but we dedupe again just in case
+            for e in email_list:
+                if e and e not in emails:
+                    emails.append(e)
+
+        # Build parts
+        parts = [fname]
+        if linkedin:
+            parts.append(f"<{linkedin}|LinkedIn>")
+        if emails:
+            parts.append(" | ".join(emails))
+
+        lines.append("   – " + " — ".join(parts))
+
+
+        lines.append("")
+
+    # Scores
+    scores = getattr(r, "scores", None)
+    if scores:
+        lines.append(f"• *Score:* {scores.total:0.2f}")
+        lines.append(
+            f"   Team: {scores.team:0.2f} | Market: {scores.market:0.2f} | Funding: {scores.funding:0.2f}"
+        )
+    if note:
+        lines.append(f"• *Why now:* {note}")
+    return lines
 
-    lines: list[str] = [intro]
-
-    # --- Per-company details ---
-    for idx, r in enumerate(results):
-        name = getattr(r, "name", "Unknown Company")
-
-        # URL
-        raw_url = getattr(r, "url", "") or getattr(r, "website_url", "")
-        url_display = ""
-        if raw_url:
-            if not raw_url.startswith(("http://", "https://")):
-                raw_url = "https://" + raw_url
-            url_display = f" – <{raw_url}|{raw_url.replace('https://','')}>"
-
-        # Company Header
-        lines.append(f"*{name}*{url_display}")
-
-        # Description
-        desc = getattr(r, "description", "") or ""
-        if desc:
-            lines.append(desc.strip())
-        lines.append("")  # blank line
-
-        # Founders
-        founders = getattr(r, "founders", None)
-        if founders is None:
-            enrichment = getattr(r, "enrichment", None)
-            if enrichment:
-                founders = getattr(enrichment, "founders", None)
-
-        if founders:
-            lines.append("• *Founders:*")
-        for f in founders:
-            fname = getattr(f, "name", "") or "Founder"
-            linkedin = getattr(f, "linkedin", "") or getattr(f, "linkedin_url", "")
-
-            # Collect all emails
-            primary = getattr(f, "email", None)
-            email_list = getattr(f, "emails", None)
-
-            emails = []
-            if primary:
-                emails.append(primary)
-            if email_list:
-                # email_list should already be deduped, but we dedupe again just in case
-                for e in email_list:
-                    if e and e not in emails:
-                        emails.append(e)
-
-            # Build parts
-            parts = [fname]
-            if linkedin:
-                parts.append(f"<{linkedin}|LinkedIn>")
-            if emails:
-                parts.append(" | ".join(emails))
-
-            lines.append("   – " + " — ".join(parts))
-
-
-            lines.append("")
-
-        # Scores
-        scores = getattr(r, "scores", None)
-        if scores:
-            lines.append(f"• *Score:* {scores.total:0.2f}")
-            lines.append(
-                f"   Team: {scores.team:0.2f} | Market: {scores.market:0.2f} | Funding: {scores.funding:0.2f}"
-            )
 
-        DIVIDER = "────────────────────────────────────────────────────────"
+# --- Block Kit chunking / digest ---
+def _section(text: str) -> dict[str, Any]:
+    if len(text) > SLACK_MAX_SECTION_CHARS:
+        text = text[: SLACK_MAX_SECTION_CHARS - 1] + "…"
+    return {"type": "section", "text": {"type": "mrkdwn", "text": text}}
 
-        if idx < len(results) - 1:
-            lines.append(DIVIDER + "\n")
 
+_DIVIDER_BLOCK = {"type": "divider"}
 
 
-    return "\n".join(lines).rstrip()
+def _chunk_payload(blocks: list[dict[str, Any]], part: int) -> dict[str, Any]:
+    return {
+        "text": f"Merlin results (part {part})",  # notification / fallback text
+        "blocks": blocks,
+        "username": SLACK_USERNAME,
+    }
 
 
-def send_results_to_slack(results: Iterable[Any]) -> None:
+def iter_result_chunks(
+    results: Iterable[Any],
+    *,
+    max_blocks: int = SLACK_MAX_BLOCKS,
+    max_chars: int = SLACK_MAX_MESSAGE_CHARS,
+    notes: Optional[Mapping[str, str]] = None,
+) -> Iterator[dict[str, Any]]:
     """
-    Sends the wizard intro + formatted company results to Slack,
-    but ONLY for companies with total score >= 75.
+    Stream companies into Block Kit webhook payloads, each within Slack's block
+    count and a conservative text budget. One section + divider per company;
+    the intro opens the first message, later ones are marked "(continued)".
     """
-    results = list(results)
+    part = 1
+    blocks: list[dict[str, Any]] = [_section(_INTRO.strip())]
+    chars = len(_INTRO)
 
-    # Filter by score threshold
-    filtered = []
     for r in results:
-        scores = getattr(r, "scores", None)
-        if scores and scores.total >= 80:
-            filtered.append(r)
-
-    # If nothing qualifies, send a friendly message
-    if not filtered:
-        send_slack_message(
-            "Merlin gazed deeply into the crystal ball…\n"
-            "But alas, no companies scored above *75* today. :crystal_ball:",
-            username="Merlin VC Bot"
+        company = _section("\n".join(_company_lines(r, _note(r, notes))).strip())
+        size = len(company["text"]["text"])
+        if len(blocks) + 2 > max_blocks or (chars + size > max_chars and len(blocks) > 1):
+            yield _chunk_payload(blocks, part)
+            part += 1
+            blocks = [{"type": "context", "elements": [{"type": "mrkdwn", "text": f"_(continued, part {part})_"}]}]
+            chars = 0
+        blocks.extend((company, _DIVIDER_BLOCK))
+        chars += size
+
+    if blocks[-1] is _DIVIDER_BLOCK:
+        blocks.pop()
+    yield _chunk_payload(blocks, part)
+
+
+def digest_payload(
+    results: Iterable[Any],
+    *,
+    top_n: int = SLACK_DIGEST_TOP_N,
+    threshold: float = SLACK_SCORE_THRESHOLD,
+    notes: Optional[Mapping[str, str]] = None,
+) -> dict[str, Any]:
+    """
+    One message for big runs: hit count, the top N, and counts per sector / stage.
+    Streams `results` (top N kept in a heap), so any number of hits is fine.
+    """
+    top: list[tuple[float, int, Any]] = []
+    sectors: Counter[str] = Counter()
+    stages: Counter[str] = Counter()
+    total = 0
+    for i, r in enumerate(results):
+        total += 1
+        item = (r.scores.total, -i, r)
+        if len(top) < top_n:
+            heapq.heappush(top, item)
+        elif item > top[0]:
+            heapq.heapreplace(top, item)
+        for sector in getattr(r, "sectors", None) or ["Unknown"]:
+            sectors[sector] += 1
+        stages[getattr(r, "stage", None) or "Unknown"] += 1
+
+    ranked = [r for _, _, r in sorted(top, reverse=True)]
+    top_lines = []
+    for rank, r in enumerate(ranked, start=1):
+        url = _company_url(r)
+        name = f"<{url}|{r.name}>" if url else r.name
+        s = r.scores
+        note = _note(r, notes)
+        top_lines.append(
+            f"{rank}. *{name}* — {s.total:0.2f}  (Team {s.team:0.0f} · Market {s.market:0.0f} · Funding {s.funding:0.0f})"
+            + (f"  _{note}_" if note else "")
         )
+
+    def counts(c: Counter[str], limit: int = 15) -> str:
+        text = " · ".join(f"{k} {v}" for k, v in c.most_common(limit))
+        if len(c) > limit:
+            text += f" · +{len(c) - limit} more"
+        return text
+
+    blocks = [
+        _section(_INTRO.strip()),
+        _section(f"*{total} companies* scored {threshold:g} or higher. Top {len(ranked)}:"),
+        _section("\n".join(top_lines)),
+        _DIVIDER_BLOCK,
+        _section(f"*By sector:* {counts(sectors)}"),
+        _section(f"*By stage:* {counts(stages)}"),
+    ]
+    return {"text": f"Merlin digest: {total} companies scored {threshold:g}+", "blocks": blocks, "username": SLACK_USERNAME}
+
+
+def results_payloads(
+    results: Iterable[Any],
+    *,
+    digest_over: Optional[int] = SLACK_DIGEST_OVER,
+    digest_top_n: int = SLACK_DIGEST_TOP_N,
+    notes: Optional[Mapping[str, str]] = None,
+) -> list[dict[str, Any]]:
+    """
+    Webhook payloads for a run, ONLY for companies with total score >= SLACK_SCORE_THRESHOLD:
+    chunked Block Kit messages, or a single digest when there are more than
+    `digest_over` hits (None = never digest). `notes` maps company_key -> a
+    "Why now" line (see alerts.py).
+    """
+    hits = [r for r in results if getattr(r, "scores", None) and r.scores.total >= SLACK_SCORE_THRESHOLD]
+    if not hits:
+        return [{"text": _NO_RESULTS.format(threshold=SLACK_SCORE_THRESHOLD), "username": SLACK_USERNAME}]
+    if digest_over is not None and len(hits) > digest_over:
+        return [digest_payload(hits, top_n=digest_top_n, notes=notes)]
+    return list(iter_result_chunks(hits, notes=notes))
+
+
+def send_results_to_slack(results: Iterable[Any], **kwargs: Any) -> None:
+    """
+    Posts the results synchronously (blocks on the webhook), in order, through
+    the shared rate-limited session. `results` can be any iterable
+    (e.g. TopKCollector.threshold_hits()). The pipeline uses enqueue_results_to_slack instead.
+    """
+    url = os.getenv(SLACK_WEBHOOK_ENV)
+    if not url:
+        log.warning("Slack webhook not configured; skipping Slack notification.")
         return
+    for payload in results_payloads(results, **kwargs):
+        try:
+            _post(url, payload)
+        except Exception as e:
+            log.error("Failed to send Slack message: %s", e)
+            return
+
+
+# --- Outbox: durable, non-blocking delivery ---
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
 
-    # Format only those companies
-    text = _format_results_for_slack(filtered)
-    if not text:
-        log.warning("No text generated for Slack; skipping.")
+
+def enqueue_slack_payload(
+    payload: dict[str, Any],
+    *,
+    idempotency_key: Optional[str] = None,
+    db_path: str = DEFAULT_DB_PATH,
+) -> bool:
+    """
+    Queue a webhook payload in slack_outbox; returns False if the key was already queued.
+    Without a key, the payload's content hash is the key (identical messages are sent once).
+    """
+    body = json.dumps(payload, separators=(",", ":"), sort_keys=True)
+    key = idempotency_key or "sha256:" + hashlib.sha256(body.encode("utf-8")).hexdigest()
+    conn = connect(db_path)
+    try:
+        with conn:
+            cur = conn.execute(
+                "INSERT OR IGNORE INTO slack_outbox (idempotency_key, payload, next_attempt_at, created_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, body, time.time(), _now_iso()),
+            )
+        return cur.rowcount == 1
+    finally:
+        conn.close()
+
+
+def enqueue_slack_message(
+    text: str,
+    *,
+    username: Optional[str] = None,
+    idempotency_key: Optional[str] = None,
+    db_path: str = DEFAULT_DB_PATH,
+) -> bool:
+    payload: dict[str, Any] = {"text": text}
+    if username:
+        payload["username"] = username
+    return enqueue_slack_payload(payload, idempotency_key=idempotency_key, db_path=db_path)
+
+
+def enqueue_results_to_slack(
+    results: Iterable[Any],
+    *,
+    run_key: Optional[str] = None,
+    db_path: str = DEFAULT_DB_PATH,
+    **kwargs: Any,
+) -> int:
+    """
+    Queue the run's payloads (chunks or digest, see results_payloads) in order;
+    returns how many were newly queued. `run_key` (e.g. "run:42") makes
+    re-enqueueing the same run a no-op even if the content differs.
+    """
+    payloads = results_payloads(results, **kwargs)
+    queued = 0
+    for i, payload in enumerate(payloads, start=1):
+        key = f"results:{run_key}:{i}/{len(payloads)}" if run_key else None
+        queued += enqueue_slack_payload(payload, idempotency_key=key, db_path=db_path)
+    return queued
+
+
+def _backoff(attempts: int) -> float:
+    delay = min(OUTBOX_BASE_DELAY_S * 2 ** (attempts - 1), OUTBOX_MAX_DELAY_S)
+    return delay * random.uniform(0.5, 1.0)
+
+
+def deliver_pending(
+    db_path: str = DEFAULT_DB_PATH,
+    *,
+    url: Optional[str] = None,
+    session: Optional[requests.Session] = None,
+    limit: int = 50,
+    max_attempts: int = OUTBOX_MAX_ATTEMPTS,
+    deadline: Optional[float] = None,
+) -> int:
+    """
+    One delivery pass: post due outbox rows oldest first and mark them sent,
+    or reschedule with exponential backoff (dead after max_attempts).
+    Messages go out strictly in queue order: a failing head blocks the rest until
+    it is sent or dead. With a `deadline` (time.monotonic()), nothing is claimed
+    after it and the post in flight gets at most the time left.
+    Returns the number sent.
+    """
+    url = url or os.getenv(SLACK_WEBHOOK_ENV)
+    if not url:
+        return 0
+    sent = 0
+
+    conn = connect(db_path)
+    try:
+        while sent < limit:
+            post_timeout = SLACK_POST_TIMEOUT_S
+            if deadline is not None:
+                post_timeout = min(post_timeout, deadline - time.monotonic())
+                if post_timeout <= 0:
+                    return sent
+            now = time.time()
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")  # claim atomically vs other workers
+                # strictly oldest first: if the head is backing off, everything waits
+                row = conn.execute(
+                    "SELECT id, idempotency_key, payload, attempts, next_attempt_at FROM slack_outbox "
+                    "WHERE status IN ('pending', 'sending') ORDER BY id LIMIT 1"
+                ).fetchone()
+                if row is None or row[4] > now:
+                    return sent
+                msg_id, key, payload, attempts, _ = row
+                conn.execute(
+                    "UPDATE slack_outbox SET status = 'sending', attempts = attempts + 1, "
+                    "next_attempt_at = ? WHERE id = ?",
+                    (now + OUTBOX_LEASE_S, msg_id),
+                )
+            attempts += 1
+
+            try:
+                _post(url, payload, session=session, headers={"Idempotency-Key": key}, timeout=post_timeout)
+            except Exception as e:
+                dead = attempts >= max_attempts
+                delay = _backoff(attempts)
+                resp = getattr(e, "response", None)
+                if resp is not None and resp.status_code == 429:
+                    delay = max(delay, float(resp.headers.get("Retry-After") or 1))
+                with conn:
+                    conn.execute(
+                        "UPDATE slack_outbox SET status = ?, next_attempt_at = ?, last_error = ? WHERE id = ?",
+                        ("dead" if dead else "pending", time.time() + delay, str(e)[:500], msg_id),
+                    )
+                log.log(
+                    logging.ERROR if dead else logging.WARNING,
+                    "Slack delivery of outbox #%s failed (attempt %s/%s): %s",
+                    msg_id, attempts, max_attempts, e,
+                )
+                return sent
+
+            with conn:
+                conn.execute(
+                    "UPDATE slack_outbox SET status = 'sent', sent_at = ?, last_error = NULL WHERE id = ?",
+                    (_now_iso(), msg_id),
+                )
+            sent += 1
+        return sent
+    finally:
+        conn.close()
+
+
+def flush_outbox(db_path: str = DEFAULT_DB_PATH, *, timeout: float = 15.0) -> int:
+    """Deliver what is due now, waiting out short backoffs, for at most `timeout` seconds."""
+    deadline = time.monotonic() + timeout
+    sent = 0
+    while time.monotonic() < deadline:
+        sent += deliver_pending(db_path, deadline=deadline)
+        conn = connect(db_path)
+        try:
+            row = conn.execute(
+                "SELECT MIN(next_attempt_at) FROM slack_outbox WHERE status IN ('pending', 'sending')"
+            ).fetchone()
+        finally:
+            conn.close()
+        if row[0] is None or not os.getenv(SLACK_WEBHOOK_ENV):
+            break
+        wait = row[0] - time.time()
+        if wait > deadline - time.monotonic():
+            break
+        time.sleep(max(wait, 0.0))
+    return sent
+
+
+class SlackOutboxWorker:
+    """
+    Background thread that keeps delivering the outbox (Streamlit / long-lived processes).
+    wake() after enqueueing to skip the poll wait.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH, *, poll_interval: float = OUTBOX_POLL_S) -> None:
+        self.db_path = db_path
+        self.poll_interval = poll_interval
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "SlackOutboxWorker":
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="slack-outbox", daemon=True)
+            self._thread.start()
+        return self
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                deliver_pending(self.db_path)
+            except Exception:
+                log.exception("Slack outbox worker pass failed")
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Deliver queued Slack messages")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH)
+    parser.add_argument("--once", action="store_true", help="deliver what is due and exit")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    if args.once:
+        print(f"Sent {flush_outbox(args.db)} message(s)")
         return
+    worker = SlackOutboxWorker(args.db).start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        worker.stop()
+
 
-    send_slack_message(text, username="Merlin VC Bot")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+# end-to-end streaming run: sourcing CSV -> Harmonic -> scores -> SQLite, in memory independent of the CSV size
+from __future__ import annotations
+
+import argparse
+import logging
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import ExitStack
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional
+
+from src.merlin.db import DEFAULT_DB_PATH
+from src.merlin.enrichment.fetch_harmonic_raw import RawJsonWriter
+from src.merlin.enrichment.http_metrics import HttpMetrics, RequestHook, metrics_path
+from src.merlin.ingestion import DEFAULT_CSV_PATH, iter_companies_from_csv
+from src.merlin.leaderboard import DEFAULT_TOP_K, TopKCollector
+from src.merlin.models import RawCompany
+from src.merlin.profiling import NULL_PROFILER, NullProfiler, Profiler, format_report, report_path
+from src.merlin.run_from_raw import score_rows
+
+log = logging.getLogger(__name__)
+
+ENRICH_CONCURRENCY = 4  # Harmonic requests in flight
+ENRICH_WINDOW = 64  # companies read ahead of the scorer (in flight + enriched, not yet scored)
+
+
+def _default_client_factory(**kwargs: Any) -> Any:
+    from src.merlin.enrichment.harmonic_graphql_client import HarmonicGraphQLClient
+
+    return HarmonicGraphQLClient(**kwargs)
+
+
+def enrich_rows(
+    companies: Iterable[RawCompany],
+    *,
+    client_factory: Callable[..., Any] = _default_client_factory,
+    hook: Optional[RequestHook] = None,
+    concurrency: int = ENRICH_CONCURRENCY,
+    window: int = ENRICH_WINDOW,
+) -> Iterator[Dict[str, Any]]:
+    """
+    {raw_company, harmonic_raw} rows (fetch_harmonic_raw's format) in input order,
+    enriched on `concurrency` threads with one client each. At most `window`
+    companies are read ahead, so a slow consumer pauses the CSV instead of
+    piling up results. Companies without a domain are skipped, and failed
+    requests yield harmonic_raw=None, as in fetch_harmonic_raw.
+    """
+    local = threading.local()
+
+    def fetch(rc: RawCompany) -> Dict[str, Any]:
+        client = getattr(local, "client", None)
+        if client is None:
+            client = local.client = client_factory(hook=hook)
+        domain = rc.domain.strip().lower()
+        try:
+            payload = client.enrich_company_by_domain(domain)
+        except Exception as e:
+            log.warning("Enriching %s failed: %s", domain, e)
+            payload = None
+        return {"raw_company": asdict(rc), "harmonic_raw": payload}
+
+    companies = (rc for rc in companies if rc.domain.strip())
+    if concurrency <= 1:
+        yield from map(fetch, companies)
+        return
+
+    pending: Deque[Future] = deque()
+    with ThreadPoolExecutor(concurrency, thread_name_prefix="enrich") as pool:
+        try:
+            for rc in companies:
+                pending.append(pool.submit(fetch, rc))
+                if len(pending) >= window:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            # consumer stopped early (error, close()): don't start what is still queued
+            for future in pending:
+                future.cancel()
+
+
+def _tee(rows: Iterable[Dict[str, Any]], out: RawJsonWriter) -> Iterator[Dict[str, Any]]:
+    for row in rows:
+        out.write(row)
+        yield row
+
+
+def run_pipeline(
+    csv_path: str,
+    db_path: str = DEFAULT_DB_PATH,
+    *,
+    client_factory: Callable[..., Any] = _default_client_factory,
+    hook: Optional[RequestHook] = None,
+    concurrency: int = ENRICH_CONCURRENCY,
+    window: int = ENRICH_WINDOW,
+    raw_out: Optional[str] = None,
+    notify: bool = True,
+    verbose: bool = True,
+    top_k: int = DEFAULT_TOP_K,
+    export_dir: Optional[str] = None,
+    profiler: Profiler | NullProfiler = NULL_PROFILER,
+) -> TopKCollector:
+    """
+    fetch_harmonic_raw + run_from_raw as one stream with bounded buffers:
+    CSV chunks (ingestion) -> `window` companies in enrichment -> scoring on this
+    thread -> ScoreSink's bounded batch queue -> SQLite. With `raw_out`, the
+    enriched rows are also written as a raw file for later `merlin score` runs.
+    """
+    rows = enrich_rows(
+        iter_companies_from_csv(csv_path),
+        client_factory=client_factory,
+        hook=hook,
+        concurrency=concurrency,
+        window=window,
+    )
+    with ExitStack() as stack:
+        if raw_out:
+            rows = _tee(rows, stack.enter_context(RawJsonWriter(raw_out)))
+        return score_rows(
+            rows,
+            db_path,
+            source=str(csv_path),
+            notify=notify,
+            verbose=verbose,
+            top_k=top_k,
+            export_dir=export_dir,
+            profiler=profiler,
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Enrich and score a sourcing CSV in one streaming pass")
+    parser.add_argument("csv", nargs="?", default=DEFAULT_CSV_PATH)
+    parser.add_argument("--db", default=DEFAULT_DB_PATH)
+    parser.add_argument("--top-k", type=int, default=DEFAULT_TOP_K, help="leaderboard size")
+    parser.add_argument("--concurrency", type=int, default=ENRICH_CONCURRENCY, help="Harmonic requests in flight")
+    parser.add_argument("--window", type=int, default=ENRICH_WINDOW, help="companies read ahead of scoring")
+    parser.add_argument("--raw-out", default=None, help="also write the enriched rows as a raw file for `merlin score`")
+    parser.add_argument("--export-dir", default=None, help="also export the run to partitioned Parquet")
+    parser.add_argument("--no-notify", action="store_true", help="skip Slack alerts for this run")
+    parser.add_argument(
+        "--flush-timeout",
+        type=float,
+        default=0.0,
+        help="seconds to spend delivering queued Slack alerts before exit "
+        "(default 0: leave them to `merlin notify` or a running outbox worker)",
+    )
+    parser.add_argument("--profile", action="store_true", help="write a per-stage run report next to the DB")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    profiler: Profiler | NullProfiler = Profiler("pipeline") if args.profile else NULL_PROFILER
+    http_metrics = HttpMetrics()
+
+    run_pipeline(
+        args.csv,
+        args.db,
+        hook=http_metrics,
+        concurrency=args.concurrency,
+        window=args.window,
+        raw_out=args.raw_out,
+        notify=not args.no_notify,
+        top_k=args.top_k,
+        export_dir=args.export_dir,
+        profiler=profiler,
+    )
+    if not args.no_notify and args.flush_timeout > 0:
+        from src.merlin.notify import flush_outbox
+
+        flush_outbox(args.db, timeout=args.flush_timeout)
+
+    print("\nHTTP:")
+    print(http_metrics.format_summary())
+    print(f"Metrics: {http_metrics.write_prometheus(metrics_path('pipeline', args.db))}")
+    if args.raw_out:
+        print(f"Raw responses: {Path(args.raw_out)}")
+    if profiler.enabled:
+        profiler.meta["http"] = http_metrics.summary()
+        path = profiler.save(report_path(args.db, "pipeline", profiler.meta.get("run_id")))
+        print(format_report(profiler.report()))
+        print(f"Profile report: {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+# opt-in pipeline profiling: per-stage wall/CPU time, per-item latency histograms, allocations, cProfile
+from __future__ import annotations
+
+import cProfile
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, ContextManager, Dict, Iterator, List, Optional
+
+from src.merlin.db import DEFAULT_DB_PATH
+
+_MB = 1024 * 1024
+
+
+class LatencyHistogram:
+    """
+    Per-item latencies in power-of-two nanosecond buckets: constant memory and
+    one int op per sample; percentiles are bucket upper bounds (within 2x).
+    Works for any non-negative int sample (http_metrics also keeps byte sizes).
+    Not thread-safe: give each thread its own stage name.
+    """
+    __slots__ = ("buckets", "count", "total_ns", "max_ns")
+
+    def __init__(self) -> None:
+        self.buckets = [0] * 64
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def add(self, ns: int) -> None:
+        self.buckets[ns.bit_length()] += 1
+        self.count += 1
+        self.total_ns += ns
+        if ns > self.max_ns:
+            self.max_ns = ns
+
+    def percentile(self, q: float) -> int:
+        """Upper bound of the bucket holding the q-quantile, in sample units."""
+        target = q * self.count
+        seen = 0
+        for b, n in enumerate(self.buckets):
+            seen += n
+            if n and seen >= target:
+                return min(2 ** b, self.max_ns)
+        return self.max_ns
+
+    def percentile_us(self, q: float) -> float:
+        return self.percentile(q) / 1000.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        if not self.count:
+            return {"count": 0}
+        return {
+            "count": self.count,
+            "total_s": self.total_ns / 1e9,
+            "mean_us": self.total_ns / self.count / 1000.0,
+            "p50_us": self.percentile_us(0.50),
+            "p90_us": self.percentile_us(0.90),
+            "p99_us": self.percentile_us(0.99),
+            "max_us": self.max_ns / 1000.0,
+            # "<= 2^b ns" bucket upper bound (us) -> samples
+            "buckets": {f"{2 ** b / 1000.0:g}": n for b, n in enumerate(self.buckets) if n},
+        }
+
+
+class Profiler:
+    """
+    Collects a structured run report.
+
+        prof = Profiler("run_from_raw", memory=True)
+        with prof.stage("load_json"):
+            ...
+        t0 = prof.clock(); work(); prof.observe("build_features", t0)
+        prof.save(report_path(db_path, "run_from_raw", run_id))
+
+    memory: tracemalloc snapshot at every stage boundary (allocation deltas, top sites)
+    cprofile: cProfile the whole run; dumped as a .prof next to the report
+    """
+    enabled = True
+    clock = staticmethod(time.perf_counter_ns)
+
+    def __init__(self, name: str, *, memory: bool = False, cprofile: bool = False) -> None:
+        self.name = name
+        self.memory = memory
+        self.started_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        self.stages: List[Dict[str, Any]] = []
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self.counters: Dict[str, int] = {}
+        self.meta: Dict[str, Any] = {}
+        self._wall0 = time.perf_counter()
+        self._cpu0 = time.process_time()
+        self._snapshot: Optional[tracemalloc.Snapshot] = None
+        if memory:
+            tracemalloc.start()
+            self._snapshot = self._take_snapshot()
+        self._cprofile = cProfile.Profile() if cprofile else None
+        if self._cprofile is not None:
+            self._cprofile.enable()
+
+    # --- Recording ---
+    def observe(self, stage: str, t0_ns: int) -> None:
+        """One item of a per-item stage, started at t0_ns = self.clock()."""
+        h = self.histograms.get(stage)
+        if h is None:
+            h = self.histograms[stage] = LatencyHistogram()
+        h.add(time.perf_counter_ns() - t0_ns)
+
+    def count(self, name: str, n: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        wall0, cpu0 = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            entry: Dict[str, Any] = {
+                "stage": name,
+                "wall_s": time.perf_counter() - wall0,
+                "cpu_s": time.process_time() - cpu0,  # all threads
+            }
+            if self.memory:
+                entry.update(self._memory_delta())
+            self.stages.append(entry)
+
+    @staticmethod
+    def _take_snapshot() -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces(
+            (tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__))
+        )
+
+    def _memory_delta(self) -> Dict[str, Any]:
+        snapshot = self._take_snapshot()
+        diff = snapshot.compare_to(self._snapshot, "lineno")
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        self._snapshot = snapshot
+        return {
+            "alloc_mb": sum(d.size_diff for d in diff) / _MB,
+            "alloc_blocks": sum(d.count_diff for d in diff),
+            "traced_mb": current / _MB,
+            "peak_mb": peak / _MB,  # high-water mark during the stage
+            "top_allocations": [str(d) for d in diff[:5]],
+        }
+
+    # --- Output ---
+    def report(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "started_at": self.started_at,
+            "wall_s": time.perf_counter() - self._wall0,
+            "cpu_s": time.process_time() - self._cpu0,
+            "meta": self.meta,
+            "stages": self.stages,
+            "per_item": {k: h.to_dict() for k, h in self.histograms.items()},
+            "counters": self.counters,
+        }
+
+    def save(self, path: str | Path) -> Path:
+        """Stop collectors and write the JSON report (and <name>.prof with cprofile)."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            prof_path = path.with_suffix(".prof")
+            self._cprofile.dump_stats(prof_path)
+            self.meta["cprofile"] = str(prof_path)
+        report = self.report()
+        if self.memory:
+            tracemalloc.stop()
+        path.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+        return path
+
+
+class NullProfiler:
+    """Profiler API as no-ops (the default): a few ns per call on the hot path."""
+    enabled = False
+
+    @staticmethod
+    def clock() -> int:
+        return 0
+
+    def observe(self, stage: str, t0_ns: int) -> None:
+        pass
+
+    def count(self, name: str, n: int = 1) -> None:
+        pass
+
+    def stage(self, name: str) -> ContextManager[None]:
+        return nullcontext()
+
+
+NULL_PROFILER = NullProfiler()
+
+
+def report_path(db_path: str = DEFAULT_DB_PATH, name: str = "run", run_id: Optional[int] = None) -> Path:
+    """data/profiles/<name>-<run id or timestamp>.json, next to the DB."""
+    suffix = str(run_id) if run_id is not None else datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    return Path(db_path).parent / "profiles" / f"{name}-{suffix}.json"
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """Short human summary of a report (stages, then per-item latency)."""
+    lines = [f"{report['name']}: {report['wall_s']:.2f}s wall, {report['cpu_s']:.2f}s CPU"]
+    for s in report["stages"]:
+        mem = f"  {s['alloc_mb']:+8.1f} MB" if "alloc_mb" in s else ""
+        lines.append(f"  {s['stage']:28} {s['wall_s']:8.3f}s wall {s['cpu_s']:8.3f}s cpu{mem}")
+    for name, h in report["per_item"].items():
+        if h["count"]:
+            lines.append(
+                f"  {name:28} n={h['count']:<9,} p50 {h['p50_us']:8.1f}us  p99 {h['p99_us']:8.1f}us  "
+                f"total {h['total_s']:.3f}s"
+            )
+    return "\n".join(lines)
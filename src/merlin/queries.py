@@ -0,0 +1,365 @@
+# read helpers over the normalized tables and search index (index lookups, no JSON parsing in Python)
+from __future__ import annotations
+
+import json
+import re
+import sqlite3
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from src.merlin.db import DEFAULT_DB_PATH, TAG_COLUMNS, connect, fetch_dicts
+
+# columns returned for every company match, best score first
+_COMPANY_SELECT = """
+    SELECT c.company_key, c.company_name, c.website_url, c.harmonic_stage,
+           c.score_team, c.score_market, c.score_funding, c.score_total
+    FROM companies AS c
+"""
+
+
+def companies_by_investor(
+    investor: str,
+    db_path: str = DEFAULT_DB_PATH,
+    limit: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """Companies backed by `investor` (exact name, case-insensitive)."""
+    sql = _COMPANY_SELECT + """
+        JOIN company_investors AS i ON i.company_key = c.company_key
+        WHERE i.investor = ?
+        ORDER BY c.score_total DESC
+        LIMIT ?
+    """
+    return fetch_dicts(db_path, sql, (investor, -1 if limit is None else limit))
+
+
+def companies_by_tag(
+    tag: str,
+    tag_type: Optional[str] = None,
+    db_path: str = DEFAULT_DB_PATH,
+    limit: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Companies carrying `tag` (case-insensitive). tag_type narrows it to one source
+    column, e.g. "market_sub_vertical" or "industry" (see db.TAG_COLUMNS).
+    """
+    if tag_type is not None and tag_type not in TAG_COLUMNS.values():
+        raise ValueError(f"unknown tag_type {tag_type!r}; expected one of {sorted(TAG_COLUMNS.values())}")
+
+    sql = _COMPANY_SELECT + """
+        WHERE c.company_key IN (
+            SELECT company_key FROM company_tags
+            WHERE tag = ? AND (? IS NULL OR tag_type = ?)
+        )
+        ORDER BY c.score_total DESC
+        LIMIT ?
+    """
+    return fetch_dicts(db_path, sql, (tag, tag_type, tag_type, -1 if limit is None else limit))
+
+
+def companies_by_founder_highlight(
+    category: str,
+    db_path: str = DEFAULT_DB_PATH,
+    limit: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """Companies with at least one founder highlight of `category` (e.g. "Prior Exit")."""
+    sql = _COMPANY_SELECT + """
+        WHERE c.company_key IN (
+            SELECT company_key FROM founder_highlights WHERE category = ?
+        )
+        ORDER BY c.score_total DESC
+        LIMIT ?
+    """
+    return fetch_dicts(db_path, sql, (category, -1 if limit is None else limit))
+
+
+def companies_by_founder(
+    name: str,
+    db_path: str = DEFAULT_DB_PATH,
+    limit: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """Companies with a founder called `name` (exact, case-insensitive)."""
+    sql = _COMPANY_SELECT + """
+        WHERE c.company_key IN (SELECT company_key FROM founders WHERE name = ?)
+        ORDER BY c.score_total DESC
+        LIMIT ?
+    """
+    return fetch_dicts(db_path, sql, (name, -1 if limit is None else limit))
+
+
+def founders_of(company_key: str, db_path: str = DEFAULT_DB_PATH) -> List[Dict[str, Any]]:
+    """Founders of one company, with their highlights as a list of {category, text}."""
+    conn = connect(db_path)
+    conn.row_factory = sqlite3.Row
+    try:
+        founders = [
+            dict(r, emails=json.loads(r["emails"] or "[]"), highlights=[])
+            for r in conn.execute(
+                "SELECT founder_idx, name, title, linkedin_url, emails FROM founders "
+                "WHERE company_key = ? ORDER BY founder_idx",
+                (company_key,),
+            )
+        ]
+        by_idx = {f["founder_idx"]: f for f in founders}
+        for r in conn.execute(
+            "SELECT founder_idx, category, text FROM founder_highlights "
+            "WHERE company_key = ? ORDER BY founder_idx, highlight_idx",
+            (company_key,),
+        ):
+            by_idx[r["founder_idx"]]["highlights"].append({"category": r["category"], "text": r["text"]})
+        return founders
+    finally:
+        conn.close()
+
+
+def top_investors(db_path: str = DEFAULT_DB_PATH, limit: int = 25) -> List[Dict[str, Any]]:
+    """Investors by number of portfolio companies in the DB, with their mean score."""
+    sql = """
+        SELECT i.investor, COUNT(*) AS companies, AVG(c.score_total) AS mean_score
+        FROM company_investors AS i
+        JOIN companies AS c ON c.company_key = i.company_key
+        GROUP BY i.investor
+        ORDER BY companies DESC, mean_score DESC
+        LIMIT ?
+    """
+    return fetch_dicts(db_path, sql, (limit,))
+
+
+# --- App read path ---
+def latest_run(db_path: str = DEFAULT_DB_PATH) -> Optional[Dict[str, Any]]:
+    """Latest finished run (run_id, started_at, finished_at, companies, ...), or None."""
+    rows = fetch_dicts(
+        db_path, "SELECT * FROM runs WHERE status = 'done' ORDER BY run_id DESC LIMIT 1"
+    )
+    return rows[0] if rows else None
+
+
+SORT_COLUMNS = ("score_total", "score_team", "score_market", "score_funding")
+
+# Cursor for keyset pagination: (sort value, rowid) of the last row of a page
+Cursor = Tuple[float, int]
+
+# founders flattened for display; PK lookups per returned row
+_BROWSE_SELECT = """
+    SELECT c.rowid AS row_id, c.company_key, c.company_name, c.website_url, c.harmonic_stage,
+           c.location, c.description,
+           (SELECT group_concat(f.name, ', ') FROM founders AS f
+            WHERE f.company_key = c.company_key) AS founders,
+           (SELECT group_concat(f.linkedin_url, ', ') FROM founders AS f
+            WHERE f.company_key = c.company_key AND f.linkedin_url <> '') AS founder_linkedin,
+           (SELECT group_concat(e.value, ', ') FROM founders AS f, json_each(f.emails) AS e
+            WHERE f.company_key = c.company_key) AS founder_emails,
+           c.score_total, c.score_team, c.score_market, c.score_funding{features}
+    FROM companies AS c
+"""
+
+
+def _filters(
+    sectors: Optional[Sequence[str]],
+    stages: Optional[Sequence[str]],
+    location: Optional[str],
+    min_score: Optional[float],
+    max_score: Optional[float],
+    founder_signals: Optional[Sequence[str]],
+) -> Tuple[List[str], List[Any]]:
+    where: List[str] = []
+    params: List[Any] = []
+    if sectors:
+        where.append(
+            "EXISTS (SELECT 1 FROM company_tags AS t WHERE t.company_key = c.company_key "
+            f"AND t.tag_type = 'market_vertical' AND t.tag IN ({', '.join('?' * len(sectors))}))"
+        )
+        params += sectors
+    if stages:
+        where.append(f"c.harmonic_stage IN ({', '.join('?' * len(stages))})")
+        params += stages
+    if location:
+        where.append("instr(lower(c.location), lower(?)) > 0")
+        params.append(location)
+    if min_score is not None:
+        where.append("c.score_total >= ?")
+        params.append(min_score)
+    if max_score is not None:
+        where.append("c.score_total <= ?")
+        params.append(max_score)
+    for category in founder_signals or ():  # every selected signal required
+        where.append(
+            "EXISTS (SELECT 1 FROM founder_highlights AS fh "
+            "WHERE fh.company_key = c.company_key AND fh.category = ?)"
+        )
+        params.append(category)
+    return where, params
+
+
+def browse_companies(
+    db_path: str = DEFAULT_DB_PATH,
+    *,
+    sectors: Optional[Sequence[str]] = None,
+    stages: Optional[Sequence[str]] = None,
+    location: Optional[str] = None,
+    min_score: Optional[float] = None,
+    max_score: Optional[float] = None,
+    founder_signals: Optional[Sequence[str]] = None,
+    sort: str = "score_total",
+    descending: bool = True,
+    limit: int = 50,
+    after: Optional[Cursor] = None,
+    with_features: bool = False,
+) -> Dict[str, Any]:
+    """
+    One page of companies, filtered and sorted in SQLite.
+
+    sectors: any of these market verticals; stages: harmonic_stage in these;
+    location: substring (case-insensitive); founder_signals: founder highlight
+    categories, all required (e.g. ["Prior Exit", "YC Backed Founder"]).
+
+    Keyset pagination: pass the previous page's `next` as `after`. Pages walk
+    the sort column's index, so page N costs the same as page 1.
+    Returns {"rows": [...], "next": cursor or None}.
+    """
+    if sort not in SORT_COLUMNS:
+        raise ValueError(f"unknown sort {sort!r}; expected one of {SORT_COLUMNS}")
+
+    where, params = _filters(sectors, stages, location, min_score, max_score, founder_signals)
+    # ties broken by rowid, the index's implicit last column (ascending), so
+    # DESC pages read the index forward and ASC pages read it backward
+    if descending:
+        order = f"c.{sort} DESC, c.rowid ASC"
+        if after is not None:
+            where.append(f"c.{sort} <= ? AND (c.{sort} < ? OR c.rowid > ?)")
+    else:
+        order = f"c.{sort} ASC, c.rowid DESC"
+        if after is not None:
+            where.append(f"c.{sort} >= ? AND (c.{sort} > ? OR c.rowid < ?)")
+    if after is not None:
+        params += [after[0], after[0], after[1]]
+
+    sql = _BROWSE_SELECT.format(features=", c.features" if with_features else "")
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += f" ORDER BY {order} LIMIT ?"
+    rows = fetch_dicts(db_path, sql, (*params, limit + 1))
+
+    more = len(rows) > limit
+    rows = rows[:limit]
+    cursor = (rows[-1][sort], rows[-1]["row_id"]) if more else None
+    for r in rows:
+        del r["row_id"]
+        if with_features:
+            r["features"] = json.loads(r["features"] or "{}")
+    return {"rows": rows, "next": cursor}
+
+
+def count_companies(
+    db_path: str = DEFAULT_DB_PATH,
+    *,
+    sectors: Optional[Sequence[str]] = None,
+    stages: Optional[Sequence[str]] = None,
+    location: Optional[str] = None,
+    min_score: Optional[float] = None,
+    max_score: Optional[float] = None,
+    founder_signals: Optional[Sequence[str]] = None,
+    cap: Optional[int] = None,
+) -> int:
+    """
+    Number of companies matching the browse_companies filters. With `cap`,
+    counting stops there (a filtered count otherwise visits every match).
+    """
+    where, params = _filters(sectors, stages, location, min_score, max_score, founder_signals)
+    sql = "SELECT 1 FROM companies AS c"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    if cap is not None:
+        sql += " LIMIT ?"
+        params.append(cap)
+    return fetch_dicts(db_path, f"SELECT COUNT(*) AS n FROM ({sql})", params)[0]["n"]
+
+
+def _distinct_values(db_path: str, table: str, column: str, keep: str = "1") -> List[str]:
+    """
+    DISTINCT via a loose index scan: one index seek per distinct value instead of
+    a full index scan, so it stays ~ms however many rows share each value.
+    `keep` is an SQL condition on `value`.
+    """
+    sql = f"""
+        WITH RECURSIVE v(value) AS (
+            SELECT MIN({column}) FROM {table} WHERE {column} > ''
+            UNION ALL
+            SELECT (SELECT MIN({column}) FROM {table} WHERE {column} > v.value)
+            FROM v WHERE v.value IS NOT NULL
+        )
+        SELECT value FROM v WHERE value IS NOT NULL AND ({keep})
+    """
+    return [r["value"] for r in fetch_dicts(db_path, sql)]
+
+
+def filter_options(db_path: str = DEFAULT_DB_PATH) -> Dict[str, List[str]]:
+    """Values for the browse filters: sectors, stages and founder signals present in the DB."""
+    return {
+        "sectors": _distinct_values(
+            db_path,
+            "company_tags",
+            "tag",
+            keep="EXISTS (SELECT 1 FROM company_tags WHERE tag = value AND tag_type = 'market_vertical')",
+        ),
+        "stages": _distinct_values(db_path, "companies", "harmonic_stage"),
+        "founder_signals": _distinct_values(db_path, "founder_highlights", "category"),
+    }
+
+
+# --- Full-text search ---
+DEFAULT_SCORE_BOOST = 0.5  # a 100-point company ranks 1.5x a 0-point one at equal relevance
+
+_TOKEN = re.compile(r'[^\s"]+')
+
+
+def fts_query(text: str) -> str:
+    """
+    Free text -> safe FTS5 query: every word quoted (so AND/OR/NEAR/-/: in user
+    input are plain words), all words required, a trailing * keeps prefix search.
+    "construction lend*" -> '"construction" "lend"*'
+    """
+    terms = []
+    for tok in _TOKEN.findall(text):
+        prefix = tok.endswith("*")
+        tok = tok.rstrip("*")
+        if tok:
+            terms.append(f'"{tok}"*' if prefix else f'"{tok}"')
+    return " ".join(terms)
+
+
+def search_companies(
+    text: str,
+    db_path: str = DEFAULT_DB_PATH,
+    limit: int = 20,
+    *,
+    score_boost: float = DEFAULT_SCORE_BOOST,
+    candidates: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Keyword search over name, description, highlights and founder highlights.
+
+    The best `candidates` matches by BM25 come straight from the FTS index
+    (ORDER BY rank LIMIT is index-assisted, so common words stay fast), then are
+    re-ranked by relevance * (1 + score_boost * score_total / 100).
+    """
+    query = fts_query(text)
+    if not query:
+        return []
+    candidates = candidates or max(limit * 10, 200)
+
+    sql = """
+        WITH hits AS (
+            SELECT rowid, -rank AS relevance,
+                   snippet(company_search, -1, '[', ']', '...', 12) AS snippet
+            FROM company_search
+            WHERE company_search MATCH ?
+            ORDER BY rank
+            LIMIT ?
+        )
+        SELECT c.company_key, c.company_name, c.website_url, c.harmonic_stage,
+               c.score_total, h.relevance, h.snippet
+        FROM hits AS h
+        JOIN companies AS c ON c.rowid = h.rowid
+        ORDER BY h.relevance * (1 + ? * COALESCE(c.score_total, 0) / 100.0) DESC
+        LIMIT ?
+    """
+    return fetch_dicts(db_path, sql, (query, candidates, score_boost, limit))
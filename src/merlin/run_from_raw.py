@@ -1,42 +1,150 @@
 # run pipeline from raw sqlgraph output to final. This avoids having to requery Harmonic API 
 from __future__ import annotations
 
+import argparse
 import json
+import re
 from pathlib import Path
-from typing import List
+from typing import Any, Dict, Iterable, Iterator, List, Optional
 
+from src.merlin.db import DEFAULT_DB_PATH
 from src.merlin.models import (
     RawCompany,
     HarmonicEnrichment,
-    ScoredCompanyRecord,
 )
 from src.merlin.enrichment.harmonic import map_company_to_harmonic_enrichment
 from src.merlin.scoring.calculate_score import process_company
-from src.merlin.save_to_db import scored_companies_to_df, save_scores_to_db
-from src.merlin.notify import send_results_to_slack
+from src.merlin.scoring.attribution import AttributionMatrix, AttributionSink
+from src.merlin.leaderboard import DEFAULT_TOP_K, TopKCollector, format_leaderboard
+from src.merlin.history import finish_run, start_run
+from src.merlin.alerts import mark_notified, pending_alerts
+from src.merlin.keys import canonical_domain
+from src.merlin.save_to_db import ScoreSink
+from src.merlin.scoring.config import current_scoring
+from src.merlin.notify import SLACK_SCORE_THRESHOLD, enqueue_results_to_slack, flush_outbox
+from src.merlin.profiling import NULL_PROFILER, NullProfiler, Profiler, format_report, report_path
+from src.merlin.sharding import Shard, shard_arg
 from dotenv import load_dotenv
 
 load_dotenv()
 
+DEFAULT_RAW_PATH = Path("outputs/harmonic_raw_graphql_final.json")
+RAW_READ_CHARS = 1 << 16
 
-def load_raw_harmonic(path: Path) -> List[dict]:
+_BETWEEN_ROWS = re.compile(r"[\s,]*")
+
+
+def iter_raw_harmonic(path: Path) -> Iterator[dict]:
+    """
+    The raw fetch output (a JSON array of rows) one row at a time: the array is decoded
+    incrementally from fixed-size reads, so memory holds a row and a read buffer
+    however big the file is.
+    """
+    decode = json.JSONDecoder().raw_decode
     with path.open("r", encoding="utf-8") as f:
-        return json.load(f)           
+        buf, pos, eof = "", 0, False
+
+        def fill() -> None:
+            nonlocal buf, pos, eof
+            chunk = f.read(RAW_READ_CHARS)
+            eof = not chunk
+            buf, pos = buf[pos:] + chunk, 0
+
+        while not eof and not buf.strip():
+            fill()
+        if not buf.lstrip().startswith("["):
+            raise ValueError(f"{path}: expected a JSON array of rows")
+        pos = buf.index("[") + 1
 
-def main() -> None:
-    in_path = Path("outputs/harmonic_raw_graphql_final.json")
+        while True:
+            pos = _BETWEEN_ROWS.match(buf, pos).end()
+            if pos == len(buf):
+                if eof:
+                    raise ValueError(f"{path}: unterminated JSON array")
+                fill()
+                continue
+            if buf[pos] == "]":
+                return
+            try:
+                row, pos = decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                fill()  # row cut off by the read; retry with more
+                continue
+            yield row
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Score a raw Harmonic file into the DB")
+    parser.add_argument("--raw", type=Path, default=DEFAULT_RAW_PATH, help="fetch_harmonic_raw output")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH)
+    parser.add_argument("--top-k", type=int, default=DEFAULT_TOP_K, help="leaderboard size")
+    parser.add_argument("--export-dir", default=None, help="also export the run to partitioned Parquet")
+    parser.add_argument("--no-notify", action="store_true", help="skip Slack alerts for this run")
+    parser.add_argument(
+        "--flush-timeout",
+        type=float,
+        default=0.0,
+        help="seconds to spend delivering queued Slack alerts before exit "
+        "(default 0: leave them to `merlin notify` or a running outbox worker)",
+    )
+    parser.add_argument("--profile", action="store_true", help="write a per-stage run report next to the DB")
+    parser.add_argument("--profile-memory", action="store_true", help="add tracemalloc snapshots (slow)")
+    parser.add_argument("--cprofile", action="store_true", help="add a cProfile dump (slow)")
+    parser.add_argument(
+        "--shard",
+        type=shard_arg,
+        default=None,
+        help="i/N: score only this node's companies into <db>.shard-i-of-N.db (no alerts); "
+        "combine with `merlin shard merge`",
+    )
+    args = parser.parse_args(argv)
+    db_path = args.db if args.shard is None else str(args.shard.path(args.db))
+    notify = not args.no_notify and args.shard is None  # alerts need the global picture
+
+    in_path = args.raw
     if not in_path.is_file():
         raise SystemExit(
             f"Input file not found: {in_path}. "
             "Run your Harmonic fetch step first to create harmonic_raw_graphql.json."
         )
 
-    data = load_raw_harmonic(in_path)
-    results: list[ScoredCompanyRecord] = []
+    profiler: Profiler | NullProfiler = NULL_PROFILER
+    if args.profile or args.profile_memory or args.cprofile:
+        profiler = Profiler("run_from_raw", memory=args.profile_memory, cprofile=args.cprofile)
+
+    run_from_raw(
+        in_path,
+        db_path,
+        notify=notify,
+        top_k=args.top_k,
+        export_dir=args.export_dir,
+        profiler=profiler,
+        shard=args.shard,
+    )
+    if notify and args.flush_timeout > 0:
+        # opt-in best-effort delivery before exit; anything left is retried by
+        # `merlin notify` or the outbox worker, never by blocking the run
+        with profiler.stage("slack_flush"):
+            flush_outbox(db_path, timeout=args.flush_timeout)
 
-    #names_to_debug = {"Barker", "Dill", "Tesser"}  
+    if profiler.enabled:
+        path = profiler.save(report_path(db_path, "run_from_raw", profiler.meta.get("run_id")))
+        print(format_report(profiler.report()))
+        print(f"Profile report: {path}")
 
-    for row in data:
+
+def _score_into(
+    data: Iterable[Dict[str, Any]],
+    sink: ScoreSink,
+    leaderboard: TopKCollector,
+    attribution: AttributionMatrix,
+    profiler: Profiler | NullProfiler = NULL_PROFILER,
+) -> int:
+    """Score rows as they arrive; nothing is kept per row. Returns the rows read."""
+    clock, observe = profiler.clock, profiler.observe
+    n = 0
+    for n, row in enumerate(data, start=1):
         raw_company_dict = row.get("raw_company") or {}
         harmonic_raw = row.get("harmonic_raw")
 
@@ -50,37 +158,126 @@ def main() -> None:
             and harmonic_raw.get("company") is not None
         ):
             company_json = harmonic_raw["company"]
+            t0 = clock()
             he: HarmonicEnrichment = map_company_to_harmonic_enrichment(company_json)
+            observe("map_enrichment", t0)
         else:
             # No enrichment; skip companies without Harmonic data
+            profiler.count("skipped_no_enrichment")
             continue
 
-        scored = process_company(rc, he)
+        scored = process_company(rc, he, attribution, profiler)
 
-        results.append(scored)
+        t0 = clock()
+        leaderboard.add(scored)
+        observe("leaderboard_add", t0)
+        t0 = clock()
+        sink.add(scored)
+        observe("sink_add", t0)
+    return n
 
-    # Sort by total score descending
-    results.sort(key=lambda r: r.scores.total, reverse=True)
 
-    leaderboard_lines = []
-    leaderboard_lines.append("\n=== Company Leaderboard (from harmonic_raw_graphql.json) ===")
+def notify_changes(leaderboard: TopKCollector, run_id: int, db_path: str) -> None:
+    """Queue only high scorers that are new or materially changed since their last alert."""
+    alerts = {a["company_key"]: a for a in pending_alerts(db_path, run_id=run_id)}
+    hits = [r for r in leaderboard.threshold_hits() if canonical_domain(r.website_domain) in alerts]
+    if hits:
+        notes = {key: ", ".join(a["reasons"]) for key, a in alerts.items()}
+        # queued in the DB outbox; delivery (with retries) never blocks the run
+        enqueue_results_to_slack(hits, run_key=f"run:{run_id}", db_path=db_path, notes=notes)
+    mark_notified((alerts[canonical_domain(r.website_domain)] for r in hits), db_path, run_id=run_id)
 
-    for r in results:
-        line = (
-            f"{r.name:30} "
-            f"Total: {r.scores.total:6.2f}  "
-            f"(Team: {r.scores.team:6.2f}, Market: {r.scores.market:6.2f}, Funding: {r.scores.funding:6.2f})"
-        )
-        leaderboard_lines.append(line)
 
-    leaderboard_text = "\n".join(leaderboard_lines)
-    print(leaderboard_text)
+def run_from_raw(
+    in_path: Path,
+    db_path: str = DEFAULT_DB_PATH,
+    *,
+    notify: bool = True,
+    verbose: bool = True,
+    top_k: int = DEFAULT_TOP_K,
+    export_dir: Optional[str] = None,
+    profiler: Profiler | NullProfiler = NULL_PROFILER,
+    shard: Optional[Shard] = None,
+) -> TopKCollector:
+    """
+    raw Harmonic file -> scores -> leaderboard / Slack / SQLite.
+    `notify=False, verbose=False` gives an offline, quiet run (benchmarks).
+    With `export_dir`, the run is also written to partitioned Parquet (export.py).
+    Pass a profiling.Profiler to record per-stage timings (the caller saves it).
+    With `shard`, only rows whose sourced domain hashes to it are scored (sharding.py).
+    """
+    rows = iter_raw_harmonic(in_path)
+    if shard is not None:
+        rows = (row for row in rows if shard.owns((row.get("raw_company") or {}).get("domain")))
+    return score_rows(
+        rows,
+        db_path,
+        source=str(in_path) if shard is None else f"{in_path} shard {shard}",
+        notify=notify,
+        verbose=verbose,
+        top_k=top_k,
+        export_dir=export_dir,
+        profiler=profiler,
+    )
+
+
+def score_rows(
+    rows: Iterable[Dict[str, Any]],
+    db_path: str = DEFAULT_DB_PATH,
+    *,
+    source: str,
+    notify: bool = True,
+    verbose: bool = True,
+    top_k: int = DEFAULT_TOP_K,
+    export_dir: Optional[str] = None,
+    profiler: Profiler | NullProfiler = NULL_PROFILER,
+) -> TopKCollector:
+    """
+    Score rows in fetch_harmonic_raw's format ({raw_company, harmonic_raw}) as one
+    run, consuming `rows` lazily. Memory does not grow with the number of rows:
+    only the top K (plus Slack threshold hits when notifying) are kept as
+    records; scores stream to SQLite in a writer thread (`companies` and this
+    run's score_history snapshot) and attributions in batches (AttributionSink).
+    Both are merged by company key, so a run over part of the companies (a
+    partial raw file, an inbox drop) leaves everyone else's scores and
+    attributions in place.
+    """
+    leaderboard = TopKCollector(k=top_k, threshold=SLACK_SCORE_THRESHOLD if notify else None)
+    with profiler.stage("start_run"):
+        run_id = start_run(db_path, source=source, scoring_version=current_scoring().version)
+
+    try:
+        with profiler.stage("score_and_persist"):
+            with ScoreSink(db_path, run_id=run_id, profiler=profiler) as sink, AttributionSink(db_path) as attribution:
+                n = _score_into(rows, sink, leaderboard, attribution, profiler)
+    except BaseException:
+        finish_run(run_id, db_path, status="failed")
+        raise
+    with profiler.stage("finish_run"):
+        finish_run(run_id, db_path, companies=sink.rows)
+    if profiler.enabled:
+        profiler.meta.update(run_id=run_id, source=source, db_path=db_path, rows=n)
+
+    if verbose:
+        print(format_leaderboard(
+            leaderboard,
+            f"\n=== Company Leaderboard (from {source}) ===",
+        ))
+
+    if notify:
+        with profiler.stage("notify_enqueue"):
+            notify_changes(leaderboard, run_id, db_path)
+    if verbose:
+        print(f"\nSaved scores to {db_path} (tables: companies, score_attributions)")
+    if export_dir:
+        from src.merlin.export import export_run  # pyarrow only needed when exporting
 
-    send_results_to_slack(results)
-    df = scored_companies_to_df(results)
-    save_scores_to_db(df)
-    print("\nSaved scores to data/merlin_scores.db (table: companies)")
+        with profiler.stage("export_parquet"):
+            export_run(run_id, db_path=db_path, out_dir=export_dir)
+        if verbose:
+            print(f"Exported run {run_id} to {export_dir}")
 
+    return leaderboard
 
 
 if __name__ == "__main__":
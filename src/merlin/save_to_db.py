@@ -1,162 +1,418 @@
 # script to save to sqlite database
-from typing import List
-import sqlite3
-import json
+from __future__ import annotations
 
-import pandas as pd
+from dataclasses import asdict
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from datetime import datetime, timezone
+import json
+import operator
+import queue
+import sqlite3
+import threading
 
+from src.merlin.db import DEFAULT_DB_PATH, checkpoint_wal, connect, sync_child_tables, sync_search_index
+from src.merlin.history import append_history
+from src.merlin.keys import canonical_domain
 from src.merlin.models import ScoredCompanyRecord, ScoreBreakdown
+from src.merlin.profiling import NULL_PROFILER, NullProfiler, Profiler
 
+if TYPE_CHECKING:
+    import pandas as pd
 
-def scored_companies_to_df(records: List[ScoredCompanyRecord]) -> pd.DataFrame:
-    rows = []
-
-    for r in records:
-        scores: ScoreBreakdown = r.scores
-        enrich = r.harmonic  # may be None
-
-        # --- founders ---
-        founders = r.founders or []
-        founder_names = [f.name for f in founders if getattr(f, "name", None)]
-        founder_linkedins = [
-            f.linkedin_url for f in founders if getattr(f, "linkedin_url", None)
-        ]
-
-        # flatten founder emails into a single list
-        all_emails: list[str] = []
-        for f in founders:
-            emails = getattr(f, "emails", None)
-            if emails:
-                all_emails.extend(emails)
-
-        row = {
-            # --- primary company info (requested order) ---
-            "company_name": r.name,
-            "website_url": r.website_url,
-            "sectors": ", ".join(r.sectors or []),
-            "location": r.location,
-            "funding_total": r.funding_total,
-
-            # from Harmonic
-            "customer_type": enrich.customer_type if enrich else None,
-
-            # --- founders (all as JSON lists) ---
-            "founder_name": json.dumps(founder_names),
-            "founder_linkedin": json.dumps(founder_linkedins),
-            "founder_email": json.dumps(all_emails),
-
-            # --- individual criteria scores + total ---
-            "score_team": scores.team,
-            "score_market": scores.market,
-            "score_funding": scores.funding,
-            "score_total": scores.total,
-
-            # --- Harmonic enrichment fields ---
-            "harmonic_id": enrich.harmonic_id if enrich else None,
-            "website_domain": enrich.website_domain if enrich else r.website_domain,
-            "harmonic_website_url": enrich.website_url if enrich else None,
-
-            "harmonic_stage": enrich.stage if enrich else None,
-            "harmonic_funding_total": enrich.funding_total if enrich else None,
-            "harmonic_num_funding_rounds": enrich.num_funding_rounds if enrich else None,
-            "harmonic_last_funding_at": enrich.last_funding_at if enrich else None,
-            "harmonic_investors": json.dumps(enrich.investors or []) if enrich else "[]",
-
-            "harmonic_headcount": enrich.headcount if enrich else None,
-            "founding_date": enrich.founding_date if enrich else None,
-            "founding_date_granularity": (
-                enrich.founding_date_granularity if enrich else None
-            ),
-            "location_raw": json.dumps(enrich.location) if (enrich and enrich.location) else None,
-
-            "tags": json.dumps(enrich.tags or []) if enrich else "[]",
-            "tags_v2": json.dumps(enrich.tags_v2 or []) if enrich else "[]",
-            "industries": json.dumps(enrich.industries or []) if enrich else "[]",
-            "market_verticals": json.dumps(enrich.market_verticals or []) if enrich else "[]",
-            "market_sub_verticals": json.dumps(enrich.market_sub_verticals or []) if enrich else "[]",
-            "technology_types": json.dumps(enrich.technology_types or []) if enrich else "[]",
-            "product_types": json.dumps(enrich.product_types or []) if enrich else "[]",
-
-            "highlight_categories": json.dumps(enrich.highlight_categories or []) if enrich else "[]",
-            "highlight_texts": json.dumps(enrich.highlight_texts or []) if enrich else "[]",
-            "founder_highlights": json.dumps(
-                [eh.__dict__ for eh in (enrich.employee_highlights or [])]
-            ) if enrich else "[]",
-
-            "traction_metrics": json.dumps(enrich.traction_metrics or {}) if enrich else "{}",
-            "advisor_headcount": enrich.advisor_headcount if enrich else None,
-            "web_traffic": json.dumps(enrich.web_traffic or {}) if enrich else "{}",
-            "likelihood_of_backing": enrich.likelihood_of_backing if enrich else None,
-
-            # --- everything else (non-Harmonic, for debugging) ---
-            "description": r.description,
-            "sub_sectors": ", ".join(r.sub_sectors or []),
-            "features": json.dumps(r.features),
-        }
-
-        rows.append(row)
+CORE_COLUMNS = [
+    "company_name",
+    "website_url",
+    "sectors",
+    "location",
+    "funding_total",
+    "customer_type",
+    "founder_name",
+    "founder_linkedin",
+    "founder_email",
+    "score_team",
+    "score_market",
+    "score_funding",
+    "score_total",
+]
 
-    df = pd.DataFrame(rows)
+HARMONIC_COLUMNS = [
+    "harmonic_id",
+    "website_domain",
+    "harmonic_website_url",
+    "harmonic_stage",
+    "harmonic_funding_total",
+    "harmonic_num_funding_rounds",
+    "harmonic_last_funding_at",
+    "harmonic_investors",
+    "harmonic_headcount",
+    "founding_date",
+    "founding_date_granularity",
+    "location_raw",
+    "tags",
+    "tags_v2",
+    "industries",
+    "market_verticals",
+    "market_sub_verticals",
+    "technology_types",
+    "product_types",
+    "highlight_categories",
+    "highlight_texts",
+    "founder_highlights",
+    "traction_metrics",
+    "advisor_headcount",
+    "web_traffic",
+    "likelihood_of_backing",
+]
 
-    core_cols = [
-        "company_name",
-        "website_url",
-        "sectors",
-        "location",
-        "funding_total",
-        "customer_type",
-        "founder_name",
-        "founder_linkedin",
-        "founder_email",
-        "score_team",
-        "score_market",
-        "score_funding",
-        "score_total",
-    ]
+EXTRA_COLUMNS = ["description", "sub_sectors", "features", "founders"]
+
+# column order of the `companies` table (see db.py), minus updated_at
+COMPANY_COLUMNS = ["company_key"] + CORE_COLUMNS + HARMONIC_COLUMNS + EXTRA_COLUMNS
+
+UPSERT_BATCH_SIZE = 10_000
+
+# compact separators, no circular-reference bookkeeping (rows are plain trees);
+# one shared encoder instead of json.dumps building a new one per non-default call
+_dumps = json.JSONEncoder(separators=(",", ":"), check_circular=False).encode
 
-    harmonic_cols = [
-        "harmonic_id",
-        "website_domain",
-        "harmonic_website_url",
-        "harmonic_stage",
-        "harmonic_funding_total",
-        "harmonic_num_funding_rounds",
-        "harmonic_last_funding_at",
-        "harmonic_investors",
-        "harmonic_headcount",
-        "founding_date",
-        "founding_date_granularity",
-        "location_raw",
-        "tags",
-        "tags_v2",
-        "industries",
-        "market_verticals",
-        "market_sub_verticals",
-        "technology_types",
-        "product_types",
-        "highlight_categories",
-        "highlight_texts",
-        "founder_highlights",
-        "traction_metrics",
-        "advisor_headcount",
-        "web_traffic",
-        "likelihood_of_backing",
+_row_values = operator.itemgetter(*COMPANY_COLUMNS)
+# (company_key, score_team, score_market, score_funding, score_total) out of a row tuple
+_history_values = operator.itemgetter(
+    *(COMPANY_COLUMNS.index(c) for c in ("company_key", "score_team", "score_market", "score_funding", "score_total"))
+)
+
+
+def scored_companies_to_df(records: Iterable[ScoredCompanyRecord]) -> pd.DataFrame:
+    return rows_to_df([scored_company_to_row(r) for r in records])
+
+
+def scored_company_to_row(r: ScoredCompanyRecord) -> Dict[str, Any]:
+    """
+    Flattens one ScoredCompanyRecord into a DB row (plain str/number values only).
+    The row holds no reference to the record, so callers can drop the record right after.
+    """
+    scores: ScoreBreakdown = r.scores
+    enrich = r.harmonic  # may be None
+
+    # --- founders ---
+    founders = r.founders or []
+    founder_names = [f.name for f in founders if getattr(f, "name", None)]
+    founder_linkedins = [
+        f.linkedin_url for f in founders if getattr(f, "linkedin_url", None)
     ]
 
-    ordered_cols = core_cols + harmonic_cols
+    # flatten founder emails into a single list
+    all_emails: list[str] = []
+    for f in founders:
+        emails = getattr(f, "emails", None)
+        if emails:
+            all_emails.extend(emails)
+
+    row = {
+        "company_key": canonical_domain(r.website_domain),
+
+        # --- primary company info (requested order) ---
+        "company_name": r.name,
+        "website_url": r.website_url,
+        "sectors": ", ".join(r.sectors or []),
+        "location": r.location,
+        "funding_total": r.funding_total,
+
+        # from Harmonic
+        "customer_type": enrich.customer_type if enrich else None,
+
+        # --- founders (all as JSON lists) ---
+        "founder_name": _dumps(founder_names),
+        "founder_linkedin": _dumps(founder_linkedins),
+        "founder_email": _dumps(all_emails),
+
+        # --- individual criteria scores + total ---
+        "score_team": scores.team,
+        "score_market": scores.market,
+        "score_funding": scores.funding,
+        "score_total": scores.total,
+
+        # --- Harmonic enrichment fields ---
+        "harmonic_id": enrich.harmonic_id if enrich else None,
+        "website_domain": enrich.website_domain if enrich else r.website_domain,
+        "harmonic_website_url": enrich.website_url if enrich else None,
+
+        "harmonic_stage": enrich.stage if enrich else None,
+        "harmonic_funding_total": enrich.funding_total if enrich else None,
+        "harmonic_num_funding_rounds": enrich.num_funding_rounds if enrich else None,
+        "harmonic_last_funding_at": enrich.last_funding_at if enrich else None,
+        "harmonic_investors": _dumps(enrich.investors or []) if enrich else "[]",
+
+        "harmonic_headcount": enrich.headcount if enrich else None,
+        "founding_date": enrich.founding_date if enrich else None,
+        "founding_date_granularity": (
+            enrich.founding_date_granularity if enrich else None
+        ),
+        "location_raw": _dumps(enrich.location) if (enrich and enrich.location) else None,
+
+        "tags": _dumps(enrich.tags or []) if enrich else "[]",
+        "tags_v2": _dumps(enrich.tags_v2 or []) if enrich else "[]",
+        "industries": _dumps(enrich.industries or []) if enrich else "[]",
+        "market_verticals": _dumps(enrich.market_verticals or []) if enrich else "[]",
+        "market_sub_verticals": _dumps(enrich.market_sub_verticals or []) if enrich else "[]",
+        "technology_types": _dumps(enrich.technology_types or []) if enrich else "[]",
+        "product_types": _dumps(enrich.product_types or []) if enrich else "[]",
+
+        "highlight_categories": _dumps(enrich.highlight_categories or []) if enrich else "[]",
+        "highlight_texts": _dumps(enrich.highlight_texts or []) if enrich else "[]",
+        "founder_highlights": _dumps(
+            [eh.__dict__ for eh in (enrich.employee_highlights or [])]
+        ) if enrich else "[]",
+
+        "traction_metrics": _dumps(enrich.traction_metrics or {}) if enrich else "{}",
+        "advisor_headcount": enrich.advisor_headcount if enrich else None,
+        "web_traffic": _dumps(enrich.web_traffic or {}) if enrich else "{}",
+        "likelihood_of_backing": enrich.likelihood_of_backing if enrich else None,
+
+        # --- everything else (non-Harmonic, for debugging) ---
+        "description": r.description,
+        "sub_sectors": ", ".join(r.sub_sectors or []),
+        "features": _dumps(r.features),
+
+        # --- structured founders (feeds the normalized founders tables, see db.py) ---
+        "founders": _dumps([asdict(f) for f in founders]),
+    }
+
+    return row
+
+
+def rows_to_df(rows: List[Dict[str, Any]]) -> pd.DataFrame:
+    import pandas as pd  # DataFrame path only; the streaming sink never needs it
+
+    df = pd.DataFrame(rows)
+
+    ordered_cols = CORE_COLUMNS + HARMONIC_COLUMNS
     other_cols = [c for c in df.columns if c not in ordered_cols]
     df = df[ordered_cols + other_cols]
 
     return df
 
 
+_DATA_COLUMNS = COMPANY_COLUMNS[1:]
+
+_UPSERT_SQL = (
+    f"INSERT INTO companies ({', '.join(COMPANY_COLUMNS)}, updated_at) "
+    f"VALUES ({', '.join('?' for _ in COMPANY_COLUMNS)}, ?) "
+    "ON CONFLICT(company_key) DO UPDATE SET "
+    + ", ".join(f"{c} = excluded.{c}" for c in _DATA_COLUMNS + ["updated_at"])
+    # unchanged rows are skipped entirely (no page writes, updated_at kept);
+    # the row-value comparison runs inside SQLite, so there is no per-row Python hashing
+    + f" WHERE ({', '.join(f'companies.{c}' for c in _DATA_COLUMNS)})"
+    + f" IS NOT ({', '.join(f'excluded.{c}' for c in _DATA_COLUMNS)})"
+)
+
+
+def upsert_company_rows(
+    conn: sqlite3.Connection,
+    rows: Iterable[Sequence[Any]],
+    batch_size: int = UPSERT_BATCH_SIZE,
+) -> int:
+    """
+    UPSERT value tuples (in COMPANY_COLUMNS order) inside the caller's transaction,
+    then refresh the normalized tables and search index for the rows that changed.
+    Returns the number of rows inserted or changed.
+    """
+    # unique per call: sync_child_tables finds this call's rows by it
+    now = datetime.now(timezone.utc).isoformat(timespec="microseconds")
+    stamp = (now,)
+    changed = 0
+
+    batch: List[Tuple[Any, ...]] = []
+    for values in rows:
+        batch.append(tuple(values) + stamp)
+        if len(batch) >= batch_size:
+            changed += conn.executemany(_UPSERT_SQL, batch).rowcount
+            batch.clear()
+    if batch:
+        changed += conn.executemany(_UPSERT_SQL, batch).rowcount
+
+    if changed:
+        sync_child_tables(conn, updated_at=now)
+        sync_search_index(conn, updated_at=now)
+    return changed
+
+
+def save_rows_to_db(
+    rows: Iterable[Dict[str, Any]],
+    db_path: str = DEFAULT_DB_PATH,
+) -> int:
+    """Upsert rows from scored_company_to_row in one transaction (no DataFrame)."""
+    conn = connect(db_path)
+    try:
+        with conn:
+            return upsert_company_rows(conn, map(_row_values, rows))
+    finally:
+        conn.close()
+
+
 def save_scores_to_db(
     df: pd.DataFrame,
-    db_path: str = "data/merlin_scores.db",
-    table_name: str = "companies",
-) -> None:
-    conn = sqlite3.connect(db_path)
+    db_path: str = DEFAULT_DB_PATH,
+) -> int:
+    """
+    Upsert a scores DataFrame (from scored_companies_to_df) into `companies`.
+    Rows are keyed by canonical domain; only new or changed rows are written.
+    Returns the number of rows inserted or changed.
+    """
+    if "company_key" not in df.columns:
+        df = df.assign(company_key=df["website_domain"].map(canonical_domain))
+    df = df.reindex(columns=COMPANY_COLUMNS)
+    # object dtype hands sqlite3 plain Python values; NaN -> NULL
+    values = df.astype(object).where(df.notna(), None).itertuples(index=False, name=None)
+
+    conn = connect(db_path)
     try:
-        df.to_sql(table_name, conn, if_exists="replace", index=False)
+        with conn:
+            return upsert_company_rows(conn, values)
     finally:
         conn.close()
+
+
+# --- Streaming sink ---
+_STOP = object()
+
+
+class ScoreSink:
+    """
+    Streams ScoredCompanyRecords into `companies` while scoring is still running.
+
+    Records are flattened as they arrive (the record itself is not kept) and
+    written in transactions of `batch_size` rows (plus the run's score_history
+    rows when `run_id` is given, see history.py). With `background=True` a
+    writer thread owns the connection and at most `max_pending` batches wait in
+    memory, so the scoring loop only blocks if SQLite falls behind. A sink given
+    an open `conn` writes through it synchronously and leaves it open.
+
+        with ScoreSink(db_path) as sink:
+            for record in records:
+                sink.add(record)
+        sink.changed  # rows inserted or changed
+    """
+
+    def __init__(
+        self,
+        db_path: str = DEFAULT_DB_PATH,
+        *,
+        batch_size: int = UPSERT_BATCH_SIZE,
+        background: bool = True,
+        max_pending: int = 4,
+        run_id: Optional[int] = None,
+        profiler: Profiler | NullProfiler = NULL_PROFILER,
+        conn: Optional[sqlite3.Connection] = None,
+    ) -> None:
+        if conn is not None and background:
+            raise ValueError("a ScoreSink on a given connection writes synchronously (background=False)")
+        self.db_path = db_path
+        self.run_id = run_id
+        self.profiler = profiler
+        self.batch_size = batch_size
+        self.background = background
+        self.max_pending = max_pending
+        self.rows = 0
+        self.changed = 0
+
+        self._batch: List[Tuple[Any, ...]] = []
+        self._given = conn
+        self._conn: sqlite3.Connection | None = None
+        self._queue: queue.Queue | None = None
+        self._thread: threading.Thread | None = None
+        self._error: BaseException | None = None
+
+    def __enter__(self) -> "ScoreSink":
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close(flush=exc_type is None)
+
+    def open(self) -> None:
+        if self.background:
+            self._queue = queue.Queue(maxsize=self.max_pending)
+            self._thread = threading.Thread(target=self._writer, name="score-sink", daemon=True)
+            self._thread.start()
+        else:
+            self._conn = self._given or connect(self.db_path)
+
+    def add(self, record: ScoredCompanyRecord) -> None:
+        self.add_row(scored_company_to_row(record))
+
+    def add_row(self, row: Dict[str, Any]) -> None:
+        """Row as built by scored_company_to_row."""
+        self._batch.append(_row_values(row))
+        if len(self._batch) >= self.batch_size:
+            self._flush_batch()
+
+    def flush(self) -> None:
+        """Write everything added so far and wait until it is committed (a checkpoint)."""
+        if self._batch:
+            self._flush_batch()
+        if self._queue is not None:
+            self._queue.join()
+        if self._error is not None:
+            raise self._error
+
+    def close(self, flush: bool = True) -> None:
+        try:
+            if flush and self._batch:
+                self._flush_batch()
+        finally:
+            self._batch = []
+            if self._thread is not None:
+                self._queue.put(_STOP)
+                self._thread.join()
+                self._thread = None
+            if self._conn is not None and self._conn is not self._given:
+                self._conn.close()
+            self._conn = None
+        if flush and self._error is not None:
+            raise self._error
+
+    def _flush_batch(self) -> None:
+        batch, self._batch = self._batch, []
+        self.rows += len(batch)
+        if self._thread is None:
+            self._write(self._conn, batch)
+            return
+        if self._error is not None:
+            raise self._error
+        t0 = self.profiler.clock()
+        self._queue.put(batch)
+        self.profiler.observe("sink_queue_wait", t0)  # > 0 only when SQLite falls behind
+
+    def _write(self, conn: sqlite3.Connection, batch: List[Tuple[Any, ...]]) -> None:
+        t0 = self.profiler.clock()
+        with conn:
+            self.changed += upsert_company_rows(conn, batch, batch_size=len(batch))
+            if self.run_id is not None:
+                append_history(conn, self.run_id, map(_history_values, batch))
+        checkpoint_wal(conn)  # keeps the WAL about one batch long, however long the run
+        self.profiler.observe("sqlite_write_batch", t0)
+
+    def _writer(self) -> None:
+        conn = None
+        try:
+            conn = connect(self.db_path)
+        except BaseException as e:
+            self._error = e
+
+        # after a failure keep draining, so add() never blocks on a full queue
+        while True:
+            batch = self._queue.get()
+            try:
+                if batch is _STOP:
+                    break
+                if self._error is None:
+                    try:
+                        self._write(conn, batch)
+                    except BaseException as e:
+                        self._error = e
+            finally:
+                self._queue.task_done()
+
+        if conn is not None:
+            conn.close()
@@ -0,0 +1,252 @@
+# sparse per-company score attribution ("why is this 82?")
+from __future__ import annotations
+
+import sqlite3
+from array import array
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from src.merlin.db import DEFAULT_DB_PATH, connect
+from src.merlin.scoring.config import COMPOSITE_KEYS, current_scoring
+from src.merlin.scoring.scoring import Contribution
+
+ATTRIBUTION_FLUSH_ROWS = 10_000  # companies per AttributionSink write
+
+
+class AttributionMatrix:
+    """
+    Sparse (companies x terms) contribution matrix in COO form.
+
+    Each row is one company, each column an interned term like "team:prior_exit"
+    or "market:vertical=Financial Services". Values are points on the criterion's
+    0–100 scale, and `points` the same term's share of score_total, so for any row:
+        criterion score = sum of that criterion's values
+        total           = sum of points (value * composite weight of its criterion)
+    Rows are filled from score_company_explained as companies are scored.
+    """
+
+    def __init__(self) -> None:
+        # composite weights for rows added without their own (the config at construction)
+        scoring = current_scoring()
+        self.composite: Dict[str, float] = dict(zip(COMPOSITE_KEYS, scoring.composite))
+        self.scoring_version = scoring.version
+
+        self.term_ids: Dict[str, int] = {}
+        self.row_keys: List[str] = []
+
+        # COO triplets (+ points), stored as typed arrays to keep every-run overhead small
+        self.rows = array("I")
+        self.cols = array("I")
+        self.values = array("d")
+        self.points = array("d")
+
+    def add_row(
+        self,
+        company_key: str,
+        contributions: Iterable[Contribution],
+        composite: Optional[Sequence[float]] = None,
+    ) -> int:
+        """
+        `composite` is the (team, market, funding) weights the row was scored with,
+        so its points add up to that score_total even if the config was reloaded.
+        """
+        row = len(self.row_keys)
+        self.row_keys.append(company_key)
+        weights = self.composite if composite is None else dict(zip(COMPOSITE_KEYS, composite))
+
+        for term, value in contributions:
+            col = self.term_ids.get(term)
+            if col is None:
+                col = self.term_ids[term] = len(self.term_ids)
+            self.rows.append(row)
+            self.cols.append(col)
+            self.values.append(value)
+            self.points.append(value * weights.get(term_criterion(term), 0.0))
+
+        return row
+
+    def terms(self) -> List[str]:
+        """Term names indexed by column id."""
+        out = [""] * len(self.term_ids)
+        for term, col in self.term_ids.items():
+            out[col] = term
+        return out
+
+    def explain(self, company_key: str) -> List[Tuple[str, float]]:
+        """All (term, value) pairs for one company, in the order they were scored."""
+        try:
+            row = self.row_keys.index(company_key)
+        except ValueError:
+            return []
+        names = self.terms()
+        return [
+            (names[self.cols[i]], self.values[i])
+            for i in range(len(self.rows))
+            if self.rows[i] == row
+        ]
+
+    def __len__(self) -> int:
+        return len(self.row_keys)
+
+    def clear_rows(self) -> None:
+        """Drop the rows (e.g. once written), keeping the term ids."""
+        self.row_keys = []
+        self.rows = array("I")
+        self.cols = array("I")
+        self.values = array("d")
+        self.points = array("d")
+
+
+def term_criterion(term: str) -> str:
+    """ "market:vertical=Financial Services" -> "market" """
+    return term.split(":", 1)[0]
+
+
+class AttributionSink(AttributionMatrix):
+    """
+    An AttributionMatrix that merges itself into the DB as rows arrive, for runs
+    of any size: every `flush_rows` companies are written like
+    merge_attributions_to_db (only those companies' rows are replaced), and the
+    rest is written on leaving the `with` block. Companies the run did not score
+    keep their attributions, just as they keep their `companies` rows. Memory
+    holds at most `flush_rows` companies' terms, so explain() only sees the rows
+    not yet flushed. A sink given an open `conn` writes through it and leaves it
+    open.
+
+        with AttributionSink(db_path) as attribution:
+            process_company(raw, enrichment, attribution)
+    """
+
+    def __init__(
+        self,
+        db_path: str = DEFAULT_DB_PATH,
+        *,
+        flush_rows: int = ATTRIBUTION_FLUSH_ROWS,
+        conn: Optional[sqlite3.Connection] = None,
+    ) -> None:
+        super().__init__()
+        self.db_path = db_path
+        self.flush_rows = flush_rows
+        self._given = conn
+        self._conn: sqlite3.Connection | None = None
+
+    def __enter__(self) -> "AttributionSink":
+        self._conn = self._given or connect(self.db_path)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        try:
+            if exc_type is None:
+                self.flush()
+        finally:
+            if self._conn is not self._given:
+                self._conn.close()
+            self._conn = None
+
+    def add_row(
+        self,
+        company_key: str,
+        contributions: Iterable[Contribution],
+        composite: Optional[Sequence[float]] = None,
+    ) -> int:
+        row = super().add_row(company_key, contributions, composite)
+        if len(self) >= self.flush_rows:
+            self.flush()
+        return row
+
+    def flush(self) -> None:
+        """Merge the rows added since the last flush (one transaction)."""
+        if not self.row_keys:
+            return
+        with self._conn:
+            _merge_rows(self._conn, self)
+        self.clear_rows()
+
+
+def merge_attributions_to_db(
+    matrix: AttributionMatrix,
+    db_path: str = DEFAULT_DB_PATH,
+) -> None:
+    """
+    Persist the matrix into two compact tables (schema in db.py):
+      attribution_terms(term_id, term, criterion)
+      score_attributions(company_key, term_id, value, points)
+
+    Only the matrix's own companies are replaced, so runs that score a subset
+    (the inbox daemon, a partial raw file) leave the rest explained. `points`
+    (value * the composite weight the company was scored with) is stored per
+    company, so those explanations keep adding up to their score_total after a
+    config change.
+    """
+    conn = connect(db_path)
+    try:
+        with conn:
+            _merge_rows(conn, matrix)
+    finally:
+        conn.close()
+
+
+def _merge_rows(conn: sqlite3.Connection, matrix: AttributionMatrix) -> None:
+    terms = matrix.terms()
+    conn.executemany(
+        "INSERT OR IGNORE INTO attribution_terms (term, criterion) VALUES (?, ?)",
+        ((term, term_criterion(term)) for term in terms),
+    )
+    term_ids = dict(conn.execute("SELECT term, term_id FROM attribution_terms"))
+    col_ids = [term_ids[term] for term in terms]
+    keys = matrix.row_keys
+    conn.executemany(
+        "DELETE FROM score_attributions WHERE company_key = ?", ((k,) for k in keys)
+    )
+    conn.executemany(
+        "INSERT OR REPLACE INTO score_attributions (company_key, term_id, value, points) VALUES (?, ?, ?, ?)",
+        (
+            (keys[r], col_ids[c], v, p)
+            for r, c, v, p in zip(matrix.rows, matrix.cols, matrix.values, matrix.points)
+        ),
+    )
+
+
+def copy_attributions(conn: sqlite3.Connection, schema: str) -> None:
+    """
+    merge_attributions_to_db for the tables of an ATTACHed scores DB (`schema`),
+    inside the caller's transaction: used to combine shard DBs (sharding.py).
+    """
+    conn.execute(
+        "INSERT OR IGNORE INTO attribution_terms (term, criterion) "
+        f"SELECT term, criterion FROM {schema}.attribution_terms"
+    )
+    conn.execute(
+        "DELETE FROM score_attributions WHERE company_key IN "
+        f"(SELECT DISTINCT company_key FROM {schema}.score_attributions)"
+    )
+    conn.execute(
+        "INSERT OR REPLACE INTO score_attributions (company_key, term_id, value, points) "
+        "SELECT a.company_key, m.term_id, a.value, a.points "
+        f"FROM {schema}.score_attributions AS a "
+        f"JOIN {schema}.attribution_terms AS t ON t.term_id = a.term_id "
+        "JOIN main.attribution_terms AS m ON m.term = t.term"
+    )
+
+
+def load_attribution(
+    company_key: str,
+    db_path: str = DEFAULT_DB_PATH,
+) -> List[Tuple[str, float, float]]:
+    """
+    (term, criterion points, points toward total) for one company, biggest impact first.
+    """
+    conn = connect(db_path)
+    try:
+        rows = conn.execute(
+            """
+            SELECT t.term, a.value, a.points
+            FROM score_attributions a
+            JOIN attribution_terms t ON t.term_id = a.term_id
+            WHERE a.company_key = ?
+            ORDER BY ABS(a.points) DESC
+            """,
+            (company_key,),
+        ).fetchall()
+    finally:
+        conn.close()
+    return [(term, value, total) for term, value, total in rows]
@@ -11,24 +11,45 @@ from src.merlin.models import (
     ScoredCompanyRecord,
 )
 from src.merlin.features import build_features
-from src.merlin.scoring.scoring import score_company
+from src.merlin.keys import canonical_domain
+from src.merlin.profiling import NULL_PROFILER, NullProfiler, Profiler
+from src.merlin.scoring.attribution import AttributionMatrix
+from src.merlin.scoring.config import current_scoring
+from src.merlin.scoring.scoring import score_company, score_company_explained
 
 
 def process_company(
     raw: RawCompany,
     enrichment: HarmonicEnrichment,
+    attribution: Optional[AttributionMatrix] = None,
+    profiler: Profiler | NullProfiler = NULL_PROFILER,
 ) -> ScoredCompanyRecord:
     """
     Full pipeline for a single company:
     RawCompany + HarmonicEnrichment -> FeatureVector -> ScoreBreakdown -> ScoredCompanyRecord
+
+    If `attribution` is given, the contributing terms are added to it as a new row
+    (keyed by canonical domain) from the same scoring pass.
     """
 
+    t0 = profiler.clock()
     features: FeatureVector = build_features(raw, enrichment)
-    scores: ScoreBreakdown = score_company(features)
+    profiler.observe("build_features", t0)
+
+    t0 = profiler.clock()
+    if attribution is None:
+        scores: ScoreBreakdown = score_company(features)
+    else:
+        scoring = current_scoring()  # one snapshot for the scores and their attribution
+        scores, terms = score_company_explained(features, scoring)
+    profiler.observe("score_company", t0)
 
     website_url = enrichment.website_url or f"https://{enrichment.website_domain}" if enrichment.website_domain else raw.url
     website_domain = enrichment.website_domain or raw.url
 
+    if attribution is not None:
+        attribution.add_row(canonical_domain(website_domain), terms, scoring.composite)
+
     # Sectors = market_verticals from enrichment/FeatureVector
     sectors = enrichment.market_verticals or features.market_verticals or []
     sub_sectors = enrichment.market_sub_verticals or features.market_sub_verticals
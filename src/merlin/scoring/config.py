@@ -0,0 +1,429 @@
+# scoring config: load from TOML/JSON, validate, compile to flat lookup tables, hot reload
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import tomllib
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from src.merlin.features import HIGHLIGHT_CATEGORY_TO_FLAG
+from src.merlin.scoring import weights
+
+log = logging.getLogger(__name__)
+
+SCORING_CONFIG_ENV = "MERLIN_SCORING_CONFIG"
+
+# FeatureVector flag fields, in a fixed order (column order for compiled / batched scoring)
+FLAG_FIELDS: Tuple[str, ...] = tuple(HIGHLIGHT_CATEGORY_TO_FLAG.values())
+
+# headcount bonus tier -> (bound, inclusive). Names match weights.HEADCOUNT_BONUS.
+HEADCOUNT_TIERS: Dict[str, Tuple[float, bool]] = {
+    "over_two": (2, False),
+    "over_or_equal_to_6": (6, True),
+    "over_or_equal_to_10": (10, True),
+}
+
+COMPOSITE_KEYS: Tuple[str, ...] = ("team", "market", "funding")
+
+
+class ScoringConfigError(ValueError):
+    """Raised when a scoring config file is malformed or fails validation."""
+
+
+@dataclass(frozen=True)
+class ScoringConfig:
+    """
+    Plain, editable scoring config. Mirrors the constants in weights.py,
+    which are the defaults for anything a config file leaves out.
+    """
+    composite: Dict[str, float]
+    team_weights: Dict[str, float]
+    headcount_bonus: Dict[str, float]
+    vertical_weights: Dict[str, float]
+    sub_vertical_weights: Dict[str, float]
+    smb_enablement_bonus: float
+    stage_base_scores: Dict[str, float]
+    funding_bonus_brackets: List[Tuple[float, float]]
+    max_score: float
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "composite": dict(self.composite),
+            "team_weights": dict(self.team_weights),
+            "headcount_bonus": dict(self.headcount_bonus),
+            "vertical_weights": dict(self.vertical_weights),
+            "sub_vertical_weights": dict(self.sub_vertical_weights),
+            "smb_enablement_bonus": self.smb_enablement_bonus,
+            "stage_base_scores": dict(self.stage_base_scores),
+            "funding_bonus_brackets": [list(b) for b in self.funding_bonus_brackets],
+            "max_score": self.max_score,
+        }
+
+    def version_hash(self) -> str:
+        canonical = json.dumps(self.to_dict(), sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+
+@dataclass(frozen=True, slots=True)
+class CompiledScoring:
+    """
+    Immutable, flattened form of a ScoringConfig used on the hot path.
+    Names are interned once to integer ids; weights live in tuples indexed by id.
+    A new instance is built on every reload, so a scorer holding a reference
+    never sees a half-updated table.
+    """
+    version: str
+    config: ScoringConfig = field(repr=False)
+
+    composite: Tuple[float, float, float]  # (team, market, funding)
+
+    # founder signals with a non-zero weight: (flag field, weight)
+    team_terms: Tuple[Tuple[str, float], ...]
+    flag_weights: Tuple[float, ...]  # aligned with FLAG_FIELDS
+
+    # (tier name, bound, inclusive, bonus)
+    headcount_tiers: Tuple[Tuple[str, float, bool, float], ...]
+
+    vertical_ids: Mapping[str, int]
+    vertical_weights: Tuple[float, ...]
+    sub_vertical_ids: Mapping[str, int]
+    sub_vertical_weights: Tuple[float, ...]
+    smb_bonus: float
+
+    stage_ids: Mapping[str, int]
+    stage_names: Tuple[str, ...]
+    stage_base: Tuple[float, ...]
+
+    bracket_bounds: Tuple[float, ...]
+    bracket_bonus: Tuple[float, ...]
+
+    max_score: float
+
+    def vertical_weight(self, name: str) -> float:
+        i = self.vertical_ids.get(name)
+        return 0.0 if i is None else self.vertical_weights[i]
+
+    def sub_vertical_weight(self, name: str) -> float:
+        i = self.sub_vertical_ids.get(name)
+        return 0.0 if i is None else self.sub_vertical_weights[i]
+
+
+# --- Defaults / parsing ---
+def default_scoring_config() -> ScoringConfig:
+    return ScoringConfig(
+        composite={
+            "team": weights.COMPOSITE_WEIGHTS.team,
+            "market": weights.COMPOSITE_WEIGHTS.market,
+            "funding": weights.COMPOSITE_WEIGHTS.funding,
+        },
+        team_weights={k: float(v) for k, v in weights.TEAM_WEIGHTS.items()},
+        headcount_bonus=dict(weights.HEADCOUNT_BONUS),
+        vertical_weights={k: float(v) for k, v in weights.VERTICAL_WEIGHTS.items()},
+        sub_vertical_weights={k: float(v) for k, v in weights.SUB_VERTICAL_WEIGHTS.items()},
+        smb_enablement_bonus=float(weights.SMB_ENABLEMENT_BONUS),
+        stage_base_scores=dict(weights.STAGE_BASE_SCORES),
+        funding_bonus_brackets=[(float(u), float(b)) for u, b in weights.FUNDING_BONUS_BRACKETS],
+        max_score=float(weights.MAX_SCORE),
+    )
+
+
+def _number(value: Any, where: str) -> float:
+    # bool is an int subclass; reject it explicitly
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ScoringConfigError(f"{where}: expected a number, got {value!r}")
+    return float(value)
+
+
+def _weight_table(
+    value: Any,
+    where: str,
+    allowed: Optional[Tuple[str, ...]] = None,
+) -> Dict[str, float]:
+    if not isinstance(value, dict):
+        raise ScoringConfigError(f"{where}: expected a table of name = number")
+    out: Dict[str, float] = {}
+    for k, v in value.items():
+        if allowed is not None and k not in allowed:
+            raise ScoringConfigError(f"{where}: unknown key {k!r}")
+        w = _number(v, f"{where}.{k}")
+        if w < 0:
+            raise ScoringConfigError(f"{where}.{k}: weights must be >= 0")
+        out[k] = w
+    return out
+
+
+def scoring_config_from_dict(
+    data: Mapping[str, Any],
+    base: Optional[ScoringConfig] = None,
+) -> ScoringConfig:
+    """
+    Validate a parsed config and overlay it on `base` (defaults from weights.py).
+    Tables are merged key by key, so a file only needs the weights it changes.
+    """
+    base = base or default_scoring_config()
+    known = set(base.to_dict())
+    unknown = set(data) - known
+    if unknown:
+        raise ScoringConfigError(f"unknown config keys: {sorted(unknown)}")
+
+    composite = dict(base.composite)
+    composite.update(_weight_table(data.get("composite", {}), "composite", COMPOSITE_KEYS))
+    if abs(sum(composite.values()) - 1.0) > 1e-6:
+        raise ScoringConfigError(f"composite weights must sum to 1.0, got {sum(composite.values())}")
+
+    team = dict(base.team_weights)
+    team.update(_weight_table(data.get("team_weights", {}), "team_weights", FLAG_FIELDS))
+
+    headcount = dict(base.headcount_bonus)
+    headcount.update(
+        _weight_table(data.get("headcount_bonus", {}), "headcount_bonus", tuple(HEADCOUNT_TIERS))
+    )
+
+    verticals = dict(base.vertical_weights)
+    verticals.update(_weight_table(data.get("vertical_weights", {}), "vertical_weights"))
+
+    sub_verticals = dict(base.sub_vertical_weights)
+    sub_verticals.update(_weight_table(data.get("sub_vertical_weights", {}), "sub_vertical_weights"))
+
+    stages = dict(base.stage_base_scores)
+    for k, v in _weight_table(data.get("stage_base_scores", {}), "stage_base_scores").items():
+        stages[normalize_stage(k)] = v
+
+    brackets = base.funding_bonus_brackets
+    if "funding_bonus_brackets" in data:
+        raw = data["funding_bonus_brackets"]
+        if not isinstance(raw, list):
+            raise ScoringConfigError("funding_bonus_brackets: expected a list of [upper_bound, bonus]")
+        brackets = []
+        for i, pair in enumerate(raw):
+            if not isinstance(pair, (list, tuple)) or len(pair) != 2:
+                raise ScoringConfigError(f"funding_bonus_brackets[{i}]: expected [upper_bound, bonus]")
+            brackets.append(
+                (
+                    _number(pair[0], f"funding_bonus_brackets[{i}][0]"),
+                    _number(pair[1], f"funding_bonus_brackets[{i}][1]"),
+                )
+            )
+        bounds = [u for u, _ in brackets]
+        if bounds != sorted(bounds):
+            raise ScoringConfigError("funding_bonus_brackets: upper bounds must be ascending")
+
+    smb = _number(data.get("smb_enablement_bonus", base.smb_enablement_bonus), "smb_enablement_bonus")
+    max_score = _number(data.get("max_score", base.max_score), "max_score")
+    if max_score <= 0:
+        raise ScoringConfigError("max_score must be > 0")
+
+    return ScoringConfig(
+        composite=composite,
+        team_weights=team,
+        headcount_bonus=headcount,
+        vertical_weights=verticals,
+        sub_vertical_weights=sub_verticals,
+        smb_enablement_bonus=smb,
+        stage_base_scores=stages,
+        funding_bonus_brackets=list(brackets),
+        max_score=max_score,
+    )
+
+
+def load_scoring_config(path: str | Path) -> ScoringConfig:
+    """Load a .toml or .json scoring config file (partial files are merged over defaults)."""
+    path = Path(path)
+    try:
+        if path.suffix.lower() == ".json":
+            with path.open("r", encoding="utf-8") as f:
+                data = json.load(f)
+        else:
+            with path.open("rb") as f:
+                data = tomllib.load(f)
+    except (OSError, ValueError) as e:
+        raise ScoringConfigError(f"could not read scoring config {path}: {e}") from e
+
+    if not isinstance(data, dict):
+        raise ScoringConfigError(f"{path}: top level must be a table/object")
+    return scoring_config_from_dict(data)
+
+
+def dump_scoring_config(config: ScoringConfig, path: str | Path) -> None:
+    """Write a config to .json or .toml (a good starting point for editing weights)."""
+    path = Path(path)
+    data = config.to_dict()
+    if path.suffix.lower() == ".json":
+        text = json.dumps(data, indent=2) + "\n"
+    else:
+        text = _to_toml(data)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)  # never leave a half-written file for the watcher
+
+
+def _to_toml(data: Dict[str, Any]) -> str:
+    # only needs to cover ScoringConfig's shape: scalars, list of pairs, flat tables
+    lines: List[str] = []
+    tables = {k: v for k, v in data.items() if isinstance(v, dict)}
+    for k, v in data.items():
+        if k in tables:
+            continue
+        lines.append(f"{k} = {json.dumps(v)}")
+    for name, table in tables.items():
+        lines.append("")
+        lines.append(f"[{name}]")
+        for k, v in table.items():
+            lines.append(f"{json.dumps(k)} = {json.dumps(v)}")
+    return "\n".join(lines) + "\n"
+
+
+# --- Compilation ---
+@lru_cache(maxsize=256)
+def normalize_stage(stage: str) -> str:
+    """ "Series A" -> "SERIES_A" (memoized; stage strings come from a tiny vocabulary)"""
+    return (stage or "").upper().replace(" ", "_")
+
+
+def _intern_table(table: Mapping[str, float]) -> Tuple[Dict[str, int], Tuple[float, ...]]:
+    ids: Dict[str, int] = {}
+    values: List[float] = []
+    for name, w in table.items():
+        ids[name] = len(values)
+        values.append(float(w))
+    return ids, tuple(values)
+
+
+def compile_scoring(config: ScoringConfig) -> CompiledScoring:
+    vertical_ids, vertical_weights = _intern_table(config.vertical_weights)
+    sub_ids, sub_weights = _intern_table(config.sub_vertical_weights)
+    stage_ids, stage_base = _intern_table(config.stage_base_scores)
+
+    return CompiledScoring(
+        version=config.version_hash(),
+        config=config,
+        composite=tuple(config.composite[k] for k in COMPOSITE_KEYS),
+        team_terms=tuple(
+            (name, config.team_weights.get(name, 0.0))
+            for name in FLAG_FIELDS
+            if config.team_weights.get(name, 0.0)
+        ),
+        flag_weights=tuple(config.team_weights.get(name, 0.0) for name in FLAG_FIELDS),
+        headcount_tiers=tuple(
+            (name, bound, inclusive, config.headcount_bonus.get(name, 0.0))
+            for name, (bound, inclusive) in HEADCOUNT_TIERS.items()
+        ),
+        vertical_ids=vertical_ids,
+        vertical_weights=vertical_weights,
+        sub_vertical_ids=sub_ids,
+        sub_vertical_weights=sub_weights,
+        smb_bonus=config.smb_enablement_bonus,
+        stage_ids=stage_ids,
+        stage_names=tuple(stage_ids),
+        stage_base=stage_base,
+        bracket_bounds=tuple(u for u, _ in config.funding_bonus_brackets),
+        bracket_bonus=tuple(b for _, b in config.funding_bonus_brackets),
+        max_score=config.max_score,
+    )
+
+
+# --- Hot reload ---
+class ScoringConfigStore:
+    """
+    Holds the active CompiledScoring and swaps it when the config file changes.
+
+    Readers call current(), which is a plain attribute read. Reloads compile the new
+    table fully before swapping the single reference, so in-flight scoring keeps
+    using the table it started with. An invalid file is logged and ignored.
+    """
+
+    def __init__(self, path: Optional[str | Path] = None) -> None:
+        self.path = Path(path) if path else None
+        self._lock = threading.Lock()
+        self._mtime: Optional[float] = None
+        self._watcher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+        config = default_scoring_config()
+        if self.path is not None:
+            self._mtime = self._stat()
+            config = load_scoring_config(self.path)
+        self._compiled = compile_scoring(config)
+
+    def current(self) -> CompiledScoring:
+        return self._compiled
+
+    @property
+    def version(self) -> str:
+        return self._compiled.version
+
+    def set_config(self, config: ScoringConfig) -> CompiledScoring:
+        """Swap in an in-memory config (e.g. a tuned profile) without touching disk."""
+        compiled = compile_scoring(config)
+        with self._lock:
+            self._compiled = compiled
+        return compiled
+
+    def _stat(self) -> Optional[float]:
+        try:
+            return self.path.stat().st_mtime_ns if self.path else None
+        except OSError:
+            return None
+
+    def maybe_reload(self) -> bool:
+        """Reload if the file's mtime changed. Returns True if a new table was swapped in."""
+        if self.path is None:
+            return False
+        mtime = self._stat()
+        if mtime is None or mtime == self._mtime:
+            return False
+
+        with self._lock:
+            if mtime == self._mtime:
+                return False
+            self._mtime = mtime
+            try:
+                compiled = compile_scoring(load_scoring_config(self.path))
+            except ScoringConfigError as e:
+                log.error("Ignoring invalid scoring config %s: %s", self.path, e)
+                return False
+            if compiled.version == self._compiled.version:
+                return False
+            self._compiled = compiled
+
+        log.info("Reloaded scoring config %s (version %s)", self.path, compiled.version)
+        return True
+
+    def start_watching(self, interval: float = 2.0) -> None:
+        """Poll the config file from a daemon thread (for long-running processes)."""
+        if self.path is None or self._watcher is not None:
+            return
+
+        def _loop() -> None:
+            while not self._stop.wait(interval):
+                self.maybe_reload()
+
+        self._watcher = threading.Thread(target=_loop, name="scoring-config-watch", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self) -> None:
+        self._stop.set()
+
+
+_store: Optional[ScoringConfigStore] = None
+_store_lock = threading.Lock()
+
+
+def scoring_store() -> ScoringConfigStore:
+    """Process-wide store, configured from $MERLIN_SCORING_CONFIG (defaults to weights.py)."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ScoringConfigStore(os.environ.get(SCORING_CONFIG_ENV) or None)
+    return _store
+
+
+def current_scoring() -> CompiledScoring:
+    return scoring_store().current()
@@ -1,37 +1,56 @@
 # scoring logic
 from __future__ import annotations
-from typing import Optional
+from typing import List, Optional, Tuple
 import re
 
 from src.merlin.models import FeatureVector, ScoreBreakdown
-from src.merlin.scoring.weights import (
-    COMPOSITE_WEIGHTS,
-    TEAM_WEIGHTS,
-    VERTICAL_WEIGHTS,
-    SUB_VERTICAL_WEIGHTS,
-    SMB_ENABLEMENT_BONUS,
-    STAGE_BASE_SCORES,
-    FUNDING_BONUS_BRACKETS,
-    MAX_SCORE,
-    HEADCOUNT_BONUS
-)
+from src.merlin.scoring.config import CompiledScoring, current_scoring, normalize_stage
+
+# (term, points on the criterion's 0–100 scale), e.g. ("team:prior_exit", 18.0)
+Contribution = Tuple[str, float]
+
 
 # TODO: Future improvement: Use an algorithm more advanced than a linear combination.
-def score_company(features: FeatureVector) -> ScoreBreakdown:
+def score_company(
+    features: FeatureVector,
+    scoring: Optional[CompiledScoring] = None,
+) -> ScoreBreakdown:
     """
     Linear Combination scoring entrypoint.
     Returns per-criterion scores + composite total on a 0–100 scale.
+    Uses the active scoring config (see scoring/config.py) unless one is passed in.
+    """
+    return _score(features, None, scoring or current_scoring())
+
+
+def score_company_explained(
+    features: FeatureVector,
+    scoring: Optional[CompiledScoring] = None,
+) -> Tuple[ScoreBreakdown, List[Contribution]]:
+    """
+    Same as score_company, but also returns every term that contributed to the scores
+    (including negative "clamp" terms when MAX_SCORE ate points).
+    Terms are collected in the same pass that computes the scores.
     """
-    team = _score_team(features)
-    market = _score_market(features)
-    funding = _score_funding(features)
+    terms: List[Contribution] = []
+    return _score(features, terms, scoring or current_scoring()), terms
 
 
+def _score(
+    features: FeatureVector,
+    terms: Optional[List[Contribution]],
+    cfg: CompiledScoring,
+) -> ScoreBreakdown:
+    # cfg is one immutable snapshot, so a hot reload mid-call can't mix tables
+    team = _score_team(features, terms, cfg)
+    market = _score_market(features, terms, cfg)
+    funding = _score_funding(features, terms, cfg)
 
+    w_team, w_market, w_funding = cfg.composite
     total = (
-        COMPOSITE_WEIGHTS.team * team
-        + COMPOSITE_WEIGHTS.market * market
-        + COMPOSITE_WEIGHTS.funding * funding
+        w_team * team
+        + w_market * market
+        + w_funding * funding
     )
 
     return ScoreBreakdown(
@@ -42,7 +61,24 @@ def score_company(features: FeatureVector) -> ScoreBreakdown:
     )
 
 
-def _score_team(fv: FeatureVector) -> float:
+def _clamp(
+    score: float,
+    criterion: str,
+    terms: Optional[List[Contribution]],
+    cfg: CompiledScoring,
+) -> float:
+    """Clamp to 0–max_score, recording the points lost (or gained) as a term."""
+    clamped = max(0.0, min(score, cfg.max_score))
+    if terms is not None and clamped != score:
+        terms.append((f"{criterion}:max_score_clamp", clamped - score))
+    return clamped
+
+
+def _score_team(
+    fv: FeatureVector,
+    terms: Optional[List[Contribution]] = None,
+    cfg: Optional[CompiledScoring] = None,
+) -> float:
     """
     Team score.
 
@@ -52,26 +88,25 @@ def _score_team(fv: FeatureVector) -> float:
       - add a headcount bonus
       - clamp to MAX_SCORE
     """
+    cfg = cfg or current_scoring()
     score = 0.0
 
-    # founder signals
-    for attr, weight in TEAM_WEIGHTS.items():
-        if attr == "headcount_bonus":
-            continue
-
+    # founder signals (zero weights are dropped at compile time)
+    for attr, weight in cfg.team_terms:
         if getattr(fv, attr, False):
             score += weight
+            if terms is not None:
+                terms.append((f"team:{attr}", weight))
 
     # headcount bonus
     hc = fv.headcount or 0
-    if hc > 2:
-        score += HEADCOUNT_BONUS["over_two"]
-    if hc >= 6:
-        score += HEADCOUNT_BONUS["over_or_equal_to_6"]
-    if hc >= 10:
-        score += HEADCOUNT_BONUS["over_or_equal_to_10"]
+    for tier, bound, inclusive, bonus in cfg.headcount_tiers:
+        if hc >= bound if inclusive else hc > bound:
+            score += bonus
+            if terms is not None:
+                terms.append((f"team:headcount_{tier}", bonus))
 
-    return min(score, MAX_SCORE)
+    return _clamp(score, "team", terms, cfg)
 
 
 
@@ -126,7 +161,11 @@ def _is_smb_enabled(description: Optional[str]) -> bool:
     return "small" in text and "business" in text
 
 
-def _score_market(fv: FeatureVector) -> float:
+def _score_market(
+    fv: FeatureVector,
+    terms: Optional[List[Contribution]] = None,
+    cfg: Optional[CompiledScoring] = None,
+) -> float:
     """
     Market score:
     - 0 if company is not in US/Canada.
@@ -136,53 +175,75 @@ def _score_market(fv: FeatureVector) -> float:
         - Add SMB enablement bonus
         - Cap at 0–100
     """
+    cfg = cfg or current_scoring()
     if not _is_north_america(fv.location):
+        if terms is not None:
+            terms.append(("market:outside_north_america", 0.0))
         return 0.0
 
     # strongest vertical
     # NOTE: Had an issue where companies with a bunch of sub-verticals had strong market scores. My assumption is that Core wouldn't prefer by 2x a company with 2 familiar sub verticals vs just 1. 
     # Future improvement: Use an LLM to classify most relevant vertical + sub vertical
     vertical_scores = [
-        VERTICAL_WEIGHTS.get(v, 0.0)
+        cfg.vertical_weight(v)
         for v in (fv.market_verticals or [])
     ]
     best_vertical = max(vertical_scores) if vertical_scores else 0.0
+    if terms is not None and vertical_scores:
+        v = fv.market_verticals[vertical_scores.index(best_vertical)]
+        terms.append((f"market:vertical={v}", best_vertical))
 
     # strongest sub-vertical
     sub_scores = [
-        SUB_VERTICAL_WEIGHTS.get(sv, 0.0)
+        cfg.sub_vertical_weight(sv)
         for sv in (fv.market_sub_verticals or [])
     ]
     best_sub_vertical = max(sub_scores) if sub_scores else 0.0
+    if terms is not None and sub_scores:
+        sv = fv.market_sub_verticals[sub_scores.index(best_sub_vertical)]
+        terms.append((f"market:sub_vertical={sv}", best_sub_vertical))
 
     # SMB enablement bonus
     smb_bonus = (
-        SMB_ENABLEMENT_BONUS
+        cfg.smb_bonus
         if _is_smb_enabled(getattr(fv, "description", None))
         else 0.0
     )
+    if terms is not None and smb_bonus:
+        terms.append(("market:smb_enablement", smb_bonus))
 
     score = best_vertical + best_sub_vertical + smb_bonus
 
-    return max(0.0, min(score, MAX_SCORE))
+    return _clamp(score, "market", terms, cfg)
 
-def _score_funding(fv: FeatureVector) -> float:
+def _score_funding(
+    fv: FeatureVector,
+    terms: Optional[List[Contribution]] = None,
+    cfg: Optional[CompiledScoring] = None,
+) -> float:
     """
     Funding score aligned with Core's increased outbound goal.
     Arjan explained while we don't want to be funding pre seed, we want to be reaching out earlier.
     Higher score for earlier stages and smaller total funding.
     """
+    cfg = cfg or current_scoring()
+
     # normalize stage
-    stage_key = (fv.stage or "").upper().replace(" ", "_")
-    stage_base = STAGE_BASE_SCORES.get(stage_key, 0.0)
+    stage_key = normalize_stage(fv.stage or "")
+    stage_id = cfg.stage_ids.get(stage_key)
+    stage_base = cfg.stage_base[stage_id] if stage_id is not None else 0.0
+    if terms is not None and stage_id is not None:
+        terms.append((f"funding:stage={stage_key}", stage_base))
 
     # funding amount bonus (smaller = better)
     amount = fv.funding_total or 0.0
     bonus = 0.0
-    for upper_bound, bracket_bonus in FUNDING_BONUS_BRACKETS:
+    for upper_bound, bracket_bonus in zip(cfg.bracket_bounds, cfg.bracket_bonus):
         if amount <= upper_bound:
             bonus = bracket_bonus
+            if terms is not None:
+                terms.append((f"funding:bracket<={upper_bound:.0f}", bonus))
             break
 
     score = stage_base + bonus
-    return min(score, MAX_SCORE)
\ No newline at end of file
+    return _clamp(score, "funding", terms, cfg)
\ No newline at end of file
@@ -0,0 +1,294 @@
+# Monte Carlo weight sensitivity: how fragile is the leaderboard to the hand-tuned weights?
+from __future__ import annotations
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.merlin.notify import SLACK_SCORE_THRESHOLD
+from src.merlin.scoring.config import CompiledScoring, current_scoring
+from src.merlin.scoring.vectorized import (
+    FeatureMatrix,
+    WeightArrays,
+    load_feature_matrix_from_db,
+    load_feature_matrix_from_raw,
+    score_matrix,
+)
+
+# keep each chunk's (samples x companies) score arrays around this size
+CHUNK_BYTES = 256 * 1024 * 1024
+
+
+@dataclass
+class SensitivityParams:
+    samples: int = 2000
+    sigma: float = 0.2  # std-dev of the log-normal multiplicative noise per weight
+    composite_sigma: float = 0.1
+    threshold: float = SLACK_SCORE_THRESHOLD
+    top_k: int = 50
+    rank_bins: int = 40
+    seed: int = 0
+
+
+def perturb(base: WeightArrays, n: int, params: SensitivityParams, rng: np.random.Generator) -> WeightArrays:
+    """
+    n perturbed copies of `base`. Every weight is multiplied by exp(N(0, sigma)),
+    so weights stay >= 0 and a hand-set 0 stays 0. Composite weights are
+    perturbed the same way and renormalized to sum to 1.
+    Funding bracket bounds and MAX_SCORE are kept fixed.
+    """
+    def noisy(a: np.ndarray, sigma: float) -> np.ndarray:
+        reps = np.repeat(a, n, axis=0)
+        return reps * np.exp(rng.normal(0.0, sigma, size=reps.shape))
+
+    composite = noisy(base.composite, params.composite_sigma)
+    composite /= composite.sum(axis=1, keepdims=True)
+
+    return WeightArrays(
+        composite=composite,
+        flag_weights=noisy(base.flag_weights, params.sigma),
+        headcount_bonus=noisy(base.headcount_bonus, params.sigma),
+        vertical_weights=noisy(base.vertical_weights, params.sigma),
+        sub_vertical_weights=noisy(base.sub_vertical_weights, params.sigma),
+        smb_bonus=noisy(base.smb_bonus.reshape(1, 1), params.sigma).ravel(),
+        stage_base=noisy(base.stage_base, params.sigma),
+        bracket_bonus=noisy(base.bracket_bonus, params.sigma),
+        bracket_bounds=base.bracket_bounds,
+        max_score=base.max_score,
+    )
+
+
+def rank_bin_edges(n: int, bins: int) -> np.ndarray:
+    """
+    Log-spaced 0-based rank bucket edges: fine resolution at the top of the
+    leaderboard (ranks 1, 2, 3, ...) where it matters, coarse further down.
+    """
+    edges = np.unique(np.concatenate([[0], np.geomspace(1, max(n, 1), num=bins).round()]).astype(np.int64))
+    if edges[-1] < n:
+        edges = np.append(edges, n)
+    return edges
+
+
+def ranks_of(totals: np.ndarray) -> np.ndarray:
+    """
+    0-based rank of each company per sample row, highest total first.
+    Ties keep input order (same as the stable sort in the leaderboard).
+    """
+    order = np.argsort(-totals, axis=1, kind="stable")
+    ranks = np.empty_like(order)
+    np.put_along_axis(ranks, order, np.arange(totals.shape[1])[None, :], axis=1)
+    return ranks
+
+
+class _Accumulator:
+    def __init__(self, n: int, edges: np.ndarray) -> None:
+        self.count = 0
+        self.rank_sum = np.zeros(n)
+        self.rank_sq = np.zeros(n)
+        self.rank_min = np.full(n, np.iinfo(np.int64).max, dtype=np.int64)
+        self.rank_max = np.zeros(n, dtype=np.int64)
+        self.total_sum = np.zeros(n)
+        self.total_sq = np.zeros(n)
+        self.above = np.zeros(n, dtype=np.int64)
+        self.top_k = np.zeros(n, dtype=np.int64)
+        self.edges = edges
+        self.hist = np.zeros((n, len(edges) - 1), dtype=np.int32)
+
+    def add(self, totals: np.ndarray, threshold: float, k: int) -> None:
+        ranks = ranks_of(totals)
+        self.count += totals.shape[0]
+        self.rank_sum += ranks.sum(axis=0)
+        self.rank_sq += (ranks.astype(np.float64) ** 2).sum(axis=0)
+        np.minimum(self.rank_min, ranks.min(axis=0), out=self.rank_min)
+        np.maximum(self.rank_max, ranks.max(axis=0), out=self.rank_max)
+        self.total_sum += totals.sum(axis=0)
+        self.total_sq += (totals ** 2).sum(axis=0)
+        self.above += (totals >= threshold).sum(axis=0)
+        self.top_k += (ranks < k).sum(axis=0)
+
+        rows = np.arange(totals.shape[1])
+        for sample_bins in np.searchsorted(self.edges, ranks, side="right") - 1:
+            self.hist[rows, sample_bins] += 1
+
+    def merge(self, other: "_Accumulator") -> None:
+        self.count += other.count
+        self.rank_sum += other.rank_sum
+        self.rank_sq += other.rank_sq
+        np.minimum(self.rank_min, other.rank_min, out=self.rank_min)
+        np.maximum(self.rank_max, other.rank_max, out=self.rank_max)
+        self.total_sum += other.total_sum
+        self.total_sq += other.total_sq
+        self.above += other.above
+        self.top_k += other.top_k
+        self.hist += other.hist
+
+
+# --- worker side (state is shipped once per process, not per task) ---
+_worker_state: Dict[str, object] = {}
+
+
+def _init_worker(fm: FeatureMatrix, base: WeightArrays, params: SensitivityParams) -> None:
+    _worker_state["fm"] = fm
+    _worker_state["base"] = base
+    _worker_state["params"] = params
+
+
+def _run_blocks(blocks: List[Tuple[int, int]]) -> _Accumulator:
+    fm: FeatureMatrix = _worker_state["fm"]  # type: ignore[assignment]
+    base: WeightArrays = _worker_state["base"]  # type: ignore[assignment]
+    params: SensitivityParams = _worker_state["params"]  # type: ignore[assignment]
+
+    acc = _Accumulator(len(fm), rank_bin_edges(len(fm), params.rank_bins))
+    for block_id, size in blocks:
+        # seeded per block, so results don't depend on the number of workers
+        rng = np.random.default_rng([params.seed, block_id])
+        w = perturb(base, size, params, rng)
+        totals = np.round(score_matrix(fm, w)["total"], 2)
+        acc.add(totals, params.threshold, params.top_k)
+    return acc
+
+
+@dataclass
+class SensitivityReport:
+    fm: FeatureMatrix
+    params: SensitivityParams
+    scoring_version: str
+    baseline_total: np.ndarray
+    baseline_rank: np.ndarray
+    acc: _Accumulator
+    elapsed_s: float
+
+    def _rank_percentile(self, q: float) -> np.ndarray:
+        # upper edge (1-based) of the rank bucket containing the q-th quantile
+        cum = np.cumsum(self.acc.hist, axis=1)
+        idx = (cum < q * self.acc.count).sum(axis=1)
+        idx = np.minimum(idx, self.acc.hist.shape[1] - 1)
+        return self.acc.edges[idx + 1]
+
+    def to_df(self) -> pd.DataFrame:
+        n = max(self.acc.count, 1)
+        mean_rank = self.acc.rank_sum / n
+        std_rank = np.sqrt(np.maximum(self.acc.rank_sq / n - mean_rank ** 2, 0.0))
+        mean_total = self.acc.total_sum / n
+        std_total = np.sqrt(np.maximum(self.acc.total_sq / n - mean_total ** 2, 0.0))
+
+        df = pd.DataFrame(
+            {
+                "company_key": self.fm.keys,
+                "company_name": self.fm.names,
+                "baseline_total": self.baseline_total,
+                "baseline_rank": self.baseline_rank + 1,
+                "mean_rank": mean_rank + 1,
+                "std_rank": std_rank,
+                "min_rank": self.acc.rank_min + 1,
+                "max_rank": self.acc.rank_max + 1,
+                "p05_rank": self._rank_percentile(0.05),
+                "p50_rank": self._rank_percentile(0.50),
+                "p95_rank": self._rank_percentile(0.95),
+                "mean_total": mean_total,
+                "std_total": std_total,
+                f"p_total_ge_{self.params.threshold:g}": self.acc.above / n,
+                f"p_top_{self.params.top_k}": self.acc.top_k / n,
+            }
+        )
+        return df.sort_values("baseline_rank").reset_index(drop=True)
+
+
+def run_sensitivity(
+    fm: FeatureMatrix,
+    params: Optional[SensitivityParams] = None,
+    *,
+    workers: Optional[int] = None,
+    scoring: Optional[CompiledScoring] = None,
+) -> SensitivityReport:
+    """
+    Rescore every company under `params.samples` perturbed weight configs
+    and aggregate per-company rank / threshold statistics.
+    Samples are scored in chunks of array math, spread over a process pool.
+    """
+    params = params or SensitivityParams()
+    scoring = scoring or current_scoring()
+    workers = workers or os.cpu_count() or 1
+    start = time.perf_counter()
+
+    base = WeightArrays.from_compiled(fm, scoring)
+    baseline = np.round(score_matrix(fm, base)["total"], 2)
+    baseline_rank = ranks_of(baseline)[0]
+
+    # ~10 live (S, N) float64 arrays per chunk
+    chunk = max(1, min(256, CHUNK_BYTES // max(len(fm) * 8 * 10, 1)))
+    blocks = []
+    done = 0
+    while done < params.samples:
+        size = min(chunk, params.samples - done)
+        blocks.append((len(blocks), size))
+        done += size
+
+    groups = [blocks[i::workers] for i in range(workers) if blocks[i::workers]]
+    acc = _Accumulator(len(fm), rank_bin_edges(len(fm), params.rank_bins))
+
+    if len(groups) <= 1:
+        _init_worker(fm, base, params)
+        for g in groups:
+            acc.merge(_run_blocks(g))
+    else:
+        with ProcessPoolExecutor(
+            max_workers=len(groups),
+            initializer=_init_worker,
+            initargs=(fm, base, params),
+        ) as pool:
+            for part in pool.map(_run_blocks, groups):
+                acc.merge(part)
+
+    return SensitivityReport(
+        fm=fm,
+        params=params,
+        scoring_version=scoring.version,
+        baseline_total=baseline[0],
+        baseline_rank=baseline_rank,
+        acc=acc,
+        elapsed_s=time.perf_counter() - start,
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Monte Carlo weight-sensitivity analysis")
+    parser.add_argument("--raw", default="outputs/harmonic_raw_graphql_final.json", help="fetch_harmonic_raw output")
+    parser.add_argument("--db", default=None, help="read features from this scores DB instead of --raw")
+    parser.add_argument("--samples", type=int, default=SensitivityParams.samples)
+    parser.add_argument("--sigma", type=float, default=SensitivityParams.sigma)
+    parser.add_argument("--composite-sigma", type=float, default=SensitivityParams.composite_sigma)
+    parser.add_argument("--top-k", type=int, default=SensitivityParams.top_k)
+    parser.add_argument("--seed", type=int, default=SensitivityParams.seed)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--out", default="outputs/sensitivity.csv")
+    args = parser.parse_args(argv)
+
+    fm = load_feature_matrix_from_db(args.db) if args.db else load_feature_matrix_from_raw(args.raw)
+    params = SensitivityParams(
+        samples=args.samples,
+        sigma=args.sigma,
+        composite_sigma=args.composite_sigma,
+        top_k=args.top_k,
+        seed=args.seed,
+    )
+    report = run_sensitivity(fm, params, workers=args.workers)
+    df = report.to_df()
+    df.to_csv(args.out, index=False)
+
+    print(
+        f"Scored {len(fm)} companies x {params.samples} weight samples "
+        f"in {report.elapsed_s:.1f}s (config {report.scoring_version})"
+    )
+    print(df.head(25).to_string(index=False, float_format=lambda x: f"{x:0.2f}"))
+    print(f"\nWrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
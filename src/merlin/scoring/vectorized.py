@@ -0,0 +1,328 @@
+# batched (numpy) version of scoring.py for scoring many companies x many weight configs at once
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.merlin.db import DEFAULT_DB_PATH, connect
+from src.merlin.models import FeatureVector
+from src.merlin.scoring.config import (
+    FLAG_FIELDS,
+    HEADCOUNT_TIERS,
+    CompiledScoring,
+    current_scoring,
+    normalize_stage,
+)
+from src.merlin.scoring.scoring import _is_north_america, _is_smb_enabled
+
+
+def _as_dict(fv: FeatureVector | Mapping[str, Any]) -> Mapping[str, Any]:
+    return fv if isinstance(fv, Mapping) else fv.__dict__
+
+
+class _Vocab:
+    def __init__(self) -> None:
+        self.ids: Dict[str, int] = {}
+
+    def id(self, name: str) -> int:
+        i = self.ids.get(name)
+        if i is None:
+            i = self.ids[name] = len(self.ids)
+        return i
+
+    def names(self) -> List[str]:
+        return list(self.ids)
+
+
+def _csr(lists: List[List[int]]) -> Tuple[np.ndarray, np.ndarray]:
+    indptr = np.zeros(len(lists) + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum([len(x) for x in lists])
+    indices = np.fromiter((i for x in lists for i in x), dtype=np.int64, count=int(indptr[-1]))
+    return indptr, indices
+
+
+@dataclass
+class FeatureMatrix:
+    """
+    Columnar, config-independent encoding of N FeatureVectors.
+
+    Everything that scoring.py derives from strings (location, SMB text match,
+    stage normalization, vertical names) is resolved once here, so rescoring
+    under a different weight config is pure array math.
+    """
+    keys: List[str]
+    names: List[str]
+
+    flags: np.ndarray  # (N, len(FLAG_FIELDS)) float32 0/1
+    headcount: np.ndarray  # (N,) float64
+    north_america: np.ndarray  # (N,) bool
+    smb: np.ndarray  # (N,) bool
+    funding_total: np.ndarray  # (N,) float64
+
+    vertical_names: List[str]
+    vertical_indptr: np.ndarray  # CSR rows -> vertical ids
+    vertical_indices: np.ndarray
+    sub_vertical_names: List[str]
+    sub_vertical_indptr: np.ndarray
+    sub_vertical_indices: np.ndarray
+
+    stage_names: List[str]  # normalized stage keys seen in the data
+    stage_idx: np.ndarray  # (N,) int64 into stage_names
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @classmethod
+    def from_features(
+        cls,
+        keys: Sequence[str],
+        names: Sequence[str],
+        features: Iterable[FeatureVector | Mapping[str, Any]],
+    ) -> "FeatureMatrix":
+        verticals, sub_verticals, stages = _Vocab(), _Vocab(), _Vocab()
+        flag_rows: List[List[bool]] = []
+        headcount: List[float] = []
+        na: List[bool] = []
+        smb: List[bool] = []
+        funding: List[float] = []
+        v_rows: List[List[int]] = []
+        sv_rows: List[List[int]] = []
+        stage_idx: List[int] = []
+
+        for fv in features:
+            d = _as_dict(fv)
+            flag_rows.append([bool(d.get(f)) for f in FLAG_FIELDS])
+            headcount.append(float(d.get("headcount") or 0))
+            na.append(_is_north_america(d.get("location")))
+            smb.append(_is_smb_enabled(d.get("description")))
+            funding.append(float(d.get("funding_total") or 0.0))
+            v_rows.append([verticals.id(v) for v in (d.get("market_verticals") or [])])
+            sv_rows.append([sub_verticals.id(v) for v in (d.get("market_sub_verticals") or [])])
+            stage_idx.append(stages.id(normalize_stage(d.get("stage") or "")))
+
+        v_indptr, v_indices = _csr(v_rows)
+        sv_indptr, sv_indices = _csr(sv_rows)
+
+        return cls(
+            keys=list(keys),
+            names=list(names),
+            flags=np.asarray(flag_rows, dtype=np.float32).reshape(len(flag_rows), len(FLAG_FIELDS)),
+            headcount=np.asarray(headcount, dtype=np.float64),
+            north_america=np.asarray(na, dtype=bool),
+            smb=np.asarray(smb, dtype=bool),
+            funding_total=np.asarray(funding, dtype=np.float64),
+            vertical_names=verticals.names(),
+            vertical_indptr=v_indptr,
+            vertical_indices=v_indices,
+            sub_vertical_names=sub_verticals.names(),
+            sub_vertical_indptr=sv_indptr,
+            sub_vertical_indices=sv_indices,
+            stage_names=stages.names(),
+            stage_idx=np.asarray(stage_idx, dtype=np.int64),
+        )
+
+
+def load_feature_matrix_from_db(
+    db_path: str = DEFAULT_DB_PATH,
+    table_name: str = "companies",
+) -> FeatureMatrix:
+    """
+    Build a FeatureMatrix from the `features` JSON column written by save_to_db,
+    in company_key order (rowid order is just insertion order), so ties rank
+    like run_top_k.
+    """
+    conn = connect(db_path)
+    try:
+        rows = conn.execute(
+            f"SELECT company_key, company_name, features FROM {table_name} ORDER BY company_key"
+        ).fetchall()
+    finally:
+        conn.close()
+
+    return FeatureMatrix.from_features(
+        [r[0] for r in rows],
+        [r[1] for r in rows],
+        (json.loads(r[2]) for r in rows),
+    )
+
+
+def load_feature_matrix_from_raw(path: str | Path) -> FeatureMatrix:
+    """Build a FeatureMatrix from a fetch_harmonic_raw output file (same filtering as run_from_raw)."""
+    from src.merlin.enrichment.harmonic import map_company_to_harmonic_enrichment
+    from src.merlin.features import build_features
+    from src.merlin.keys import canonical_domain
+    from src.merlin.models import RawCompany
+
+    with Path(path).open("r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    keys: List[str] = []
+    names: List[str] = []
+    features: List[FeatureVector] = []
+    for row in data:
+        harmonic_raw = row.get("harmonic_raw")
+        if not (harmonic_raw and harmonic_raw.get("companyFound") and harmonic_raw.get("company") is not None):
+            continue
+        rc = RawCompany(**(row.get("raw_company") or {}))
+        he = map_company_to_harmonic_enrichment(harmonic_raw["company"])
+        keys.append(canonical_domain(he.website_domain or rc.domain))
+        names.append(rc.name)
+        features.append(build_features(rc, he))
+
+    return FeatureMatrix.from_features(keys, names, features)
+
+
+def _sample_row(values: Sequence[float]) -> np.ndarray:
+    """One weight config as a (1, n) sample row."""
+    return np.asarray([list(values)], dtype=np.float64).reshape(1, -1)
+
+
+@dataclass
+class WeightArrays:
+    """
+    Weights aligned to one FeatureMatrix's vocabularies, with a leading sample axis S.
+    S == 1 for a single config; the sensitivity engine stacks thousands of perturbed ones.
+    """
+    composite: np.ndarray  # (S, 3) team, market, funding
+    flag_weights: np.ndarray  # (S, F)
+    headcount_bonus: np.ndarray  # (S, T) aligned with HEADCOUNT_TIERS
+    vertical_weights: np.ndarray  # (S, V)
+    sub_vertical_weights: np.ndarray  # (S, SV)
+    smb_bonus: np.ndarray  # (S,)
+    stage_base: np.ndarray  # (S, K) aligned with FeatureMatrix.stage_names
+    bracket_bonus: np.ndarray  # (S, B + 1), last column = 0 (above every bracket)
+    bracket_bounds: Tuple[float, ...]
+    max_score: float
+
+    @property
+    def samples(self) -> int:
+        return self.composite.shape[0]
+
+    @classmethod
+    def from_compiled(cls, fm: FeatureMatrix, cfg: Optional[CompiledScoring] = None) -> "WeightArrays":
+        cfg = cfg or current_scoring()
+
+        return cls(
+            composite=_sample_row(cfg.composite),
+            flag_weights=_sample_row(cfg.flag_weights),
+            headcount_bonus=_sample_row([bonus for _, _, _, bonus in cfg.headcount_tiers]),
+            vertical_weights=_sample_row([cfg.vertical_weight(v) for v in fm.vertical_names]),
+            sub_vertical_weights=_sample_row([cfg.sub_vertical_weight(v) for v in fm.sub_vertical_names]),
+            smb_bonus=np.asarray([cfg.smb_bonus], dtype=np.float64),
+            stage_base=_sample_row(
+                [
+                    cfg.stage_base[cfg.stage_ids[s]] if s in cfg.stage_ids else 0.0
+                    for s in fm.stage_names
+                ]
+            ),
+            bracket_bonus=_sample_row(list(cfg.bracket_bonus) + [0.0]),
+            bracket_bounds=tuple(cfg.bracket_bounds),
+            max_score=cfg.max_score,
+        )
+
+    def take(self, idx: slice | np.ndarray) -> "WeightArrays":
+        """Subset of samples."""
+        return WeightArrays(
+            composite=self.composite[idx],
+            flag_weights=self.flag_weights[idx],
+            headcount_bonus=self.headcount_bonus[idx],
+            vertical_weights=self.vertical_weights[idx],
+            sub_vertical_weights=self.sub_vertical_weights[idx],
+            smb_bonus=self.smb_bonus[idx],
+            stage_base=self.stage_base[idx],
+            bracket_bonus=self.bracket_bonus[idx],
+            bracket_bounds=self.bracket_bounds,
+            max_score=self.max_score,
+        )
+
+
+def _headcount_tiers(fm: FeatureMatrix) -> np.ndarray:
+    hc = fm.headcount
+    cols = [
+        (hc >= bound) if inclusive else (hc > bound)
+        for bound, inclusive in HEADCOUNT_TIERS.values()
+    ]
+    return np.stack(cols, axis=1).astype(np.float64)
+
+
+def _best_of(indptr: np.ndarray, indices: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """
+    Per-row max of weights over each company's ids (0 for companies with none).
+    weights: (S, V) -> (S, N). Weights are validated >= 0, so 0 is a safe floor.
+    """
+    s = weights.shape[0]
+    n = len(indptr) - 1
+    out = np.zeros((s, n), dtype=np.float64)
+    if len(indices) == 0:
+        return out
+
+    starts = indptr[:-1]
+    nonempty = indptr[1:] > starts
+    vals = weights[:, indices]  # (S, nnz)
+    out[:, nonempty] = np.maximum.reduceat(vals, starts[nonempty], axis=1)
+    return out
+
+
+def score_matrix(fm: FeatureMatrix, w: WeightArrays) -> Dict[str, np.ndarray]:
+    """
+    Score every company under every weight sample.
+    Returns {"team", "market", "funding", "total"} arrays of shape (S, N), unrounded.
+    Mirrors scoring.py term for term.
+    """
+    max_score = w.max_score
+
+    # team: founder signals + headcount tiers
+    team = w.flag_weights @ fm.flags.T.astype(np.float64)  # (S, N)
+    team += w.headcount_bonus @ _headcount_tiers(fm).T
+    np.clip(team, 0.0, max_score, out=team)
+
+    # market: best vertical + best sub-vertical + SMB, only for North America
+    market = _best_of(fm.vertical_indptr, fm.vertical_indices, w.vertical_weights)
+    market += _best_of(fm.sub_vertical_indptr, fm.sub_vertical_indices, w.sub_vertical_weights)
+    market += np.outer(w.smb_bonus, fm.smb.astype(np.float64))
+    np.clip(market, 0.0, max_score, out=market)
+    market *= fm.north_america
+
+    # funding: stage base + first matching bracket
+    bracket_idx = np.searchsorted(np.asarray(w.bracket_bounds, dtype=np.float64), fm.funding_total, side="left")
+    funding = w.stage_base[:, fm.stage_idx] + w.bracket_bonus[:, bracket_idx]
+    np.clip(funding, 0.0, max_score, out=funding)
+
+    c = w.composite
+    total = c[:, 0:1] * team + c[:, 1:2] * market + c[:, 2:3] * funding
+
+    return {"team": team, "market": market, "funding": funding, "total": total}
+
+
+def _rank_order(total: np.ndarray) -> np.ndarray:
+    """Rows best first, on totals rounded like scoring.py (so float noise cannot split a tie); ties: input order."""
+    return np.argsort(-np.round(total, 2), kind="stable")
+
+
+def top_k(fm: FeatureMatrix, cfg: Optional[CompiledScoring] = None, k: int = 100) -> Dict[str, np.ndarray]:
+    """
+    Re-score every company under one config and return the best `k`, best first:
+    {"idx" (rows of fm), "team", "market", "funding", "total"} (interactive
+    re-ranking in the app). Ties keep input order: file order for
+    load_feature_matrix_from_raw (the cut at k matches TopKCollector over that
+    file), company_key order for load_feature_matrix_from_db (matches run_top_k).
+    """
+    scores = score_matrix(fm, WeightArrays.from_compiled(fm, cfg))
+    total = scores["total"][0]
+    # a full stable sort: argpartition would pick an arbitrary subset of the companies tied at the k-th score
+    idx = _rank_order(total)[:k]
+    out = {name: arr[0, idx] for name, arr in scores.items()}
+    out["idx"] = idx
+    return out
+
+
+def ranks(total: np.ndarray) -> np.ndarray:
+    """1-based rank of every company by total (ties: input order)."""
+    order = _rank_order(total)
+    out = np.empty(len(total), dtype=np.int64)
+    out[order] = np.arange(1, len(total) + 1)
+    return out
@@ -0,0 +1,228 @@
+# hash partitioning of a run across nodes (`--shard i/N`) and merging shard DBs back into one
+from __future__ import annotations
+
+import argparse
+import hashlib
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+from src.merlin.db import DEFAULT_DB_PATH, connect
+from src.merlin.history import finish_run, start_run
+from src.merlin.keys import canonical_domain
+from src.merlin.leaderboard import DEFAULT_TOP_K, format_entries, run_top_k
+from src.merlin.save_to_db import COMPANY_COLUMNS, upsert_company_rows
+from src.merlin.scoring.attribution import copy_attributions
+
+
+def shard_of(key: str, count: int) -> int:
+    """Stable across processes, hosts and Python versions (unlike hash())."""
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % count
+
+
+@dataclass(frozen=True)
+class Shard:
+    """
+    Shard `index` of `count` (0-based). A company belongs to the shard of its
+    sourced domain's canonical key, so enrichment and scoring of the same CSV
+    partition identically and shard i's raw file is exactly shard i's input.
+    """
+    index: int
+    count: int
+
+    @classmethod
+    def parse(cls, spec: str) -> "Shard":
+        """ "2/8" -> Shard(2, 8) """
+        try:
+            index, count = (int(part) for part in spec.split("/"))
+        except ValueError:
+            raise ValueError(f"shard must look like i/N, got {spec!r}") from None
+        if not 0 <= index < count:
+            raise ValueError(f"shard index must be in 0..{count - 1}, got {spec!r}")
+        return cls(index, count)
+
+    def owns(self, domain: Optional[str]) -> bool:
+        return shard_of(canonical_domain(domain), self.count) == self.index
+
+    def path(self, path: str | Path) -> Path:
+        """ "outputs/raw.json" -> "outputs/raw.shard-2-of-8.json" """
+        path = Path(path)
+        return path.with_name(f"{path.stem}.shard-{self.index}-of-{self.count}{path.suffix}")
+
+    def __str__(self) -> str:
+        return f"{self.index}/{self.count}"
+
+
+def shard_arg(spec: str) -> Shard:
+    """argparse `type=` for --shard."""
+    try:
+        return Shard.parse(spec)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e)) from None
+
+
+# --- Merge ---
+def _latest_run(db_path: str) -> tuple[int, Optional[str]]:
+    if not Path(db_path).is_file():
+        raise ValueError(f"{db_path}: no such shard DB")
+    conn = connect(db_path)
+    try:
+        row = conn.execute(
+            "SELECT run_id, scoring_version FROM runs WHERE status = 'done' ORDER BY run_id DESC LIMIT 1"
+        ).fetchone()
+    finally:
+        conn.close()
+    if row is None:
+        raise ValueError(f"{db_path}: no finished run to merge")
+    return row
+
+
+def merge_shards(shard_dbs: Sequence[str], db_path: str = DEFAULT_DB_PATH) -> int:
+    """
+    Combine the latest finished run of every shard DB into `db_path` as one new run:
+    companies (UPSERT, so child tables / search index follow), the run's
+    score_history snapshot and the attribution tables. Returns the new run id.
+
+    Shards only hold disjoint companies if their inputs were partitioned by the
+    same Shard spec; a company key scored by two shards keeps the later shard's row.
+    """
+    runs = [_latest_run(path) for path in shard_dbs]
+    versions = {version for _, version in runs}
+    if len(versions) > 1:
+        raise ValueError(f"shards were scored with different configs: {sorted(map(str, versions))}")
+
+    run_id = start_run(db_path, source="shards:" + ",".join(shard_dbs), scoring_version=versions.pop())
+    columns = ", ".join(COMPANY_COLUMNS)
+    rows = 0
+    conn = connect(db_path)
+    try:
+        # one transaction per shard: ATTACH is not allowed inside a transaction, and
+        # the run stays 'running' (invisible to "latest run" readers) until the end
+        for path, (shard_run, _) in zip(shard_dbs, runs):
+            conn.execute("ATTACH DATABASE ? AS shard", (path,))
+            try:
+                with conn:
+                    upsert_company_rows(
+                        conn,
+                        conn.execute(
+                            f"SELECT {columns} FROM shard.companies WHERE company_key IN "
+                            "(SELECT company_key FROM shard.score_history WHERE run_id = ?)",
+                            (shard_run,),
+                        ),
+                    )
+                    rows += conn.execute(
+                        "INSERT OR REPLACE INTO score_history "
+                        "(run_id, company_key, score_team, score_market, score_funding, score_total) "
+                        "SELECT ?, company_key, score_team, score_market, score_funding, score_total "
+                        "FROM shard.score_history WHERE run_id = ?",
+                        (run_id, shard_run),
+                    ).rowcount
+                    copy_attributions(conn, "shard")
+            finally:
+                conn.execute("DETACH DATABASE shard")
+    except BaseException:
+        conn.close()
+        finish_run(run_id, db_path, status="failed")
+        raise
+    conn.close()
+    finish_run(run_id, db_path, companies=rows)
+    return run_id
+
+
+def print_run_leaderboard(run_id: int, db_path: str, top_k: int, title: str) -> None:
+    conn = connect(db_path)
+    try:
+        total = conn.execute("SELECT companies FROM runs WHERE run_id = ?", (run_id,)).fetchone()[0] or 0
+    finally:
+        conn.close()
+    entries = run_top_k(run_id, db_path, top_k)
+    print(format_entries(entries, title, dropped=total - len(entries), k=top_k))
+
+
+# --- Local runner ---
+def _run_step(name: str, commands: List[List[str]], logs: List[Path]) -> None:
+    """One process per shard, all at once; each logs to its own file."""
+    started = time.monotonic()
+    procs = []
+    for cmd, log in zip(commands, logs):
+        log.parent.mkdir(parents=True, exist_ok=True)
+        with log.open("w", encoding="utf-8") as f:
+            procs.append(subprocess.Popen(cmd, stdout=f, stderr=subprocess.STDOUT))
+    failed = [log for proc, log in zip(procs, logs) if proc.wait() != 0]
+    if failed:
+        raise SystemExit(f"{name} failed on {len(failed)} shard(s); see {', '.join(map(str, failed))}")
+    print(f"{name}: {len(commands)} shard(s) in {time.monotonic() - started:.1f}s")
+
+
+def run_local(
+    count: int,
+    *,
+    raw: Optional[str] = None,
+    csv: Optional[str] = None,
+    db_path: str = DEFAULT_DB_PATH,
+    top_k: int = DEFAULT_TOP_K,
+) -> int:
+    """
+    N local processes standing in for N nodes: optionally `merlin fetch --shard`
+    (with `csv`), then `merlin score --shard`, then merge into `db_path`.
+    """
+    from src.merlin.enrichment.fetch_harmonic_raw import DEFAULT_OUT_PATH
+
+    shards = [Shard(i, count) for i in range(count)]
+    merlin = [sys.executable, "-m", "src.merlin.cli"]
+
+    def logs(step: str) -> List[Path]:
+        # data/merlin_scores.score.shard-0-of-4.log, ...
+        return [s.path(Path(db_path).with_suffix(f".{step}.log")) for s in shards]
+
+    if csv is not None:
+        _run_step(
+            "fetch",
+            [merlin + ["fetch", "--shard", str(s), "--csv", csv, "--db", db_path] for s in shards],
+            logs("fetch"),
+        )
+    raw_paths = [str(s.path(DEFAULT_OUT_PATH)) if csv is not None else raw or DEFAULT_OUT_PATH for s in shards]
+    _run_step(
+        "score",
+        [
+            merlin + ["score", "--shard", str(s), "--raw", path, "--db", db_path, "--top-k", str(top_k)]
+            for s, path in zip(shards, raw_paths)
+        ],
+        logs("score"),
+    )
+    return merge_shards([str(s.path(db_path)) for s in shards], db_path)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Split a run across nodes by company hash, and merge the shards")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="merged DB; shard DBs are named after it")
+    parser.add_argument("--top-k", type=int, default=DEFAULT_TOP_K, help="global leaderboard size")
+    sub = parser.add_subparsers(dest="action", required=True)
+
+    p = sub.add_parser("merge", help="combine shard DBs (from `merlin score --shard i/N`) into --db")
+    p.add_argument("shard_dbs", nargs="+")
+
+    p = sub.add_parser("run", help="run every shard as a local process, then merge")
+    p.add_argument("--shards", type=int, required=True)
+    source = p.add_mutually_exclusive_group()
+    source.add_argument("--raw", default=None, help="raw Harmonic file; each shard scores its part")
+    source.add_argument("--csv", default=None, help="also enrich: each shard fetches its part of the CSV first")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.action == "merge":
+            run_id = merge_shards(args.shard_dbs, args.db)
+        else:
+            run_id = run_local(args.shards, raw=args.raw, csv=args.csv, db_path=args.db, top_k=args.top_k)
+    except ValueError as e:
+        raise SystemExit(str(e)) from None
+    print_run_leaderboard(run_id, args.db, args.top_k, f"\n=== Global leaderboard (run {run_id}) ===")
+    print(f"\nMerged into {args.db} as run {run_id}")
+
+
+if __name__ == "__main__":
+    main()
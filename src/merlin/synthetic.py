@@ -0,0 +1,464 @@
+# synthetic Harmonic payloads (same shape as fetch_harmonic_raw output) for scale testing
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import random
+import re
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from src.merlin.enrichment.http_metrics import RequestEvent, RequestHook
+
+DEFAULT_SOURCE = "outputs/harmonic_raw_graphql_final.json"
+
+# Generic name pools. Founder names / emails / LinkedIn URLs are never copied from the source file.
+_FIRST_NAMES = [
+    "Alex", "Sam", "Jordan", "Taylor", "Morgan", "Casey", "Riley", "Jamie", "Avery", "Quinn",
+    "Priya", "Wei", "Diego", "Amara", "Noah", "Lena", "Omar", "Sofia", "Kenji", "Maya",
+]
+_LAST_NAMES = [
+    "Smith", "Lee", "Garcia", "Patel", "Kim", "Nguyen", "Brown", "Chen", "Khan", "Rossi",
+    "Okafor", "Silva", "Cohen", "Novak", "Ito", "Moreau", "Larsen", "Haddad", "Reyes", "Park",
+]
+_SYLLABLES = [
+    "ka", "lo", "ve", "ri", "no", "sa", "te", "mi", "qua", "zen", "bra", "fi", "ly", "or",
+    "pex", "tal", "co", "dex", "ar", "vo", "nu", "mo", "ti", "ra",
+]
+_TLDS = [".com", ".ai", ".io", ".co", ".xyz"]
+
+_TRACTION_KEYS = [
+    "headcountAdvisor",
+    "facebookFollowerCount",
+    "linkedinFollowerCount",
+    "instagramFollowerCount",
+    "twitterFollowerCount",
+]
+
+
+def _rate(values: List[Any]) -> float:
+    """Fraction of values that are None."""
+    return sum(v is None for v in values) / len(values) if values else 1.0
+
+
+def _present(values: List[Any]) -> List[Any]:
+    return [v for v in values if v is not None]
+
+
+@dataclass
+class HarmonicProfile:
+    """
+    Field distributions learned from a real fetch_harmonic_raw file:
+    vocabularies (with frequencies), list-length distributions, numeric samples
+    and null rates. Generation samples from these; nothing else is hard-coded.
+    """
+    found_rate: float = 1.0
+
+    # raw (CSV) side
+    raw_stages: List[str] = field(default_factory=list)
+    raw_industries: List[str] = field(default_factory=list)
+    raw_descriptions: List[str] = field(default_factory=list)
+
+    # categorical pools (sampling from a list with repeats == sampling by frequency)
+    customer_types: List[Optional[str]] = field(default_factory=list)
+    stages: List[Optional[str]] = field(default_factory=list)
+    locations: List[Dict[str, Any]] = field(default_factory=list)
+    granularities: List[Optional[str]] = field(default_factory=list)
+    tags: List[Tuple[str, str]] = field(default_factory=list)
+    tags_v2: Dict[str, List[str]] = field(default_factory=dict)  # type -> display values
+    highlights: List[Tuple[str, str]] = field(default_factory=list)
+    founder_highlight_categories: List[str] = field(default_factory=list)
+    investors: List[str] = field(default_factory=list)
+    titles: List[str] = field(default_factory=list)
+    role_types: List[str] = field(default_factory=list)
+    schools: List[str] = field(default_factory=list)
+    sentences: List[str] = field(default_factory=list)
+
+    # list-length distributions
+    n_founders: List[int] = field(default_factory=list)
+    n_tags: List[int] = field(default_factory=list)
+    n_tags_v2: Dict[str, List[int]] = field(default_factory=dict)
+    n_highlights: List[int] = field(default_factory=list)
+    n_investors: List[int] = field(default_factory=list)
+    n_founder_highlights: List[int] = field(default_factory=list)
+    n_emails: List[int] = field(default_factory=list)
+    n_experience: List[int] = field(default_factory=list)
+
+    # numeric samples (non-null) + null rates
+    funding_totals: List[float] = field(default_factory=list)
+    headcounts: List[int] = field(default_factory=list)
+    funding_rounds: List[int] = field(default_factory=list)
+    web_traffic: List[int] = field(default_factory=list)
+    founding_years: List[int] = field(default_factory=list)
+    last_funding_years: List[int] = field(default_factory=list)
+    traction: Dict[str, List[float]] = field(default_factory=dict)
+    null_rates: Dict[str, float] = field(default_factory=dict)
+
+    @classmethod
+    def learn(cls, records: List[Dict[str, Any]]) -> "HarmonicProfile":
+        p = cls()
+        companies: List[Dict[str, Any]] = []
+        for row in records:
+            raw = row.get("raw_company") or {}
+            p.raw_stages.append(raw.get("stage") or "")
+            p.raw_industries.append(raw.get("industry") or "")
+            if raw.get("description"):
+                p.raw_descriptions.append(raw["description"])
+            hr = row.get("harmonic_raw")
+            if hr and hr.get("companyFound") and hr.get("company") is not None:
+                companies.append(hr["company"])
+        if not companies:
+            raise ValueError("source file has no Harmonic companies to learn from")
+
+        p.found_rate = len(companies) / len(records)
+        tag_counts: List[Counter[str]] = []
+
+        fundings = [c.get("funding") or {} for c in companies]
+        p.customer_types = [c.get("customerType") for c in companies]
+        p.stages = [c.get("stage") for c in companies]
+        p.locations = [c.get("location") or {} for c in companies]
+        p.granularities = [(c.get("foundingDate") or {}).get("granularity") for c in companies]
+
+        for c in companies:
+            tags = c.get("tags") or []
+            p.n_tags.append(len(tags))
+            p.tags.extend((t.get("displayValue") or "", t.get("type") or "") for t in tags)
+
+            by_type: Counter[str] = Counter()
+            for t in c.get("tagsV2") or []:
+                t_type = t.get("type") or ""
+                p.tags_v2.setdefault(t_type, []).append(t.get("displayValue") or "")
+                by_type[t_type] += 1
+            tag_counts.append(by_type)
+
+            hl = c.get("highlights") or []
+            p.n_highlights.append(len(hl))
+            p.highlights.extend((h.get("category") or "", h.get("text") or "") for h in hl)
+
+            employees = c.get("employees") or []
+            p.n_founders.append(len(employees))
+            for emp in employees:
+                fh = emp.get("highlights") or []
+                p.n_founder_highlights.append(len(fh))
+                p.founder_highlight_categories.extend(h.get("category") or "" for h in fh)
+                p.n_emails.append(len(((emp.get("contact") or {}).get("emails")) or []))
+                exp = emp.get("experience") or []
+                p.n_experience.append(len(exp))
+                p.titles.extend(e.get("title") or "" for e in exp if e.get("title"))
+                p.role_types.extend(e.get("roleType") or "" for e in exp if e.get("roleType"))
+                p.schools.extend(
+                    ((ed.get("school") or {}).get("name") or "")
+                    for ed in emp.get("education") or []
+                    if (ed.get("school") or {}).get("name")
+                )
+
+            desc = c.get("description")
+            if desc:
+                p.sentences.extend(s.strip() for s in re.split(r"(?<=[.!?])\s+", desc) if s.strip())
+
+        p.n_tags_v2 = {t_type: [tc.get(t_type, 0) for tc in tag_counts] for t_type in p.tags_v2}
+
+        for f in fundings:
+            inv = f.get("investors") or []
+            p.n_investors.append(len(inv))
+            p.investors.extend(i.get("name") or i.get("fullName") or "" for i in inv)
+
+        totals = [f.get("fundingTotal") for f in fundings]
+        headcounts = [c.get("headcount") for c in companies]
+        rounds = [f.get("numFundingRounds") for f in fundings]
+        traffic = [c.get("webTraffic") for c in companies]
+        founded = [(c.get("foundingDate") or {}).get("date") for c in companies]
+        last_funding = [f.get("lastFundingAt") for f in fundings]
+        descriptions = [c.get("description") for c in companies]
+
+        p.funding_totals = _present(totals)
+        p.headcounts = _present(headcounts)
+        p.funding_rounds = _present(rounds)
+        p.web_traffic = _present(traffic)
+        p.founding_years = [int(d[:4]) for d in _present(founded)]
+        p.last_funding_years = [int(d[:4]) for d in _present(last_funding)]
+
+        for key in _TRACTION_KEYS:
+            values = [((c.get("tractionMetrics") or {}).get(key) or {}).get("latestMetricValue") for c in companies]
+            p.traction[key] = _present(values)
+            p.null_rates[f"traction.{key}"] = _rate(values)
+
+        p.null_rates.update(
+            {
+                "description": _rate(descriptions),
+                "fundingTotal": _rate(totals),
+                "headcount": _rate(headcounts),
+                "numFundingRounds": _rate(rounds),
+                "webTraffic": _rate(traffic),
+                "foundingDate": _rate(founded),
+                "lastFundingAt": _rate(last_funding),
+                "likelihoodOfBacking": _rate([c.get("likelihoodOfBacking") for c in companies]),
+            }
+        )
+        return p
+
+    @classmethod
+    def from_file(cls, path: str | Path = DEFAULT_SOURCE) -> "HarmonicProfile":
+        with Path(path).open("r", encoding="utf-8") as f:
+            return cls.learn(json.load(f))
+
+
+class SyntheticGenerator:
+    """
+    Deterministic stream of synthetic {raw_company, harmonic_raw} rows.
+    Same profile + seed -> same output, regardless of how many rows are taken.
+    """
+
+    def __init__(self, profile: HarmonicProfile, seed: int = 0) -> None:
+        self.p = profile
+        self.seed = seed
+
+    # --- small sampling helpers ---
+    @staticmethod
+    def _pick(rng: random.Random, pool: List[Any], default: Any = None) -> Any:
+        return rng.choice(pool) if pool else default
+
+    @staticmethod
+    def _null(rng: random.Random, rate: float) -> bool:
+        return rng.random() < rate
+
+    @staticmethod
+    def _draw(rng: random.Random, pool: List[Any], k: int) -> List[Any]:
+        """Up to k distinct values, drawn by frequency (so common values stay common)."""
+        return list(dict.fromkeys(rng.choice(pool) for _ in range(k))) if pool else []
+
+    @staticmethod
+    def _jitter(rng: random.Random, value: float, sigma: float = 0.35) -> float:
+        # multiplicative noise keeps the learned range / skew
+        return value * rng.lognormvariate(0.0, sigma)
+
+    def _name(self, rng: random.Random, i: int) -> str:
+        word = "".join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, 3)))
+        return f"{word.capitalize()} {i}"
+
+    def _description(self, rng: random.Random, name: str) -> Optional[str]:
+        if self._null(rng, self.p.null_rates.get("description", 0.0)) or not self.p.sentences:
+            return None
+        parts = rng.sample(self.p.sentences, k=min(len(self.p.sentences), rng.randint(1, 3)))
+        return f"{name} " + " ".join(parts)
+
+    def _founder(self, rng: random.Random, company: str, domain: str, idx: int) -> Dict[str, Any]:
+        first, last = rng.choice(_FIRST_NAMES), rng.choice(_LAST_NAMES)
+        full = f"{first} {last}"
+        categories = self._draw(
+            rng,
+            self.p.founder_highlight_categories,
+            self._pick(rng, self.p.n_founder_highlights, 0),
+        )
+        n_exp = max(1, self._pick(rng, self.p.n_experience, 1))
+        experience = [
+            {
+                "roleType": "FOUNDER" if j == 0 else self._pick(rng, self.p.role_types, "EMPLOYEE"),
+                "title": "Founder & CEO" if j == 0 else self._pick(rng, self.p.titles, "Engineer"),
+                "companyName": company if j == 0 else self._pick(rng, self.p.investors, "Acme"),
+            }
+            for j in range(n_exp)
+        ]
+        n_emails = self._pick(rng, self.p.n_emails, 0)
+        emails = [f"{first.lower()}{'.' + last.lower() if k else ''}@{domain}" for k in range(n_emails)]
+        return {
+            "entityUrn": f"urn:harmonic:person:synthetic-{self.seed}-{idx}",
+            "experience": experience,
+            "fullName": full,
+            "highlights": [{"category": c, "text": f"{c}, {full}: {company}"} for c in categories],
+            "socials": {"linkedin": {"url": f"https://linkedin.com/in/{first.lower()}-{last.lower()}-{idx}", "followerCount": None}},
+            "education": [
+                {"school": {"name": self._pick(rng, self.p.schools, "University")}, "degree": None}
+                for _ in range(rng.randint(0, 2))
+            ],
+            "contact": {"emails": emails, "phoneNumbers": []},
+        }
+
+    def _company(self, rng: random.Random, i: int, name: str, domain: str) -> Dict[str, Any]:
+        p = self.p
+        nr = p.null_rates
+
+        def num(pool: List[float], key: str, as_int: bool = True) -> Optional[float]:
+            if self._null(rng, nr.get(key, 0.0)) or not pool:
+                return None
+            v = self._jitter(rng, float(rng.choice(pool)))
+            return int(round(v)) if as_int else v
+
+        stage = self._pick(rng, p.stages)
+        funding_total = num(p.funding_totals, "fundingTotal")
+        founded_year = self._pick(rng, p.founding_years, 2023)
+        last_funding_year = self._pick(rng, p.last_funding_years, 2025)
+
+        tags_v2 = []
+        for t_type, counts in p.n_tags_v2.items():
+            for value in self._draw(rng, p.tags_v2.get(t_type) or [], self._pick(rng, counts, 0)):
+                tags_v2.append({"displayValue": value, "type": t_type})
+        rng.shuffle(tags_v2)
+
+        founder_offset = i * 8
+        founders = [
+            self._founder(rng, name, domain, founder_offset + j)
+            for j in range(self._pick(rng, p.n_founders, 1))
+        ]
+        employee_highlights = [
+            {"category": h["category"].upper().replace(" ", "_"), "text": h["text"]}
+            for f in founders
+            for h in f["highlights"]
+        ]
+
+        return {
+            "entityUrn": f"urn:harmonic:company:synthetic-{self.seed}-{i}",
+            "website": {"url": f"https://{domain}", "domain": domain},
+            "description": self._description(rng, name),
+            "foundingDate": None if self._null(rng, nr.get("foundingDate", 0.0)) else {
+                "date": f"{founded_year}-{rng.randint(1, 12):02d}-01T00:00:00Z",
+                "granularity": self._pick(rng, p.granularities, "YEAR"),
+            },
+            "funding": {
+                "fundingTotal": funding_total,
+                "fundingStage": stage,
+                "numFundingRounds": num(p.funding_rounds, "numFundingRounds"),
+                "lastFundingAt": None if self._null(rng, nr.get("lastFundingAt", 0.0)) else (
+                    f"{last_funding_year}-{rng.randint(1, 12):02d}-01T00:00:00Z"
+                ),
+                "investors": [
+                    {"name": inv}
+                    for inv in self._draw(rng, p.investors, self._pick(rng, p.n_investors, 0))
+                ],
+            },
+            "customerType": self._pick(rng, p.customer_types),
+            "headcount": num(p.headcounts, "headcount"),
+            "stage": stage,
+            "highlights": [
+                {"category": c, "text": t}
+                for c, t in (rng.choice(p.highlights) for _ in range(self._pick(rng, p.n_highlights, 0) if p.highlights else 0))
+            ],
+            "employeeHighlights": employee_highlights,
+            "location": dict(self._pick(rng, p.locations, {})),
+            "tags": [
+                {"displayValue": v, "type": t}
+                for v, t in (rng.choice(p.tags) for _ in range(self._pick(rng, p.n_tags, 0) if p.tags else 0))
+            ],
+            "tagsV2": tags_v2,
+            "tractionMetrics": {
+                key: {"latestMetricValue": num(p.traction.get(key) or [], f"traction.{key}")}
+                for key in _TRACTION_KEYS
+            },
+            "webTraffic": num(p.web_traffic, "webTraffic"),
+            "likelihoodOfBacking": None,
+            "employees": founders,
+        }
+
+    def row(self, i: int) -> Dict[str, Any]:
+        """The i-th synthetic row (random access; each row has its own RNG stream)."""
+        rng = random.Random(f"{self.seed}:{i}")
+        name = self._name(rng, i)
+        domain = f"{name.split()[0].lower()}{i}{rng.choice(_TLDS)}"
+
+        raw_company = {
+            "name": name,
+            "domain": domain,
+            "description": self._pick(rng, self.p.raw_descriptions, ""),
+            "stage": self._pick(rng, self.p.raw_stages, ""),
+            "industry": self._pick(rng, self.p.raw_industries, ""),
+        }
+
+        if rng.random() >= self.p.found_rate:
+            return {"raw_company": raw_company, "harmonic_raw": {"companyFound": False, "company": None}}
+
+        return {
+            "raw_company": raw_company,
+            "harmonic_raw": {"companyFound": True, "company": self._company(rng, i, name, domain)},
+        }
+
+    def rows(self, n: int, start: int = 0) -> Iterator[Dict[str, Any]]:
+        for i in range(start, start + n):
+            yield self.row(i)
+
+
+_ROW_INDEX = re.compile(r"(\d+)\.[a-z]+$")  # "kalo42.ai" -> 42 (see SyntheticGenerator.row)
+
+
+class SyntheticHarmonicClient:
+    """
+    Offline stand-in for HarmonicGraphQLClient: answers enrich_company_by_domain
+    for the domains of a synthetic CSV (write_synthetic_csv) from the same
+    generator, so the full CSV -> enrichment -> scoring path runs at any scale.
+    """
+
+    def __init__(self, generator: SyntheticGenerator, hook: Optional[RequestHook] = None) -> None:
+        self.generator = generator
+        self.hook = hook  # gets a RequestEvent per lookup, like the real clients' hooks
+
+    def enrich_company_by_domain(self, domain: str) -> Optional[Dict[str, Any]]:
+        t0 = time.perf_counter()
+        m = _ROW_INDEX.search(domain)
+        payload = self.generator.row(int(m.group(1)))["harmonic_raw"] if m else None
+        if self.hook is not None:
+            self.hook(
+                RequestEvent(
+                    client="synthetic",
+                    operation="enrichCompanyByIdentifiers",
+                    status=200,
+                    total_s=time.perf_counter() - t0,
+                    bytes_out=len(json.dumps({"identifiers": {"websiteDomain": domain}})),
+                    bytes_in=len(json.dumps(payload)),
+                )
+            )
+        return payload
+
+
+# --- Writers (streamed: memory does not grow with n) ---
+def write_synthetic_raw_json(path: str | Path, n: int, generator: SyntheticGenerator) -> Path:
+    """Write n rows as a JSON array, same shape as outputs/harmonic_raw_graphql_final.json."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8") as f:
+        f.write("[")
+        for i, row in enumerate(generator.rows(n)):
+            f.write(",\n" if i else "\n")
+            f.write(json.dumps(row))
+        f.write("\n]\n")
+    return path
+
+
+def write_synthetic_csv(path: str | Path, n: int, generator: SyntheticGenerator) -> Path:
+    """Write the raw_company side of n rows in the case study CSV layout (for load_companies_from_csv)."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(["", "", "", "", "", ""])
+        w.writerow(["", "Synthetic", "", "", "", ""])
+        w.writerow(["", "Name", "Description", "URL", "Industry", "Stage"])
+        for row in generator.rows(n):
+            rc = row["raw_company"]
+            w.writerow(["", rc["name"], rc["description"], rc["domain"], rc["industry"], rc["stage"]])
+    return path
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Generate synthetic Harmonic payloads for scale testing")
+    parser.add_argument("-n", "--num-companies", type=int, required=True)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--source", default=DEFAULT_SOURCE, help="real raw file to learn distributions from")
+    parser.add_argument("--json", dest="json_path", default=None, help="output raw JSON path")
+    parser.add_argument("--csv", dest="csv_path", default=None, help="output CSV path")
+    args = parser.parse_args(argv)
+
+    if not args.json_path and not args.csv_path:
+        parser.error("pass --json and/or --csv")
+
+    gen = SyntheticGenerator(HarmonicProfile.from_file(args.source), seed=args.seed)
+    if args.json_path:
+        print(f"Wrote {write_synthetic_raw_json(args.json_path, args.num_companies, gen)}")
+    if args.csv_path:
+        print(f"Wrote {write_synthetic_csv(args.csv_path, args.num_companies, gen)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+# local stand-in for a Slack incoming webhook (outbox / notification testing without Slack)
+from __future__ import annotations
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+
+class WebhookStub:
+    """
+    Records every POST and answers like Slack ("ok" / 200).
+
+    fail_first: answer the first N requests with `fail_status` (retry testing)
+    delay_s: sleep before answering (slow-webhook testing)
+    Requests whose Idempotency-Key was already answered 200 are recorded as duplicates.
+
+        with WebhookStub(fail_first=2) as stub:
+            os.environ["MERLIN_SLACK_WEBHOOK_URL"] = stub.url
+            ...
+            stub.received  # [{"key": ..., "payload": {...}, "status": 200}, ...]
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        *,
+        fail_first: int = 0,
+        fail_status: int = 500,
+        delay_s: float = 0.0,
+    ) -> None:
+        self.fail_first = fail_first
+        self.fail_status = fail_status
+        self.delay_s = delay_s
+        self.received: List[Dict[str, Any]] = []
+        self.duplicates = 0
+        self._delivered_keys: set[str] = set()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/services/stub"
+
+    def _handler(self) -> type[BaseHTTPRequestHandler]:
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self) -> None:  # noqa: N802 (http.server naming)
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                if stub.delay_s:
+                    time.sleep(stub.delay_s)
+                key = self.headers.get("Idempotency-Key")
+                with stub._lock:
+                    status = stub.fail_status if stub.fail_first > 0 else 200
+                    if stub.fail_first > 0:
+                        stub.fail_first -= 1
+                    if status == 200 and key:
+                        if key in stub._delivered_keys:
+                            stub.duplicates += 1
+                        stub._delivered_keys.add(key)
+                    try:
+                        payload = json.loads(body or b"null")
+                    except ValueError:
+                        payload = body.decode("utf-8", "replace")
+                    stub.received.append({"key": key, "payload": payload, "status": status})
+
+                reply = b"ok" if status == 200 else b"server_error"
+                self.send_response(status)
+                self.send_header("Content-Type", "text/plain")
+                self.send_header("Content-Length", str(len(reply)))
+                self.end_headers()
+                self.wfile.write(reply)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        return Handler
+
+    def start(self) -> "WebhookStub":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="webhook-stub", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "WebhookStub":
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+    def delivered(self) -> List[Dict[str, Any]]:
+        """Payloads answered 200, in arrival order."""
+        return [r["payload"] for r in self.received if r["status"] == 200]
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Local Slack webhook stub")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--fail-first", type=int, default=0)
+    parser.add_argument("--fail-status", type=int, default=500)
+    parser.add_argument("--delay", type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    stub = WebhookStub(port=args.port, fail_first=args.fail_first, fail_status=args.fail_status, delay_s=args.delay)
+    print(f"Webhook stub listening on {stub.url}  (export MERLIN_SLACK_WEBHOOK_URL={stub.url})")
+    seen = 0
+    with stub:
+        try:
+            while True:
+                time.sleep(0.5)
+                for r in stub.received[seen:]:
+                    text = r["payload"].get("text", "") if isinstance(r["payload"], dict) else r["payload"]
+                    print(f"[{r['status']}] key={r['key']} {str(text)[:120]!r}")
+                seen = len(stub.received)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
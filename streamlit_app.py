@@ -1,39 +1,55 @@
 # simple front end for presentation
 from __future__ import annotations
 
-import json
+import re
+import threading
+import time
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import List, Any
+from typing import Any, Dict, List, Optional
 
+import numpy as np
 import pandas as pd
 import streamlit as st
 
-from dotenv import load_dotenv  # NEW
-
-from src.merlin.models import (
-    RawCompany,
-    HarmonicEnrichment,
-    ScoredCompanyRecord,
+from dotenv import load_dotenv
+
+from src.merlin.notify import SlackOutboxWorker
+from src.merlin.db import DEFAULT_DB_PATH
+from src.merlin.queries import (
+    SORT_COLUMNS,
+    browse_companies,
+    count_companies,
+    filter_options,
+    latest_run,
+    search_companies,
 )
-from src.merlin.enrichment.harmonic import map_company_to_harmonic_enrichment
-from src.merlin.scoring.calculate_score import process_company
-from src.merlin.save_to_db import (
-    scored_companies_to_df,
-    save_scores_to_db,          # NEW
+from src.merlin.scoring.config import (
+    COMPOSITE_KEYS,
+    SCORING_CONFIG_ENV,
+    CompiledScoring,
+    ScoringConfig,
+    ScoringConfigError,
+    ScoringConfigStore,
+    compile_scoring,
+    dump_scoring_config,
+    scoring_config_from_dict,
+    scoring_store,
 )
-from src.merlin.notify import send_results_to_slack  # NEW
-from src.merlin.scoring.weights import (
-    COMPOSITE_WEIGHTS,
-    TEAM_WEIGHTS,
-    VERTICAL_WEIGHTS,
-    SUB_VERTICAL_WEIGHTS,
-    STAGE_BASE_SCORES,
-    FUNDING_BONUS_BRACKETS,
-    MAX_SCORE,
+from src.merlin.scoring.vectorized import (
+    FeatureMatrix,
+    WeightArrays,
+    load_feature_matrix_from_db,
+    ranks,
+    score_matrix,
+    top_k,
 )
 
 load_dotenv()
 
+PROFILE_DIR = Path("data/scoring_profiles")  # tuned weight profiles saved from the app
+TUNING_TOP_K = 100
+
 
 def _extract_weight(v: Any):
     if isinstance(v, (int, float)):
@@ -46,43 +62,97 @@ def _extract_weight(v: Any):
     return None
 
 
-def load_raw_harmonic(path: Path) -> List[dict]:
-    with path.open("r", encoding="utf-8") as f:
-        return json.load(f)
+@st.cache_resource
+def slack_worker() -> SlackOutboxWorker:
+    """One outbox worker per Streamlit server, delivering in the background."""
+    return SlackOutboxWorker(DEFAULT_DB_PATH).start()
+
+
+class RecomputeJob:
+    """
+    One background re-score (run_from_raw) at a time per Streamlit server. The
+    page keeps reading the DB meanwhile; cached queries refresh when the run lands.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.started_at: Optional[str] = None
+        self.finished_at: Optional[str] = None
+        self.error: Optional[str] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, path: Path, worker: SlackOutboxWorker) -> bool:
+        """False if a recompute is already running."""
+        with self._lock:
+            if self.running:
+                return False
+            self.started_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+            self.finished_at = self.error = None
+            self._thread = threading.Thread(target=self._run, args=(path, worker), name="merlin-recompute", daemon=True)
+            self._thread.start()
+            return True
+
+    def _run(self, path: Path, worker: SlackOutboxWorker) -> None:
+        # heavy imports only when someone actually recomputes
+        from src.merlin.run_from_raw import run_from_raw
 
+        try:
+            run_from_raw(path, DEFAULT_DB_PATH, verbose=False)
+            worker.wake()
+        except Exception as e:
+            self.error = str(e)
+        finally:
+            self.finished_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
 
-def run_pipeline(path: Path) -> tuple[list[ScoredCompanyRecord], pd.DataFrame]:
-    if not path.is_file():
-        raise FileNotFoundError(
-            f"Input file not found: {path}. "
-            "Run your Harmonic fetch step first to create harmonic_raw_graphql_final.json."
-        )
 
-    data = load_raw_harmonic(path)
-    results: list[ScoredCompanyRecord] = []
+@st.cache_resource
+def recompute_job() -> RecomputeJob:
+    return RecomputeJob()
 
-    for row in data:
-        raw_company_dict = row.get("raw_company") or {}
-        harmonic_raw = row.get("harmonic_raw")
 
-        rc = RawCompany(**raw_company_dict)
+# --- Cached reads: keyed on the latest run id, so a new run invalidates them ---
+@st.cache_data(show_spinner=False, max_entries=256)
+def cached_page(run_id: int, filters: Dict[str, Any], sort: str, descending: bool, limit: int, after) -> Dict[str, Any]:
+    return browse_companies(
+        DEFAULT_DB_PATH, **filters, sort=sort, descending=descending, limit=limit, after=after, with_features=True
+    )
+
+
+COUNT_CAP = 10_000  # beyond this the page just says "10,000+"
 
-        if (
-            harmonic_raw
-            and harmonic_raw.get("companyFound")
-            and harmonic_raw.get("company") is not None
-        ):
-            company_json = harmonic_raw["company"]
-            he: HarmonicEnrichment = map_company_to_harmonic_enrichment(company_json)
-        else:
-            continue
 
-        scored = process_company(rc, he)
-        results.append(scored)
+@st.cache_data(show_spinner=False, max_entries=64)
+def cached_count(run_id: int, filters: Dict[str, Any]) -> int:
+    # a plain COUNT(*) is cheap; filtered counts visit every match, so they are capped
+    cap = COUNT_CAP + 1 if any(filters.values()) else None
+    return count_companies(DEFAULT_DB_PATH, **filters, cap=cap)
 
-    results.sort(key=lambda r: r.scores.total, reverse=True)
-    df = scored_companies_to_df(results)
-    return results, df
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def cached_filter_options(run_id: int) -> Dict[str, List[str]]:
+    return filter_options(DEFAULT_DB_PATH)
+
+
+@st.cache_resource(show_spinner="Loading feature matrix…", max_entries=2)
+def cached_feature_matrix(run_id: int) -> FeatureMatrix:
+    """Columnar features of every saved company; one shared copy per run."""
+    return load_feature_matrix_from_db(DEFAULT_DB_PATH)
+
+
+@st.cache_resource(max_entries=4)
+def cached_ranks(run_id: int, version: str, _cfg: CompiledScoring) -> np.ndarray:
+    """Ranks under the active scoring config, to show how tuning moves companies."""
+    fm = cached_feature_matrix(run_id)
+    return ranks(score_matrix(fm, WeightArrays.from_compiled(fm, _cfg))["total"][0])
+
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def cached_search(run_id: int, text: str, limit: int) -> List[Dict[str, Any]]:
+    return search_companies(text, db_path=DEFAULT_DB_PATH, limit=limit)
 
 
 def main():
@@ -92,6 +162,13 @@ def main():
         layout="wide",
     )
 
+    # Scoring config hot reload ($MERLIN_SCORING_CONFIG); the watcher thread is
+    # process-wide, the explicit check makes each rerun see the latest file.
+    store = scoring_store()
+    store.start_watching()
+    store.maybe_reload()
+    scoring_cfg = store.current().config
+
     # --- CSS ---
     st.markdown(
         """
@@ -159,73 +236,84 @@ def main():
           </ul>
           <p style="color:#9ca3af;">Use the leaderboard to identify companies that Core should be building relationships with.</p>
           <p style="color:#9ca3af;">Feel free to explore the Scoring Weights below. NOTE: The weights do not represent all scoring logic.</p>
-          <p>When you're ready for Merlin to do his thing click the <b>Run Scoring</b> button.</p>
+          <p>Scores below come from the latest scoring run; admins can recompute them from the raw Harmonic file.</p>
         </div>
         """,
         unsafe_allow_html=True,
     )
 
-    # --- Run Scoring ---
-    st.header("Run Merlin Scoring")
-    path_str = "outputs/harmonic_raw_graphql_final.json"
-    run_btn = st.button("🔮 Run Scoring")
-    st.markdown("---")
-
-    if run_btn:
-        path = Path(path_str)
-
-        try:
-            results, df = run_pipeline(path)
-        except Exception as e:
-            st.error(str(e))
-            return
+    # --- Latest Scores (read from the DB) ---
+    st.header("Merlin Scores")
+    run = latest_run(DEFAULT_DB_PATH) if Path(DEFAULT_DB_PATH).is_file() else None
+    run_id = run["run_id"] if run else 0
 
-        try:
-            send_results_to_slack(results)
-            save_scores_to_db(df)
-            st.success("Sent results to Slack and saved scores to the database.")
-        except Exception as e:
-            st.warning(f"Scoring ran, but Slack/DB step had an issue: {e}")
+    if run is None:
+        st.info("No saved scores yet. Use Admin → Recompute scores below.")
+    else:
+        st.caption(
+            f"Run #{run['run_id']} · {run['companies'] or 0:,} companies · finished {run['finished_at']}"
+        )
 
-        # --- Build Table Rows ---
+        # --- Leaderboard ---
         st.subheader("Company Leaderboard")
+        options = cached_filter_options(run_id)
+        f1, f2, f3 = st.columns(3)
+        sectors = f1.multiselect("Sector", options["sectors"])
+        stages = f2.multiselect("Stage", options["stages"])
+        location = f3.text_input("Location contains", placeholder="e.g. New York")
+        f4, f5, f6, f7 = st.columns([2, 3, 2, 1])
+        score_range = f4.slider("Total score", 0.0, 100.0, (0.0, 100.0), step=1.0)
+        signals = f5.multiselect("Founder signals (all required)", options["founder_signals"])
+        sort = f6.selectbox("Sort by", SORT_COLUMNS, format_func=lambda c: c.replace("score_", "").title() + " Score")
+        page_size = f7.selectbox("Page size", [25, 50, 100, 250], index=1)
+        descending = not st.toggle("Ascending", value=False)
+
+        filters: Dict[str, Any] = {
+            "sectors": tuple(sectors),
+            "stages": tuple(stages),
+            "location": location.strip() or None,
+            "min_score": score_range[0] if score_range[0] > 0 else None,
+            "max_score": score_range[1] if score_range[1] < 100 else None,
+            "founder_signals": tuple(signals),
+        }
 
-        table_rows: list[dict[str, Any]] = []
-        for r in results:
-            founders = r.founders or []
-            founder_names = [f.name for f in founders]
-            founder_links = [f.linkedin_url for f in founders if f.linkedin_url]
-            founder_emails = []
-            for f in founders:
-                if f.emails:
-                    founder_emails.extend(f.emails)
-
-            table_rows.append(
-                {
-                    "Company Name": r.name,
-                    "URL": r.website_url or "",
-                    "Description": (r.description or "").strip(),
-                    "Founders": ", ".join(founder_names),
-                    "Founder LinkedIn": ", ".join(founder_links),
-                    "Founder Emails": ", ".join(founder_emails),
-                    "Total Score": r.scores.total,
-                    "Team Score": r.scores.team,
-                    "Market Score": r.scores.market,
-                    "Funding Score": r.scores.funding,
-                }
-            )
-
-        slack_df = pd.DataFrame(table_rows)
-
+        # keyset pagination: one cursor per page visited, reset when the query changes
+        query_key = (run_id, tuple(filters.items()), sort, descending, page_size)
+        if st.session_state.get("browse_query") != query_key:
+            st.session_state["browse_query"] = query_key
+            st.session_state["browse_cursors"] = [None]
+        cursors: List[Any] = st.session_state["browse_cursors"]
+
+        page = cached_page(run_id, filters, sort, descending, page_size, cursors[-1])
+        total = cached_count(run_id, filters)
+
+        p1, p2, p3 = st.columns([1, 1, 6])
+        if p1.button("← Prev", disabled=len(cursors) == 1):
+            cursors.pop()
+            st.rerun()
+        if p2.button("Next →", disabled=page["next"] is None):
+            cursors.append(page["next"])
+            st.rerun()
+        shown = f"{COUNT_CAP:,}+" if any(filters.values()) and total > COUNT_CAP else f"{total:,}"
+        p3.caption(f"Page {len(cursors)} · {shown} matching companies")
+
+        board = pd.DataFrame(page["rows"])
         st.dataframe(
-            slack_df,
+            board.drop(columns=["company_key", "features"], errors="ignore"),
             use_container_width=True,
             column_config={
-                "URL": st.column_config.LinkColumn("URL"),
-                "Total Score": st.column_config.NumberColumn("Total Score", format="%.2f"),
-                "Team Score": st.column_config.NumberColumn("Team Score", format="%.2f"),
-                "Market Score": st.column_config.NumberColumn("Market Score", format="%.2f"),
-                "Funding Score": st.column_config.NumberColumn("Funding Score", format="%.2f"),
+                "company_name": "Company Name",
+                "website_url": st.column_config.LinkColumn("URL"),
+                "harmonic_stage": "Stage",
+                "location": "Location",
+                "description": "Description",
+                "founders": "Founders",
+                "founder_linkedin": "Founder LinkedIn",
+                "founder_emails": "Founder Emails",
+                "score_total": st.column_config.NumberColumn("Total Score", format="%.2f"),
+                "score_team": st.column_config.NumberColumn("Team Score", format="%.2f"),
+                "score_market": st.column_config.NumberColumn("Market Score", format="%.2f"),
+                "score_funding": st.column_config.NumberColumn("Funding Score", format="%.2f"),
             },
         )
 
@@ -236,8 +324,8 @@ def main():
             <div class="merlin-card">
             <ul>
                 <li>Scroll right to view the full score breakdown.</li>
-                <li>See the Feature Vector section below for underlying attributes.</li>
-                <li>This frontend is purely for exploration and visualization. It does not reflect what is being written to the database or sent to Slack.</li>
+                <li>Filters, sorting and paging run in the database; the Feature Vector section below shows the current page.</li>
+                <li>Scores are read from the latest saved scoring run; they refresh when a new run finishes.</li>
                 <li>Slack notifications contain a skim-friendly summary for partners.</li>
             </ul>
             </div>
@@ -249,25 +337,67 @@ def main():
 
         # --- Feature Vector Viewer ---
         with st.expander("🧬 Feature Vector (per company)"):
-            feature_rows: list[dict[str, Any]] = []
-            for r in results:
-                fv = getattr(r, "features", {}) or {}
-                row: dict[str, Any] = {"Company Name": r.name}
-                if isinstance(fv, dict):
-                    row.update(fv)
-                else:
-                    row["features"] = fv
-                feature_rows.append(row)
-
-            feature_df = pd.DataFrame(feature_rows)
-            st.dataframe(feature_df, use_container_width=True)
+            st.dataframe(
+                pd.DataFrame([{"company_name": r["company_name"], **r["features"]} for r in page["rows"]]),
+                use_container_width=True,
+            )
 
-        st.markdown("---")
+    # --- Admin: recompute (background) ---
+    with st.expander("🛠️ Admin"):
+        path_str = st.text_input("Raw Harmonic file", "outputs/harmonic_raw_graphql_final.json")
+        job = recompute_job()
+        if st.button("🔮 Recompute scores", disabled=job.running):
+            path = Path(path_str)
+            if not path.is_file():
+                st.error(
+                    f"Input file not found: {path}. "
+                    "Run your Harmonic fetch step first to create harmonic_raw_graphql_final.json."
+                )
+            elif job.start(path, slack_worker()):
+                st.success("Recompute started in the background; scores update when it finishes.")
+        if job.running:
+            st.info(f"Recompute running since {job.started_at}. Reload the page to pick up the new run.")
+        elif job.error:
+            st.error(f"Last recompute failed ({job.finished_at}): {job.error}")
+        elif job.finished_at:
+            st.caption(f"Last recompute finished {job.finished_at}; results go to Slack via the outbox.")
+
+    st.markdown("---")
+
+    # --- Search (saved scores) ---
+    st.header("Search Companies")
+    search_text = st.text_input(
+        "Keywords (descriptions, highlights, founder backgrounds)",
+        placeholder="e.g. payroll, construction lending, insur*",
+    )
+    if search_text:
+        if run is None:
+            st.info("No saved scores yet. Run scoring first.")
+        else:
+            hits = cached_search(run_id, search_text, 50)
+            if hits:
+                st.dataframe(
+                    pd.DataFrame(hits),
+                    use_container_width=True,
+                    column_config={
+                        "website_url": st.column_config.LinkColumn("URL"),
+                        "score_total": st.column_config.NumberColumn("Total Score", format="%.2f"),
+                        "relevance": st.column_config.NumberColumn("Relevance", format="%.2f"),
+                    },
+                )
+            else:
+                st.write("No matches.")
+    st.markdown("---")
 
     # ------------------------------
     # Scoring Weights Section
     # ------------------------------
     st.header("Scoring Weights")
+    st.caption(f"Scoring config version: `{store.version}`")
+    tuning = st.toggle(
+        "🎛️ Tune weights",
+        help="Edit weights and watch the latest run re-rank. Nothing changes until you save or apply a profile.",
+    )
     tab_comp, tab_team, tab_market, tab_funding = st.tabs(
         ["Composite", "Team", "Market", "Funding"]
     )
@@ -284,49 +414,146 @@ def main():
             ```
             """
         )
-        composite = {
-            "team": COMPOSITE_WEIGHTS.team,
-            "market": COMPOSITE_WEIGHTS.market,
-            "funding": COMPOSITE_WEIGHTS.funding,
-        }
-        st.json(composite)
+        if tuning:
+            cols = st.columns(len(COMPOSITE_KEYS))
+            raw = {
+                k: col.slider(k.title(), 0.0, 1.0, float(scoring_cfg.composite[k]), 0.05, key=f"tune_composite_{k}")
+                for k, col in zip(COMPOSITE_KEYS, cols)
+            }
+            norm = sum(raw.values()) or 1.0
+            composite = {k: v / norm for k, v in raw.items()}
+            st.caption("Normalized to sum to 1: " + " · ".join(f"{k} {v:.2f}" for k, v in composite.items()))
+        else:
+            st.json(scoring_cfg.composite)
+            composite = dict(scoring_cfg.composite)
 
     with tab_team:
-        rows = [
-            {"feature": k, "weight": _extract_weight(v)}
-            for k, v in TEAM_WEIGHTS.items()
-            if _extract_weight(v) is not None
-        ]
-        st.dataframe(
-            pd.DataFrame(rows).sort_values("weight", ascending=False),
-            use_container_width=True,
-        )
+        team = _weight_editor(scoring_cfg.team_weights, "feature", "tune_team", tuning)
+        headcount = _weight_editor(scoring_cfg.headcount_bonus, "headcount_tier", "tune_headcount", tuning)
 
     with tab_market:
-        vert_rows = [
-            {"vertical": k, "weight": _extract_weight(v)}
-            for k, v in VERTICAL_WEIGHTS.items()
-        ]
-        st.dataframe(pd.DataFrame(vert_rows).sort_values("weight", ascending=False))
-
-        sub_rows = [
-            {"sub_vertical": k, "weight": _extract_weight(v)}
-            for k, v in SUB_VERTICAL_WEIGHTS.items()
-        ]
-        st.dataframe(pd.DataFrame(sub_rows).sort_values("weight", ascending=False))
+        verticals = _weight_editor(scoring_cfg.vertical_weights, "vertical", "tune_verticals", tuning)
+        sub_verticals = _weight_editor(scoring_cfg.sub_vertical_weights, "sub_vertical", "tune_sub_verticals", tuning)
+        if tuning:
+            smb = st.number_input(
+                "SMB enablement bonus", min_value=0.0, value=float(scoring_cfg.smb_enablement_bonus), step=1.0
+            )
+        else:
+            smb = scoring_cfg.smb_enablement_bonus
+            st.write(f"**SMB Enablement Bonus:** {smb}")
 
     with tab_funding:
-        st.dataframe(
-            pd.DataFrame(
-                [{"stage": k, "base_score": v} for k, v in STAGE_BASE_SCORES.items()]
-            ),
-            use_container_width=True,
-        )
+        stages = _weight_editor(scoring_cfg.stage_base_scores, "stage", "tune_stages", tuning, sort=False)
         fb_df = pd.DataFrame(
-            [{"upper_bound": ub, "bonus": bonus} for (ub, bonus) in FUNDING_BONUS_BRACKETS]
+            [{"upper_bound": ub, "bonus": bonus} for (ub, bonus) in scoring_cfg.funding_bonus_brackets]
         )
-        st.dataframe(fb_df, use_container_width=True)
-        st.write(f"**Max Score Cap:** {MAX_SCORE}")
+        if tuning:
+            fb_df = st.data_editor(
+                fb_df, key="tune_brackets", use_container_width=True, hide_index=True, disabled=["upper_bound"]
+            )
+        else:
+            st.dataframe(fb_df, use_container_width=True)
+        st.write(f"**Max Score Cap:** {scoring_cfg.max_score}")
+
+    if tuning:
+        try:
+            tuned = scoring_config_from_dict(
+                {
+                    "composite": composite,
+                    "team_weights": team,
+                    "headcount_bonus": headcount,
+                    "vertical_weights": verticals,
+                    "sub_vertical_weights": sub_verticals,
+                    "smb_enablement_bonus": float(smb),
+                    "stage_base_scores": stages,
+                    "funding_bonus_brackets": [[float(r["upper_bound"]), float(r["bonus"])] for r in fb_df.to_dict("records")],
+                },
+                base=scoring_cfg,
+            )
+        except ScoringConfigError as e:
+            st.error(f"Invalid weights: {e}")
+            return
+        _tuned_leaderboard(run_id, tuned, store)
+
+
+def _weight_editor(
+    table: Dict[str, Any], name_col: str, key: str, editable: bool, *, sort: bool = True
+) -> Dict[str, float]:
+    """Read-only weight table, or an editable one (weights only) when tuning; returns the weights."""
+    rows = [
+        {name_col: k, "weight": _extract_weight(v)}
+        for k, v in table.items()
+        if _extract_weight(v) is not None
+    ]
+    df = pd.DataFrame(rows)
+    if sort and not df.empty:
+        df = df.sort_values("weight", ascending=False)
+    if not editable:
+        st.dataframe(df, use_container_width=True)
+        return {r[name_col]: r["weight"] for r in rows}
+    edited = st.data_editor(
+        df,
+        key=key,
+        use_container_width=True,
+        hide_index=True,
+        disabled=[name_col],
+        column_config={"weight": st.column_config.NumberColumn("weight", min_value=0.0, step=0.5)},
+    )
+    return {r[name_col]: float(r["weight"]) for r in edited.to_dict("records")}
+
+
+def _tuned_leaderboard(run_id: int, tuned: ScoringConfig, store: ScoringConfigStore) -> None:
+    st.subheader("Leaderboard with Tuned Weights")
+    if not run_id:
+        st.info("No saved scores yet. Recompute scores first to tune against them.")
+        return
+
+    fm = cached_feature_matrix(run_id)
+    current_ranks = cached_ranks(run_id, store.version, store.current())
+    compiled = compile_scoring(tuned)
+
+    t0 = time.perf_counter()
+    top = top_k(fm, compiled, k=TUNING_TOP_K)
+    elapsed_ms = (time.perf_counter() - t0) * 1000
+
+    rank = np.arange(1, len(top["idx"]) + 1)
+    was = current_ranks[top["idx"]]
+    st.caption(
+        f"Re-scored {len(fm):,} companies in {elapsed_ms:.0f} ms · tuned config version `{compiled.version}`"
+    )
+    st.dataframe(
+        pd.DataFrame(
+            {
+                "Rank": rank,
+                "Company Name": [fm.names[i] for i in top["idx"]],
+                "Total Score": top["total"],
+                "Team Score": top["team"],
+                "Market Score": top["market"],
+                "Funding Score": top["funding"],
+                "Current Rank": was,
+                "Rank Change": was - rank,
+            }
+        ),
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            c: st.column_config.NumberColumn(c, format="%.2f")
+            for c in ("Total Score", "Team Score", "Market Score", "Funding Score")
+        },
+    )
+
+    # --- Save / apply profile ---
+    c1, c2, c3 = st.columns([3, 1, 1])
+    name = c1.text_input("Profile name", placeholder="e.g. fintech-heavy")
+    slug = re.sub(r"[^A-Za-z0-9_-]+", "-", name).strip("-")
+    if c2.button("💾 Save profile", disabled=not slug):
+        path = PROFILE_DIR / f"{slug}.toml"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        dump_scoring_config(tuned, path)
+        st.success(f"Saved `{path}`. Score with it by setting {SCORING_CONFIG_ENV}={path}.")
+    if c3.button("Apply to recompute", help="Use these weights for Admin → Recompute on this server"):
+        store.set_config(tuned)
+        st.success(f"Scoring config `{compiled.version}` is active for this server's recomputes.")
 
 
 if __name__ == "__main__":
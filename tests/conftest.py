@@ -0,0 +1,35 @@
+# shared fixtures; `--run-slow` opts in to the long-running checks (marked `slow`)
+from __future__ import annotations
+
+import pytest
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    parser.addoption("--run-slow", action="store_true", help="also run tests marked slow (minutes each)")
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    config.addinivalue_line("markers", "slow: long-running check, skipped unless --run-slow")
+
+
+def pytest_collection_modifyitems(config: pytest.Config, items: list[pytest.Item]) -> None:
+    if config.getoption("--run-slow"):
+        return
+    skip = pytest.mark.skip(reason="slow: run with --run-slow")
+    for item in items:
+        if "slow" in item.keywords:
+            item.add_marker(skip)
+
+
+@pytest.fixture
+def db_path(tmp_path) -> str:
+    """A fresh scores DB (the schema is created on first connect)."""
+    return str(tmp_path / "merlin.db")
+
+
+@pytest.fixture(scope="session")
+def generator():
+    """Synthetic {raw_company, harmonic_raw} rows learned from the checked-in Harmonic sample."""
+    from src.merlin.synthetic import HarmonicProfile, SyntheticGenerator
+
+    return SyntheticGenerator(HarmonicProfile.from_file(), seed=7)
@@ -0,0 +1,78 @@
+# change-aware alerts: who is (re-)posted as scores, funding and founder highlights move between runs
+from __future__ import annotations
+
+from src.merlin.alerts import mark_notified, pending_alerts
+from src.merlin.db import connect
+from src.merlin.history import append_history, finish_run, start_run
+
+
+def _execute(db_path, sql, params=()):
+    conn = connect(db_path)
+    try:
+        with conn:
+            conn.execute(sql, params)
+    finally:
+        conn.close()
+
+
+def _step(db_path, totals):
+    """One finished run scoring `totals`, then what it alerts on (marked as posted, like notify_changes)."""
+    run_id = start_run(db_path, source="test")
+    conn = connect(db_path)
+    try:
+        with conn:
+            for key in totals:
+                conn.execute(
+                    "INSERT OR IGNORE INTO companies (company_key, company_name, updated_at) VALUES (?, ?, 'x')",
+                    (key, key),
+                )
+            append_history(conn, run_id, ((k, 0.0, 0.0, 0.0, t) for k, t in totals.items()))
+    finally:
+        conn.close()
+    finish_run(run_id, db_path, companies=len(totals))
+
+    alerts = pending_alerts(db_path, run_id=run_id, threshold=80.0, min_delta=5.0)
+    mark_notified(alerts, db_path, run_id=run_id, threshold=80.0, min_delta=5.0)
+    return {a["company_key"]: a["reasons"] for a in alerts}
+
+
+def test_alert_state_machine(db_path):
+    assert _step(db_path, {"a.com": 85.0, "b.com": 70.0}) == {"a.com": ["new"]}
+    assert _step(db_path, {"a.com": 87.0, "b.com": 70.0}) == {}  # moved less than min_delta
+    assert _step(db_path, {"a.com": 91.0, "b.com": 81.0}) == {"a.com": ["score +6.0"], "b.com": ["new"]}
+
+    _execute(db_path, "UPDATE companies SET harmonic_num_funding_rounds = 1 WHERE company_key = 'a.com'")
+    assert _step(db_path, {"a.com": 91.0}) == {"a.com": ["new funding"]}
+
+    _execute(
+        db_path,
+        "INSERT INTO founder_highlights (company_key, founder_idx, highlight_idx, category, text) "
+        "VALUES ('a.com', 0, 0, 'Prior Exit', 'x')",
+    )
+    assert _step(db_path, {"a.com": 91.0}) == {"a.com": ["new founder highlights"]}
+    assert _step(db_path, {"a.com": 91.0}) == {}  # nothing new since the last post
+
+    # hovering around the threshold keeps the state: no re-alert on the way back up
+    assert _step(db_path, {"a.com": 78.0}) == {}
+    assert _step(db_path, {"a.com": 90.0}) == {}
+    # falling below threshold - min_delta forgets it, so crossing again is news
+    assert _step(db_path, {"a.com": 60.0}) == {}
+    assert _step(db_path, {"a.com": 84.0}) == {"a.com": ["new"]}
+
+
+def test_unposted_alerts_stay_pending(db_path):
+    run_id = start_run(db_path, source="test")
+    conn = connect(db_path)
+    try:
+        with conn:
+            conn.execute("INSERT INTO companies (company_key, company_name, updated_at) VALUES ('a.com', 'A', 'x')")
+            append_history(conn, run_id, [("a.com", 0.0, 0.0, 0.0, 95.0)])
+    finally:
+        conn.close()
+    finish_run(run_id, db_path, companies=1)
+
+    # a crash before mark_notified re-alerts rather than losing the alert
+    assert [a["company_key"] for a in pending_alerts(db_path)] == ["a.com"]
+    assert [a["company_key"] for a in pending_alerts(db_path)] == ["a.com"]
+    mark_notified(pending_alerts(db_path), db_path)
+    assert pending_alerts(db_path) == []
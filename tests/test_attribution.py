@@ -0,0 +1,97 @@
+# attributions stay in step with `companies` across full and partial runs
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from src.merlin.db import connect
+from src.merlin.run_from_raw import run_from_raw
+from src.merlin.scoring import config
+from src.merlin.scoring.attribution import (
+    AttributionMatrix,
+    AttributionSink,
+    load_attribution,
+    merge_attributions_to_db,
+)
+from src.merlin.synthetic import write_synthetic_raw_json
+
+
+def _score(path, db_path):
+    run_from_raw(path, db_path, notify=False, verbose=False)
+
+
+def _attributions(db_path):
+    conn = connect(db_path)
+    try:
+        return {
+            (key, term): value
+            for key, term, value in conn.execute(
+                "SELECT a.company_key, t.term, a.value "
+                "FROM score_attributions a JOIN attribution_terms t USING (term_id)"
+            )
+        }
+    finally:
+        conn.close()
+
+
+def _unexplained(db_path):
+    """Scored companies without a single attribution row."""
+    conn = connect(db_path)
+    try:
+        return conn.execute(
+            "SELECT COUNT(*) FROM companies c "
+            "WHERE NOT EXISTS (SELECT 1 FROM score_attributions a WHERE a.company_key = c.company_key)"
+        ).fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_partial_run_keeps_other_companies_attributions(tmp_path, db_path, generator):
+    full = write_synthetic_raw_json(tmp_path / "full.json", 60, generator)
+    partial = write_synthetic_raw_json(tmp_path / "partial.json", 10, generator)  # the first 10 of the same rows
+
+    _score(full, db_path)
+    before = _attributions(db_path)
+    assert before and _unexplained(db_path) == 0
+
+    _score(partial, db_path)
+
+    assert _unexplained(db_path) == 0
+    assert _attributions(db_path) == before
+
+
+def test_partial_run_under_a_new_config_keeps_old_explanations(tmp_path, db_path, generator, monkeypatch):
+    full = write_synthetic_raw_json(tmp_path / "full.json", 60, generator)
+    partial = write_synthetic_raw_json(tmp_path / "partial.json", 10, generator)
+    _score(full, db_path)
+
+    weights = tmp_path / "weights.json"
+    weights.write_text(json.dumps({"composite": {"team": 0.6, "market": 0.2, "funding": 0.2}}))
+    monkeypatch.setattr(config, "_store", config.ScoringConfigStore(weights))
+    _score(partial, db_path)
+
+    conn = connect(db_path)
+    try:
+        totals = dict(conn.execute("SELECT company_key, score_total FROM companies"))
+    finally:
+        conn.close()
+    assert len(totals) == 60
+    for key, total in totals.items():
+        explained = sum(points for _, _, points in load_attribution(key, db_path))
+        assert explained == pytest.approx(total, abs=1e-6), key
+
+
+def test_sink_flushes_in_batches_like_one_merge(tmp_path):
+    rows = [(f"c{i}.com", [(f"team:t{i % 5}", float(i)), ("market:vertical=X", 1.0)]) for i in range(45)]
+    one = AttributionMatrix()
+    for key, contributions in rows:
+        one.add_row(key, contributions)
+    merge_attributions_to_db(one, str(tmp_path / "one.db"))
+
+    with AttributionSink(str(tmp_path / "batched.db"), flush_rows=7) as sink:
+        for key, contributions in rows:
+            sink.add_row(key, contributions)
+        assert len(sink) == 45 % 7  # only the unflushed tail is in memory
+
+    assert _attributions(str(tmp_path / "batched.db")) == _attributions(str(tmp_path / "one.db"))
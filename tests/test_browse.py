@@ -0,0 +1,72 @@
+# leaderboard browsing: keyset pages add up to the full filtered, sorted list, in either direction
+from __future__ import annotations
+
+import pytest
+
+from src.merlin.db import connect
+from src.merlin.queries import SORT_COLUMNS, browse_companies, count_companies, filter_options
+from src.merlin.run_from_raw import run_from_raw
+from src.merlin.synthetic import write_synthetic_raw_json
+
+
+@pytest.fixture(scope="module")
+def scored_db(tmp_path_factory, generator):
+    tmp = tmp_path_factory.mktemp("browse")
+    db_path = str(tmp / "merlin.db")
+    run_from_raw(write_synthetic_raw_json(tmp / "raw.json", 400, generator), db_path, notify=False, verbose=False)
+    return db_path
+
+
+def _expected(db_path, sort, descending, stages=None, min_score=None, signal=None):
+    """The whole result in one Python sort: sort column, then rowid (ascending when descending)."""
+    conn = connect(db_path)
+    try:
+        rows = conn.execute(f"SELECT company_key, {sort}, rowid, harmonic_stage, score_total FROM companies").fetchall()
+        signalled = {
+            k for (k,) in conn.execute("SELECT company_key FROM founder_highlights WHERE category = ?", (signal,))
+        }
+    finally:
+        conn.close()
+    rows = [
+        r for r in rows
+        if (stages is None or r[3] in stages)
+        and (min_score is None or r[4] >= min_score)
+        and (signal is None or r[0] in signalled)
+    ]
+    rows.sort(key=lambda r: (-r[1], r[2]) if descending else (r[1], -r[2]))
+    return [r[0] for r in rows]
+
+
+def _walk(db_path, limit, **kwargs):
+    keys, after, pages = [], None, 0
+    while True:
+        page = browse_companies(db_path, limit=limit, after=after, **kwargs)
+        assert len(page["rows"]) <= limit
+        keys += [r["company_key"] for r in page["rows"]]
+        pages += 1
+        after = page["next"]
+        if after is None:
+            return keys, pages
+
+
+@pytest.mark.parametrize("sort", SORT_COLUMNS)
+@pytest.mark.parametrize("descending", [True, False])
+def test_pages_cover_the_sorted_list_once(scored_db, sort, descending):
+    expected = _expected(scored_db, sort, descending)
+    keys, pages = _walk(scored_db, 17, sort=sort, descending=descending)
+
+    assert keys == expected  # ties included: nothing skipped or repeated across page boundaries
+    assert pages == -(-len(expected) // 17)
+
+
+def test_filtered_pages_match_count(scored_db):
+    options = filter_options(scored_db)
+    stages = options["stages"][:2]
+    signal = options["founder_signals"][0]
+    filters = dict(stages=stages, min_score=40.0, founder_signals=[signal])
+
+    keys, _ = _walk(scored_db, 7, **filters)
+
+    assert keys == _expected(scored_db, "score_total", True, stages=stages, min_score=40.0, signal=signal)
+    assert len(keys) == count_companies(scored_db, **filters) > 0
+    assert count_companies(scored_db, **filters, cap=3) == min(3, len(keys))
@@ -0,0 +1,110 @@
+# inbox daemon: a drop through every stage, checkpointed, with a synthetic Harmonic client
+from __future__ import annotations
+
+import threading
+from functools import partial
+
+import pytest
+
+from src.merlin import daemon as daemon_module, history, save_to_db
+from src.merlin.daemon import InboxDaemon
+from src.merlin.scoring import attribution
+from src.merlin.db import connect
+from src.merlin.synthetic import SyntheticHarmonicClient, write_synthetic_csv
+
+
+def _count(db_path, sql):
+    conn = connect(db_path)
+    try:
+        return conn.execute(sql).fetchone()[0]
+    finally:
+        conn.close()
+
+
+def _run_once(tmp_path, db_path, generator, **kwargs):
+    daemon = InboxDaemon(
+        tmp_path / "inbox",
+        db_path,
+        raw_dir=tmp_path / "raw",
+        poll_interval=0.01,
+        notify=False,
+        client_factory=partial(SyntheticHarmonicClient, generator),
+        **kwargs,
+    ).start()
+    daemon.run(once=True)
+    return daemon
+
+
+def test_drop_is_scored_in_checkpoints(tmp_path, db_path, generator, monkeypatch):
+    (tmp_path / "inbox").mkdir()
+    write_synthetic_csv(tmp_path / "inbox" / "first.csv", 250, generator)
+    batches = []
+    record = InboxDaemon._record_enriched
+    monkeypatch.setattr(
+        InboxDaemon, "_record_enriched", lambda self, found: (batches.append(len(found)), record(self, found))
+    )
+
+    daemon = _run_once(tmp_path, db_path, generator, checkpoint_rows=40)
+
+    (drop,) = daemon.completed
+    assert len(batches) >= 250 // 40 and max(batches) <= 40
+    assert drop.error is None
+    assert drop.scored == drop.companies - drop.known > 0
+    assert not daemon._pending
+    assert _count(db_path, "SELECT COUNT(*) FROM companies") == drop.scored
+    assert _count(db_path, "SELECT COUNT(DISTINCT company_key) FROM score_attributions") == drop.scored
+    assert _count(db_path, "SELECT COUNT(*) FROM enriched_domains") == drop.enriched
+    assert (tmp_path / "inbox" / "done" / drop.path.name).exists()
+    # every lookup reached the daemon's request metrics
+    http = daemon.http_metrics.summary()["synthetic:enrichCompanyByIdentifiers"]
+    assert http["requests"] == drop.companies - drop.known
+    assert http["statuses"] == {"200": http["requests"]}
+
+
+def test_second_drop_only_scores_new_companies(tmp_path, db_path, generator):
+    (tmp_path / "inbox").mkdir()
+    write_synthetic_csv(tmp_path / "inbox" / "first.csv", 60, generator)
+    _run_once(tmp_path, db_path, generator, checkpoint_rows=25)
+
+    # the same 60 companies plus 30 new ones (the generator is deterministic by row)
+    write_synthetic_csv(tmp_path / "inbox" / "second.csv", 90, generator)
+    daemon = _run_once(tmp_path, db_path, generator, checkpoint_rows=25)
+
+    (drop,) = daemon.completed
+    assert drop.known == 60
+    assert drop.scored == 30
+    assert _count(db_path, "SELECT COUNT(DISTINCT company_key) FROM score_attributions") == 90
+
+
+def test_score_thread_keeps_one_connection_across_drops_and_checkpoints(tmp_path, db_path, generator, monkeypatch):
+    opened = []
+    for module in (daemon_module, history, save_to_db, attribution):
+        def counted(*args, _connect=module.connect, **kwargs):
+            opened.append(threading.current_thread().name)
+            return _connect(*args, **kwargs)
+
+        monkeypatch.setattr(module, "connect", counted)
+    (tmp_path / "inbox").mkdir()
+    write_synthetic_csv(tmp_path / "inbox" / "first.csv", 120, generator)
+    daemon = _run_once(tmp_path, db_path, generator, checkpoint_rows=10)
+    write_synthetic_csv(tmp_path / "inbox" / "second.csv", 150, generator)
+    daemon = _run_once(tmp_path, db_path, generator, checkpoint_rows=10)
+
+    assert daemon.completed[0].scored == 30
+    assert opened.count("merlin-score") == 2  # one per daemon, however many checkpoints
+
+
+@pytest.mark.parametrize("companies", [0, 50])  # nothing new to score / a drop to score
+def test_not_idle_until_the_drop_is_finished(tmp_path, db_path, generator, monkeypatch, companies):
+    idle_at_finish = []
+    finish = InboxDaemon._finish_drop
+    monkeypatch.setattr(
+        InboxDaemon, "_finish_drop", lambda self, drop: (idle_at_finish.append(self._idle()), finish(self, drop))
+    )
+    (tmp_path / "inbox").mkdir()
+    write_synthetic_csv(tmp_path / "inbox" / "drop.csv", companies, generator)
+
+    daemon = _run_once(tmp_path, db_path, generator)
+
+    assert idle_at_finish == [False]
+    assert daemon._idle()
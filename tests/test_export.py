@@ -0,0 +1,35 @@
+# Parquet export: a run's partitions are written in fixed-size record batches and read back whole
+from __future__ import annotations
+
+import pyarrow.parquet as pq
+
+from src.merlin.db import connect
+from src.merlin.export import export_run, read_run
+from src.merlin.history import list_runs
+from src.merlin.run_from_raw import run_from_raw
+from src.merlin.synthetic import write_synthetic_raw_json
+
+
+def test_export_run_streams_each_partition_in_batches(tmp_path, db_path, generator):
+    run_from_raw(write_synthetic_raw_json(tmp_path / "raw.json", 300, generator), db_path, notify=False, verbose=False)
+    run_id = list_runs(db_path)[0]["run_id"]
+    out = tmp_path / "export"
+
+    paths = export_run(run_id, db_path, out, batch_rows=16)
+
+    conn = connect(db_path)
+    try:
+        scored = dict(conn.execute("SELECT company_key, score_total FROM score_history WHERE run_id = ?", (run_id,)))
+    finally:
+        conn.close()
+    table = read_run(run_id, out)
+    assert dict(zip(table["company_key"].to_pylist(), table["score_total"].to_pylist())) == scored
+    assert len(table) == len(scored)
+    for path in paths:
+        meta = pq.ParquetFile(path).metadata
+        assert max(meta.row_group(i).num_rows for i in range(meta.num_row_groups)) <= 16
+    assert not list(out.rglob("*.tmp"))
+
+    # exporting again replaces the run's files instead of adding to them
+    export_run(run_id, db_path, out, batch_rows=16)
+    assert len(read_run(run_id, out)) == len(scored)
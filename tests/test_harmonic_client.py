@@ -0,0 +1,22 @@
+# Harmonic GraphQL client errors: reported to the hook, payload in the exception, nothing on stdout
+from __future__ import annotations
+
+import pytest
+import requests
+
+from src.merlin.enrichment.harmonic_graphql_client import HarmonicGraphQLClient
+from src.merlin.enrichment.http_metrics import HttpMetrics
+from src.merlin.webhook_stub import WebhookStub
+
+
+def test_error_response_raises_with_its_payload(capsys):
+    metrics = HttpMetrics()
+    with WebhookStub(fail_first=1, fail_status=429) as stub:
+        client = HarmonicGraphQLClient(api_key="test", endpoint=stub.url, hook=metrics)
+        with pytest.raises(requests.HTTPError) as err:
+            client.enrich_company_by_domain("example.com")
+
+    assert err.value.response.status_code == 429  # what the enrichment workers back off on
+    assert "HTTP 429" in str(err.value) and "server_error" in str(err.value)
+    assert metrics.summary()["graphql:enrichCompanyByIdentifiers"]["statuses"] == {"429": 1}
+    assert capsys.readouterr().out == ""
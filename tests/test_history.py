@@ -0,0 +1,98 @@
+# score history: per-company baselines across partial runs, and the retention policy
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+from src.merlin.db import connect
+from src.merlin.history import (
+    STALE_RUN_HOURS,
+    append_history,
+    compact_history,
+    finish_run,
+    new_top_k_entrants,
+    runs_to_drop,
+    score_deltas,
+    score_trajectory,
+    start_run,
+    threshold_crossers,
+)
+
+
+def _run(db_path, totals, status="done"):
+    """One run that scored only `totals` ({company_key: score_total})."""
+    run_id = start_run(db_path, source="test")
+    conn = connect(db_path)
+    with conn:
+        append_history(conn, run_id, ((k, 0.0, 0.0, 0.0, t) for k, t in totals.items()))
+    conn.close()
+    finish_run(run_id, db_path, companies=len(totals), status=status)
+    return run_id
+
+
+def _keys(rows):
+    return [r["company_key"] for r in rows]
+
+
+def test_partial_run_is_compared_with_each_companys_own_baseline(db_path):
+    _run(db_path, {"a.com": 90.0, "b.com": 80.0, "c.com": 70.0})
+    _run(db_path, {"b.com": 60.0})  # an inbox drop: only b was rescored
+    _run(db_path, {"x.com": 99.0}, status="failed")  # never a baseline
+
+    third = _run(db_path, {"c.com": 72.0, "d.com": 75.0})
+
+    deltas = {r["company_key"]: (r["prev_total"], r["delta"]) for r in score_deltas(db_path)}
+    assert deltas == {"c.com": (70.0, 2.0), "d.com": (None, None)}  # c's baseline is run 1
+    # c was already above 65 (in run 1, absent from run 2): only d crossed
+    assert _keys(threshold_crossers(65.0, db_path)) == ["d.com"]
+    # top 3 as of run 2 is a 90, c 70, b 60 (not just b); as of run 3 d 75 pushes b out
+    assert _keys(new_top_k_entrants(3, db_path, run_id=third)) == ["d.com"]
+
+
+def test_small_drop_run_is_not_all_new_top_k_entrants(db_path):
+    _run(db_path, {"a.com": 90.0, "b.com": 80.0, "c.com": 70.0})
+    _run(db_path, {"e.com": 10.0})
+
+    assert new_top_k_entrants(2, db_path) == []
+    assert _keys(new_top_k_entrants(3, db_path)) == []
+    assert _keys(new_top_k_entrants(4, db_path)) == ["e.com"]
+
+
+def _at(hours_ago, now):
+    return (now - timedelta(hours=hours_ago)).isoformat(timespec="seconds")
+
+
+def test_runs_to_drop_spares_runs_in_progress():
+    now = datetime(2026, 5, 1, 12, tzinfo=timezone.utc)
+    runs = [  # newest first
+        (9, _at(1, now), "done"),
+        (8, _at(2, now), "running"),  # a long backfill, older than keep_last finished runs
+        (7, _at(3, now), "failed"),
+        (6, _at(STALE_RUN_HOURS + 1, now), "running"),  # its process died
+        (5, _at(24 * 8, now), "done"),
+        (4, _at(24 * 8 + 1, now), "done"),  # same week as 5
+        (3, _at(24 * 16, now), "done"),
+    ]
+
+    assert runs_to_drop(runs, keep_last=1, keep_every_days=7, now=now) == [7, 6, 4]
+    assert runs_to_drop(runs, keep_last=len(runs), now=now) == []
+
+
+def test_compact_keeps_every_companys_latest_snapshot(db_path):
+    first = _run(db_path, {"a.com": 50.0, "b.com": 40.0})
+    second = _run(db_path, {"a.com": 55.0, "only-here.com": 30.0})  # partial
+    _run(db_path, {"a.com": 60.0, "b.com": 45.0})
+    failed = _run(db_path, {"a.com": 1.0}, status="failed")
+    _run(db_path, {"a.com": 65.0})
+
+    # all started today: one run kept in full, the rest thinned (1 and 2) or failed
+    assert compact_history(db_path, keep_last=1) == 2  # run 1 is gone, run 2 is emptied to its latest rows
+
+    conn = connect(db_path)
+    try:
+        left = conn.execute("SELECT run_id, company_key FROM score_history ORDER BY run_id, company_key").fetchall()
+        runs = [r[0] for r in conn.execute("SELECT run_id FROM runs ORDER BY run_id")]
+    finally:
+        conn.close()
+    assert first not in runs and failed not in runs
+    assert (second, "only-here.com") in left and (second, "a.com") not in left
+    assert [p["score_total"] for p in score_trajectory("only-here.com", db_path)] == [30.0]
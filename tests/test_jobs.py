@@ -0,0 +1,96 @@
+# durable enrichment queue: leases, fencing tokens, retries, and several worker processes on one DB
+from __future__ import annotations
+
+import json
+import multiprocessing as mp
+
+from src.merlin.db import connect
+from src.merlin.enrichment import jobs
+from src.merlin.enrichment.jobs import JobQueue, _work
+from src.merlin.keys import canonical_domain
+from src.merlin.models import RawCompany
+
+
+def _companies(n, prefix="co"):
+    return [RawCompany(f"{prefix} {i}", f"https://www.{prefix}{i}.com/", "", "Seed", "") for i in range(n)]
+
+
+class _EchoClient:
+    """Harmonic stand-in; module level so spawned worker processes can build it."""
+
+    def __init__(self, hook=None) -> None:
+        pass
+
+    def enrich_company_by_domain(self, domain):
+        return {"companyFound": True, "company": {"name": domain}}
+
+
+def test_enqueue_is_one_job_per_domain(db_path):
+    with JobQueue(db_path) as queue:
+        assert queue.enqueue(_companies(3)) == 3
+        # same companies under other URL spellings: canonical domain already queued
+        assert queue.enqueue([RawCompany("co 0", "http://co0.com", "", "", "")]) == 0
+        (job,) = queue.claim("w1")
+        assert queue.complete(job, {"companyFound": False})
+        assert queue.enqueue(_companies(3)) == 0  # a finished job keeps its result
+        assert queue.enqueue(_companies(3), refresh=True) == 1  # ... until refreshed
+        assert queue.stats() == {"pending": 3, "leased": 0, "done": 0, "dead": 0}
+
+
+def test_expired_lease_is_reclaimed_and_the_old_holder_is_fenced_off(db_path):
+    with JobQueue(db_path) as queue:
+        queue.enqueue(_companies(1))
+        (stale,) = queue.claim("w1", lease_s=0.0)  # its worker hangs past the visibility timeout
+        (fresh,) = queue.claim("w2")
+        assert (fresh.id, fresh.attempts) == (stale.id, 2)
+        assert queue.claim("w3") == []  # held by w2 now
+
+        assert not queue.complete(stale, {"companyFound": True})  # late result is dropped
+        assert not queue.fail(stale, "boom")
+        assert queue.complete(fresh, {"companyFound": True, "company": {}})
+        assert queue.stats()["done"] == 1
+
+
+def test_failures_back_off_then_go_dead(db_path, monkeypatch):
+    monkeypatch.setattr(jobs, "JOB_BASE_DELAY_S", 0.0)  # retry at once
+    with JobQueue(db_path) as queue:
+        queue.enqueue(_companies(1))
+        for attempt in (1, 2):
+            (job,) = queue.claim("w1")
+            assert job.attempts == attempt
+            assert queue.fail(job, "HTTPError: 500", max_attempts=3)
+            assert queue.stats()["pending"] == 1
+        (job,) = queue.claim("w1")
+        assert queue.release(job)  # rate limited: doesn't count as an attempt
+        (job,) = queue.claim("w1")
+        assert job.attempts == 3
+        assert queue.fail(job, "HTTPError: 500", max_attempts=3)
+        assert queue.stats()["dead"] == 1 and queue.claim("w1") == []
+
+        assert queue.requeue_dead() == 1
+        assert queue.claim("w1")[0].attempts == 1
+
+
+def test_worker_processes_finish_every_job_exactly_once(tmp_path, db_path):
+    with JobQueue(db_path) as queue:
+        queue.enqueue(_companies(120))
+    options = dict(
+        threads=2, rate=1000.0, burst=50, poll_interval=0.05, client_factory=_EchoClient, until_empty=True
+    )
+
+    with mp.get_context("spawn").Pool(2) as pool:
+        counts = pool.starmap(_work, [(db_path, dict(options)), (db_path, dict(options))])
+
+    assert sum(c["done"] for c in counts) == 120
+    assert sum(c["lost"] + c["failed"] for c in counts) == 0
+    conn = connect(db_path)
+    try:
+        rows = conn.execute("SELECT domain, status, attempts, result FROM enrichment_jobs").fetchall()
+    finally:
+        conn.close()
+    assert {(status, attempts) for _, status, attempts, _ in rows} == {("done", 1)}
+    # every result belongs to its own job
+    assert all(canonical_domain(json.loads(result)["company"]["name"]) == domain for domain, _, _, result in rows)
+
+    with JobQueue(db_path) as queue:
+        assert queue.export(tmp_path / "raw.json") == 120
@@ -0,0 +1,84 @@
+# normalized founders / tags / investors: query helpers agree with the JSON columns, and follow updates
+from __future__ import annotations
+
+import json
+from collections import defaultdict
+
+from src.merlin.db import connect
+from src.merlin.queries import (
+    companies_by_founder,
+    companies_by_founder_highlight,
+    companies_by_investor,
+    companies_by_tag,
+    founders_of,
+)
+from src.merlin.run_from_raw import run_from_raw
+from src.merlin.save_to_db import COMPANY_COLUMNS, upsert_company_rows
+from src.merlin.synthetic import write_synthetic_raw_json
+
+
+def _json_index(db_path):
+    """What a full scan + JSON parse would find: {kind: {value: {company_key}}}."""
+    index = defaultdict(lambda: defaultdict(set))
+    conn = connect(db_path)
+    try:
+        for key, investors, sub_verticals, founders in conn.execute(
+            "SELECT company_key, harmonic_investors, market_sub_verticals, founders FROM companies"
+        ):
+            for investor in json.loads(investors or "[]"):
+                index["investor"][investor.lower()].add(key)
+            for tag in json.loads(sub_verticals or "[]"):
+                index["sub_vertical"][tag.lower()].add(key)
+            for founder in json.loads(founders or "[]"):
+                index["founder"][founder["name"].lower()].add(key)
+                for h in founder.get("highlights") or []:
+                    index["highlight"][h["category"]].add(key)
+    finally:
+        conn.close()
+    return index
+
+
+def _keys(rows):
+    return {r["company_key"] for r in rows}
+
+
+def test_lookups_match_the_json_columns(tmp_path, db_path, generator):
+    run_from_raw(write_synthetic_raw_json(tmp_path / "raw.json", 200, generator), db_path, notify=False, verbose=False)
+    index = _json_index(db_path)
+
+    for kind, lookup in (
+        ("investor", companies_by_investor),
+        ("sub_vertical", lambda v, db: companies_by_tag(v, "market_sub_vertical", db)),
+        ("founder", companies_by_founder),
+        ("highlight", companies_by_founder_highlight),
+    ):
+        values = sorted(index[kind], key=lambda v: -len(index[kind][v]))[:5]
+        assert values, kind
+        for value in values:
+            assert _keys(lookup(value.upper() if kind != "highlight" else value, db_path)) == index[kind][value]
+
+    most_backed = max(index["investor"], key=lambda v: len(index["investor"][v]))
+    rows = companies_by_investor(most_backed, db_path)
+    assert len(rows) > 1 and [r["score_total"] for r in rows] == sorted((r["score_total"] for r in rows), reverse=True)
+
+
+def test_update_replaces_a_companys_child_rows(tmp_path, db_path, generator):
+    run_from_raw(write_synthetic_raw_json(tmp_path / "raw.json", 50, generator), db_path, notify=False, verbose=False)
+    conn = connect(db_path)
+    try:
+        key, investors = conn.execute(
+            "SELECT company_key, harmonic_investors FROM companies WHERE harmonic_investors <> '[]' LIMIT 1"
+        ).fetchone()
+        old = json.loads(investors)[0]
+        select = f"SELECT {', '.join(COMPANY_COLUMNS)} FROM companies WHERE company_key = ?"
+        row = list(conn.execute(select, (key,)).fetchone())
+        row[COMPANY_COLUMNS.index("harmonic_investors")] = json.dumps(["New Fund"])
+        row[COMPANY_COLUMNS.index("founders")] = "[]"
+        with conn:
+            assert upsert_company_rows(conn, [row]) == 1
+    finally:
+        conn.close()
+
+    assert key not in _keys(companies_by_investor(old, db_path))
+    assert _keys(companies_by_investor("new fund", db_path)) == {key}
+    assert founders_of(key, db_path) == []
@@ -0,0 +1,47 @@
+# the streaming pipeline's peak RSS does not grow with the input (the slow check runs with --run-slow)
+from __future__ import annotations
+
+import os
+
+import pytest
+
+from src.merlin.bench import (
+    PIPELINE_RSS_THRESHOLD,
+    PIPELINE_SIZES,
+    PIPELINE_WARMUP_MB,
+    PIPELINE_WORKERS,
+    format_report,
+    rss_growth,
+    run_benchmarks,
+)
+
+# 10k -> 1M by default (about 40 minutes); e.g. MERLIN_RSS_SIZES=10000,100000,300000 for a quicker run
+SIZES = tuple(int(n) for n in os.environ.get("MERLIN_RSS_SIZES", "").split(",") if n) or PIPELINE_SIZES
+
+
+def _report(peaks):
+    return {
+        "results": {
+            str(n): {"pipeline": {"stage": "pipeline", "companies": n, "peak_rss_mb": mb}}
+            for n, mb in peaks.items()
+        }
+    }
+
+
+def test_rss_growth_allows_warmup_but_not_a_leak():
+    # the measured run, and one leaking ~40 bytes per company past the warm-up
+    flat = _report({10_000: 201.0, 100_000: 265.0, 300_000: 274.0, 1_000_000: 278.0})
+    leak = _report({10_000: 201.0, 100_000: 265.0, 300_000: 273.0, 1_000_000: 301.0})
+
+    assert rss_growth(flat, PIPELINE_RSS_THRESHOLD) != []  # no allowance: the warm-up alone fails
+    assert rss_growth(flat, PIPELINE_RSS_THRESHOLD, warmup_mb=PIPELINE_WARMUP_MB) == []
+    assert rss_growth(leak, PIPELINE_RSS_THRESHOLD, warmup_mb=PIPELINE_WARMUP_MB) == [
+        "pipeline: peak RSS 301MB @ 1,000,000 vs 265MB @ 100,000"
+    ]
+
+
+@pytest.mark.slow
+def test_pipeline_peak_rss_is_flat_across_sizes():
+    report = run_benchmarks(SIZES, workers=PIPELINE_WORKERS)  # one fresh process per size
+
+    assert rss_growth(report, PIPELINE_RSS_THRESHOLD, warmup_mb=PIPELINE_WARMUP_MB) == [], format_report(report)
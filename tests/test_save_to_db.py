@@ -0,0 +1,58 @@
+# companies persistence: keyed UPSERTs that only touch changed rows, and indexed reads
+from __future__ import annotations
+
+import json
+
+from src.merlin.db import connect
+from src.merlin.run_from_raw import run_from_raw
+from src.merlin.synthetic import write_synthetic_raw_json
+
+
+def _stamps(db_path):
+    conn = connect(db_path)
+    try:
+        return dict(conn.execute("SELECT company_key, updated_at FROM companies"))
+    finally:
+        conn.close()
+
+
+def test_rerun_only_rewrites_changed_companies(tmp_path, db_path, generator):
+    raw = write_synthetic_raw_json(tmp_path / "raw.json", 200, generator)
+    run_from_raw(raw, db_path, notify=False, verbose=False)
+    first = _stamps(db_path)
+    assert len(first) > 0
+
+    run_from_raw(raw, db_path, notify=False, verbose=False)  # same input: no row is written
+    assert _stamps(db_path) == first
+
+    rows = json.loads(raw.read_text())
+    changed = next(r for r in rows if (r["harmonic_raw"] or {}).get("company"))
+    changed["raw_company"]["name"] = "Renamed Inc"
+    raw.write_text(json.dumps(rows))
+    run_from_raw(raw, db_path, notify=False, verbose=False)
+
+    after = _stamps(db_path)
+    assert after.keys() == first.keys()  # keyed by domain: no duplicates
+    (rewritten,) = [k for k in after if after[k] != first[k]]
+    assert _name(db_path, rewritten) == "Renamed Inc"
+
+
+def _name(db_path, key):
+    conn = connect(db_path)
+    try:
+        return conn.execute("SELECT company_name FROM companies WHERE company_key = ?", (key,)).fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_leaderboard_reads_use_the_score_index(db_path):
+    conn = connect(db_path)
+    try:
+        plan = " ".join(
+            r[-1] for r in conn.execute("EXPLAIN QUERY PLAN SELECT * FROM companies ORDER BY score_total DESC LIMIT 10")
+        )
+        (mode,) = conn.execute("PRAGMA journal_mode").fetchone()
+    finally:
+        conn.close()
+    assert "idx_companies_score_total" in plan
+    assert mode == "wal"  # the app keeps reading while a run writes
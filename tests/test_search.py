@@ -0,0 +1,51 @@
+# full-text search stays pointed at the right companies across deletes, migration and VACUUM
+from __future__ import annotations
+
+import sqlite3
+
+from src.merlin.db import MIGRATIONS, connect, sync_search_index
+from src.merlin.queries import search_companies
+
+WORDS = ["alpha", "bravo", "charlie", "delta", "echo", "foxtrot", "golf", "hotel", "india", "juliet"]
+
+
+def _v10_db(db_path):
+    """A DB as the v10 schema left it: companies keyed by an implicit rowid."""
+    conn = sqlite3.connect(db_path)
+    for version, migrate in enumerate(MIGRATIONS[:10]):
+        with conn:
+            migrate(conn)
+            conn.execute(f"PRAGMA user_version = {version + 1}")
+    return conn
+
+
+def test_search_survives_company_id_migration_and_vacuum(db_path):
+    conn = _v10_db(db_path)
+    with conn:
+        conn.executemany(
+            "INSERT INTO companies (company_key, company_name, description, updated_at) VALUES (?, ?, ?, 'x')",
+            [(f"{w}.com", f"{w.title()} Labs", f"the {w} company") for w in WORDS],
+        )
+        sync_search_index(conn)
+        # leave rowid gaps, which VACUUM may pack in a table without an INTEGER PRIMARY KEY
+        deleted = WORDS[:-1:2]
+        conn.executemany(
+            "DELETE FROM company_search WHERE rowid = (SELECT rowid FROM companies WHERE company_key = ?)",
+            [(f"{w}.com",) for w in deleted],
+        )
+        conn.executemany("DELETE FROM companies WHERE company_key = ?", [(f"{w}.com",) for w in deleted])
+    rowids = dict(conn.execute("SELECT company_key, rowid FROM companies"))
+    conn.close()
+
+    conn = connect(db_path)  # migrates
+    try:
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == len(MIGRATIONS)
+        assert "idx_companies_sectors" not in {r[0] for r in conn.execute("SELECT name FROM sqlite_master")}
+        assert dict(conn.execute("SELECT company_key, company_id FROM companies")) == rowids
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+
+    for w in WORDS:
+        hits = [h["company_key"] for h in search_companies(w, db_path)]
+        assert hits == ([] if w in deleted else [f"{w}.com"]), w
@@ -0,0 +1,49 @@
+# sharded runs: N local processes partition the companies, and the merge ranks them like one run would
+from __future__ import annotations
+
+import pytest
+
+from src.merlin.db import connect
+from src.merlin.history import list_runs
+from src.merlin.leaderboard import run_top_k
+from src.merlin.run_from_raw import run_from_raw
+from src.merlin.sharding import Shard, run_local, shard_of
+from src.merlin.synthetic import write_synthetic_raw_json
+
+
+def _scores(db_path, run_id):
+    conn = connect(db_path)
+    try:
+        return dict(conn.execute("SELECT company_key, score_total FROM score_history WHERE run_id = ?", (run_id,)))
+    finally:
+        conn.close()
+
+
+def test_shard_spec():
+    assert Shard.parse("2/8") == Shard(2, 8)
+    for bad in ("8/8", "-1/4", "x", "1/2/3"):
+        with pytest.raises(ValueError):
+            Shard.parse(bad)
+    # exactly one owner, the same for every spelling of a domain
+    owners = {d: [i for i in range(4) if Shard(i, 4).owns(d)] for d in ("https://www.a.com/", "A.com", "a.com")}
+    assert len({tuple(o) for o in owners.values()}) == 1 and len(owners["a.com"]) == 1
+    # and the partition is balanced
+    sizes = [0] * 4
+    for i in range(4000):
+        sizes[shard_of(f"company{i}.com", 4)] += 1
+    assert min(sizes) > 900
+
+
+def test_local_shards_merge_into_the_single_node_ranking(tmp_path, generator):
+    raw = write_synthetic_raw_json(tmp_path / "raw.json", 300, generator)
+    single_db, merged_db = str(tmp_path / "single.db"), str(tmp_path / "merged.db")
+    run_from_raw(raw, single_db, notify=False, verbose=False)
+    single_run = list_runs(single_db)[0]["run_id"]
+
+    merged_run = run_local(3, raw=str(raw), db_path=merged_db, top_k=25)
+
+    shard_keys = [set(_scores(str(Shard(i, 3).path(merged_db)), 1)) for i in range(3)]
+    assert all(shard_keys) and sum(map(len, shard_keys)) == len(set().union(*shard_keys))  # disjoint, none empty
+    assert _scores(merged_db, merged_run) == _scores(single_db, single_run)
+    for k in (10, 100):
+        assert run_top_k(merged_run, merged_db, k) == run_top_k(single_run, single_db, k)
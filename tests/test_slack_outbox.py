@@ -0,0 +1,124 @@
+# Slack outbox delivery against the local webhook stub: ordering, retry / backoff, dead letters, leases
+from __future__ import annotations
+
+import time
+
+import pytest
+
+from src.merlin import notify
+from src.merlin.db import connect
+from src.merlin.notify import RateLimiter, deliver_pending, enqueue_slack_message, flush_outbox
+from src.merlin.webhook_stub import WebhookStub
+
+
+@pytest.fixture(autouse=True)
+def fast_retries(monkeypatch):
+    # no 1 msg/s pacing and millisecond backoffs, so retries are due almost at once
+    monkeypatch.setattr(notify, "slack_rate_limiter", RateLimiter(rate_per_s=1000.0, burst=1000))
+    monkeypatch.setattr(notify, "OUTBOX_BASE_DELAY_S", 0.05)
+
+
+def _enqueue(db_path, *texts):
+    for text in texts:
+        assert enqueue_slack_message(text, idempotency_key=f"key-{text}", db_path=db_path)
+
+
+def _rows(db_path):
+    conn = connect(db_path)
+    try:
+        return conn.execute(
+            "SELECT idempotency_key, status, attempts, next_attempt_at FROM slack_outbox ORDER BY id"
+        ).fetchall()
+    finally:
+        conn.close()
+
+
+def _texts(stub):
+    return [p["text"] for p in stub.delivered()]
+
+
+def _wait_until_due(db_path):
+    due = max(next_at for _, status, _, next_at in _rows(db_path) if status == "pending")
+    time.sleep(max(due - time.time(), 0.0) + 0.01)
+
+
+def test_delivers_in_queue_order(db_path):
+    _enqueue(db_path, "a", "b", "c")
+    with WebhookStub() as stub:
+        assert deliver_pending(db_path, url=stub.url) == 3
+
+    assert _texts(stub) == ["a", "b", "c"]
+    assert [r["key"] for r in stub.received] == ["key-a", "key-b", "key-c"]
+    assert [status for _, status, _, _ in _rows(db_path)] == ["sent"] * 3
+
+
+def test_failed_head_backs_off_and_blocks_the_queue(db_path):
+    _enqueue(db_path, "a", "b")
+    with WebhookStub(fail_first=1) as stub:
+        before = time.time()
+        assert deliver_pending(db_path, url=stub.url) == 0
+        (_, status, attempts, next_at), second = _rows(db_path)
+        assert (status, attempts) == ("pending", 1)
+        assert next_at > before
+        assert second[1:3] == ("pending", 0)
+
+        # still backing off: nothing is posted, "b" does not overtake "a"
+        assert deliver_pending(db_path, url=stub.url) == 0
+        assert len(stub.received) == 1
+
+        _wait_until_due(db_path)
+        assert deliver_pending(db_path, url=stub.url) == 2
+
+    assert [r["status"] for r in stub.received] == [500, 200, 200]
+    assert _texts(stub) == ["a", "b"]
+
+
+def test_message_goes_dead_after_max_attempts(db_path):
+    _enqueue(db_path, "a", "b")
+    with WebhookStub(fail_first=2) as stub:
+        assert deliver_pending(db_path, url=stub.url, max_attempts=2) == 0
+        _wait_until_due(db_path)
+        assert deliver_pending(db_path, url=stub.url, max_attempts=2) == 0
+        assert [status for _, status, _, _ in _rows(db_path)] == ["dead", "pending"]
+
+        # the dead head no longer blocks the queue
+        assert deliver_pending(db_path, url=stub.url, max_attempts=2) == 1
+
+    assert _texts(stub) == ["b"]
+
+
+def test_expired_lease_is_redelivered_with_the_same_key(db_path):
+    _enqueue(db_path, "a")
+    with WebhookStub() as stub:
+        assert deliver_pending(db_path, url=stub.url) == 1
+
+        # a worker claimed it again and died mid-post: the lease blocks delivery ...
+        conn = connect(db_path)
+        with conn:
+            conn.execute(
+                "UPDATE slack_outbox SET status = 'sending', next_attempt_at = ?",
+                (time.time() + notify.OUTBOX_LEASE_S,),
+            )
+        assert deliver_pending(db_path, url=stub.url) == 0
+
+        # ... until it expires; the retry reuses the idempotency key, so Slack can dedupe it
+        with conn:
+            conn.execute("UPDATE slack_outbox SET next_attempt_at = ?", (time.time() - 1,))
+        conn.close()
+        assert deliver_pending(db_path, url=stub.url) == 1
+
+    assert [r["key"] for r in stub.received] == ["key-a", "key-a"]
+    assert stub.duplicates == 1
+    assert _rows(db_path)[0][1:3] == ("sent", 2)
+
+
+def test_flush_outbox_stops_at_its_timeout(db_path, monkeypatch):
+    _enqueue(db_path, "a", "b")
+    with WebhookStub(delay_s=2.0) as stub:
+        monkeypatch.setenv(notify.SLACK_WEBHOOK_ENV, stub.url)
+        started = time.monotonic()
+        assert flush_outbox(db_path, timeout=0.3) == 0
+        assert time.monotonic() - started < 1.5
+
+    # the timed-out post is retried later like any other failure
+    assert [(status, attempts) for _, status, attempts, _ in _rows(db_path)] == [("pending", 1), ("pending", 0)]
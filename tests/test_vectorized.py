@@ -0,0 +1,43 @@
+# vectorized top-K agrees with the streaming leaderboard
+from __future__ import annotations
+
+from src.merlin.history import list_runs
+from src.merlin.leaderboard import run_top_k
+from src.merlin.run_from_raw import run_from_raw
+from src.merlin.scoring.vectorized import FeatureMatrix, load_feature_matrix_from_db, top_k
+from src.merlin.synthetic import write_synthetic_raw_json
+
+
+def _matrix(features):
+    keys = [f"c{i}.com" for i in range(len(features))]
+    return FeatureMatrix.from_features(keys, keys, features)
+
+
+def test_top_k_breaks_ties_by_input_order():
+    # every third company scores higher; the rest tie far below the cut
+    strong = {"headcount": 50, "stage": "Seed"}
+    fm = _matrix([strong if i % 3 == 0 else {} for i in range(1000)])
+
+    out = top_k(fm, k=10)
+
+    assert out["idx"].tolist() == list(range(0, 30, 3))
+    assert (out["total"] == out["total"][0]).all()
+
+
+def test_top_k_cut_inside_a_tie_keeps_the_earliest():
+    fm = _matrix([{}] * 500)
+
+    assert top_k(fm, k=7)["idx"].tolist() == list(range(7))
+    assert len(top_k(fm, k=0)["idx"]) == 0
+    assert len(top_k(fm, k=1000)["idx"]) == 500
+
+
+def test_top_k_from_the_db_matches_run_top_k(tmp_path, db_path, generator):
+    # rows are inserted in file order, not key order; many companies tie
+    run_from_raw(write_synthetic_raw_json(tmp_path / "raw.json", 1000, generator), db_path, notify=False, verbose=False)
+    run_id = list_runs(db_path)[0]["run_id"]
+    fm = load_feature_matrix_from_db(db_path)
+
+    for k in (10, 100, 1000):
+        out = top_k(fm, k=k)
+        assert [fm.keys[i] for i in out["idx"]] == [e.website_domain for e in run_top_k(run_id, db_path, k=k)]